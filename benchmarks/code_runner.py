@@ -0,0 +1,72 @@
+"""Latency of the Coding Challenge sandbox when a whole class submits at once.
+
+Sends ``--students`` submissions concurrently to ``utils.code_runner.CodeRunner``
+and reports per-submission latency percentiles and total time, for the warm
+pool (fork servers started once) and for a cold start per submission (a new
+interpreter for every run, as a naive runner would do).
+
+    python benchmarks/code_runner.py --students 30 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SUBMISSIONS = [
+    "def calculate_average(numbers):\n    if not numbers:\n        return 0\n    return sum(numbers) / len(numbers)",
+    "def calculate_average(numbers):\n    total = 0\n    for num in numbers:\n        total += num\n    return total / len(numbers)",
+    "def calculate_average(numbers):\n    if len(numbers) == 0:\n        raise ValueError('empty')\n    return sum(numbers) / len(numbers)",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def run_class(submit, students, concurrency):
+    def one(n):
+        started = time.perf_counter()
+        result = submit(SUBMISSIONS[n % len(SUBMISSIONS)])
+        return time.perf_counter() - started, result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(students)))
+    return time.perf_counter() - started, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=4, help="warm sandbox processes")
+    args = parser.parse_args()
+    sys.path.insert(0, ROOT)
+    from utils.code_runner import CodeRunner
+
+    warm = CodeRunner(workers=args.workers).start()
+    warm.run(SUBMISSIONS[0])  # let every fork server finish starting up
+
+    def cold(code):
+        runner = CodeRunner(workers=1).start()
+        try:
+            return runner.run(code)
+        finally:
+            runner.close()
+
+    print(f"{'mode':<6}{'total':>9}{'p50':>9}{'p95':>9}{'max':>9}  verdicts")
+    for name, submit, concurrency in (("warm", warm.run, args.students), ("cold", cold, args.workers)):
+        total, outcomes = run_class(submit, args.students, concurrency)
+        latencies = [latency for latency, _ in outcomes]
+        verdicts = sorted({f"{result['passed']}/{result['total']}" for _, result in outcomes})
+        print(f"{name:<6}{total:>8.2f}s" + "".join(
+            f"{percentile(latencies, pct):>8.2f}s" for pct in (50, 95, 100)
+        ) + f"  {', '.join(verdicts)}")
+    warm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Memory per forum post, before and after the compact records.
+
+Builds the same synthetic posts (with tags and a few replies each) as the old
+representation (plain dicts with formatted date strings, tag lists and
+lists of reply dicts) and as ``utils.forum_records.Post`` objects, and
+reports the bytes allocated per post measured with ``tracemalloc``.
+
+    python benchmarks/forum_memory.py --posts 10000 100000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_posts(count, seed=0):
+    """Yield ``(fields, replies)`` tuples; text is built fresh for every post."""
+    sys.path.insert(0, ROOT)
+    from utils.forum_records import INSIGHT_CATEGORIES, QUESTION_TAGS, RESOURCE_TYPES
+
+    rng = random.Random(seed)
+    now = int(time.time())
+    for idx in range(count):
+        post_type = ("insight", "question", "resource")[idx % 3]
+        tags = rng.sample(INSIGHT_CATEGORIES if post_type == "insight" else QUESTION_TAGS, 2)
+        fields = {
+            "id": idx + 1,
+            "type": post_type,
+            "title": f"Post {idx} about prompting",
+            "content": f"Body of post {idx}: how I use AI tools for coursework.",
+            "author": f"Student {idx % 500:06d}",
+            "created_at": now - idx * 60,
+            "tags": tags if post_type != "resource" else [],
+            "resource_type": RESOURCE_TYPES[idx % len(RESOURCE_TYPES)] if post_type == "resource" else None,
+            "url": "https://example.com" if post_type == "resource" else None,
+        }
+        replies = [
+            (f"Student {(idx + n) % 500:06d}", f"Reply {n} to post {idx}", now - idx * 60 + n)
+            for n in range(rng.randint(0, 4))
+        ] if post_type != "resource" else []
+        yield fields, replies
+
+
+def format_date(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+def build_dicts(posts):
+    result = []
+    for fields, replies in posts:
+        post = {
+            "id": fields["id"],
+            "type": fields["type"],
+            "title": fields["title"],
+            "content": fields["content"],
+            "author": fields["author"],
+            "date": format_date(fields["created_at"]),
+            "created_at": fields["created_at"],
+            "categories": list(fields["tags"]) if fields["type"] == "insight" else [],
+            "tags": list(fields["tags"]) if fields["type"] == "question" else [],
+            "comments": [],
+            "answers": [],
+            "votes": 0,
+            "saves": 0,
+        }
+        kind = "comments" if fields["type"] == "insight" else "answers"
+        for author, content, created_at in replies:
+            post[kind].append({"author": author, "content": content, "date": format_date(created_at)})
+        if fields["type"] == "resource":
+            post.update(resource_type=fields["resource_type"], url=fields["url"],
+                        description=fields["content"])
+        result.append(post)
+    return result
+
+
+def build_records(posts):
+    from utils.forum_records import Post
+
+    result = []
+    for fields, replies in posts:
+        post = Post(**fields)
+        kind = "comments" if fields["type"] == "insight" else "answers"
+        for author, content, created_at in replies:
+            post.add_reply(kind, author, content, created_at)
+        result.append(post)
+    return result
+
+
+def measure(builder, count):
+    gc.collect()
+    tracemalloc.start()
+    # Only what the built posts keep alive is still traced at the end
+    built = builder(synthetic_posts(count))
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    return used / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'posts':>8} {'dicts B/post':>14} {'records B/post':>16} {'saving':>8}")
+    for count in args.posts:
+        before = measure(build_dicts, count)
+        after = measure(build_records, count)
+        print(f"{count:>8} {before:>14.0f} {after:>16.0f} {1 - after / before:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Rerun cost of forum actions with a large feed on screen.
+
+Seeds a throwaway forum with ``--posts`` posts, opens every page of every
+feed, and times a Save click three ways:
+
+- full page: the whole script reruns and rebuilds every card (how every
+  save, upvote, comment and answer behaved before cards became fragments)
+- paginated page: the same full rerun with only the first page of each feed
+- card fragment: only the clicked card's fragment reruns
+
+``AppTest`` always reruns the whole script, so the fragment case is timed
+with a script that renders just that one card, which is the work Streamlit
+does for a fragment rerun.
+
+    python benchmarks/forum_rerun.py --posts 1000 --runs 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE = os.path.join(ROOT, "pages", "4_Community_Forum.py")
+
+
+def card_app(page, root, post_id):
+    import importlib.util
+    import sys
+
+    sys.path.insert(0, root)
+    spec = importlib.util.spec_from_file_location("forum_page", page)
+    forum_page = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(forum_page)
+    forum_page.resource_card(post_id)
+
+
+def time_saves(at, post_id, runs):
+    at.run()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        at.button(key=f"save_{post_id}").click().run()
+        timings.append(time.perf_counter() - started)
+        assert not at.exception, at.exception
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ["STUDY_BUDDY_DATA_DIR"] = tempfile.mkdtemp(prefix="forum-bench-")
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    from utils.forum_store import POST_TYPES, ForumStore
+
+    store = ForumStore()
+    for idx in range(args.posts):
+        post_type = POST_TYPES[idx % len(POST_TYPES)]
+        store.add_post(post_type, f"Post {idx}", f"Body of post {idx} about prompts and citations.",
+                       "bench", categories=["Writing"], tags=["ChatGPT"],
+                       resource_type="Article", url="https://example.com")
+    post_id = store.page("resource", limit=1)[0][0]["id"]
+
+    results = {}
+    full = AppTest.from_file(PAGE, default_timeout=120)
+    full.session_state["forum_pages"] = {post_type: args.posts for post_type in POST_TYPES}
+    results["full page (all posts)"] = time_saves(full, post_id, args.runs)
+
+    paginated = AppTest.from_file(PAGE, default_timeout=120)
+    results["full page (first page per feed)"] = time_saves(paginated, post_id, args.runs)
+
+    card = AppTest.from_function(card_app, args=(PAGE, ROOT, post_id), default_timeout=120)
+    results["card fragment"] = time_saves(card, post_id, args.runs)
+
+    print(f"Save rerun cost with {args.posts} posts ({args.runs} runs each)")
+    for name, timings in results.items():
+        print(f"  {name:32s} median {statistics.median(timings) * 1000:8.1f} ms"
+              f"   max {max(timings) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
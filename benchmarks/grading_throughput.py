@@ -0,0 +1,80 @@
+"""Throughput and latency of the challenge grading queue.
+
+Submits a burst of challenge submissions to ``utils.grading_queue.GradingQueue``
+through the gateway and the fake model backend, for each batch size, and
+reports graded submissions per minute, model calls and queue/total latency
+percentiles. No network access or API key is needed.
+
+    python benchmarks/grading_throughput.py --submissions 300 --batch-sizes 1 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(args, batch_size):
+    from utils.gemini_gateway import GeminiGateway
+    from utils.grading import CHALLENGES, GRADING_CONFIG, GRADING_MODEL
+    from utils.grading_queue import GradingQueue
+    from utils.llm_backends import FakeBackend
+    from utils.llm_cache import LLMCache
+
+    backend = FakeBackend(median_latency=args.median_latency, latency_sigma=args.latency_sigma,
+                          rate_limit_rate=args.rate_limit_rate, seed=batch_size)
+    gateway = GeminiGateway(backend, cache=LLMCache(os.path.join(tempfile.mkdtemp(), "cache.sqlite3")))
+    grading = GradingQueue(
+        lambda prompt: gateway.generate(GRADING_MODEL, prompt, GRADING_CONFIG, use_cache=False),
+        workers=args.workers, batch_size=batch_size, batch_wait=args.batch_wait,
+    ).start()
+
+    challenges = list(CHALLENGES)
+    started = time.perf_counter()
+    job_ids = []
+    for n in range(args.submissions):
+        job_ids.append(grading.submit(challenges[n % len(challenges)], {
+            "Answer:": f"Submission {n}: " + "my analysis of the AI output " * (n % 7 + 1),
+        }))
+        time.sleep(args.interval)
+    while any(grading.status(job_id)["status"] in ("queued", "grading") for job_id in job_ids):
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    stats = grading.stats()
+    stats["graded_per_minute"] = (stats["graded"] + stats["failed"]) / elapsed * 60
+    stats["elapsed"] = elapsed
+    stats["backend_calls"] = backend.calls
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=300)
+    parser.add_argument("--interval", type=float, default=0.01,
+                        help="seconds between submissions")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-wait", type=float, default=0.2)
+    parser.add_argument("--median-latency", type=float, default=1.0,
+                        help="median fake model latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.3)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("STUDY_BUDDY_DATA_DIR", tempfile.mkdtemp(prefix="study-buddy-grading-"))
+    sys.path.insert(0, ROOT)
+
+    print(f"{'batch':>5} {'graded/min':>11} {'calls':>6} {'failed':>7} "
+          f"{'queue p50':>10} {'queue p95':>10} {'total p50':>10} {'total p95':>10}")
+    for batch_size in args.batch_sizes:
+        stats = run(args, batch_size)
+        print(f"{batch_size:>5} {stats['graded_per_minute']:>11.0f} {stats['backend_calls']:>6} "
+              f"{stats['failed']:>7} "
+              + " ".join(f"{stats[key]:>9.2f}s" for key in
+                         ("queue_p50_seconds", "queue_p95_seconds", "latency_p50_seconds", "latency_p95_seconds")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Offline load test for the AI Usage Reflection page.
+
+Simulates many concurrent student sessions going through the journal, the
+habit assessment and the feedback report with ``streamlit.testing.v1.AppTest``
+against the fake model backend, then prints throughput and per-step latency
+percentiles. No network access or API key is needed.
+
+AppTest swaps process-global Streamlit state on every run, so concurrent
+sessions run in separate worker processes (like a multi-process deployment)
+that share the on-disk cache.
+
+    python benchmarks/load_test_reflection.py --sessions 200 --concurrency 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE = os.path.join(ROOT, "pages", "1_AI_Usage_Reflection.py")
+STEPS = ["journal", "assessment", "report"]
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def run_session(session_no, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(PAGE, default_timeout=timeout)
+    at.run()
+    timings = {}
+
+    started = time.perf_counter()
+    at.button(key="experience").click().run()
+    for idx, text_area in enumerate(at.text_area):
+        text_area.input(f"Session {session_no} answer {idx}")
+    button(at, "Save Entry").click().run()
+    timings["journal"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    at.button(key="assessment").click().run()
+    button(at, "Generate Assessment Questions").click().run()
+    for radio in at.radio:
+        radio.set_value(radio.options[session_no % len(radio.options)])
+    button(at, "Submit Assessment").click().run()
+    timings["assessment"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    at.button(key="report").click().run()
+    button(at, "Generate Comprehensive Feedback").click().run()
+    timings["report"] = time.perf_counter() - started
+
+    errors = [e.value for e in at.exception] + [e.value for e in at.error]
+    return timings, errors
+
+
+def run_worker(session_numbers, args):
+    """Run a batch of sessions in this process against a fresh fake gateway."""
+    os.environ["STUDY_BUDDY_LLM_BACKEND"] = "fake"
+    sys.path.insert(0, ROOT)
+
+    from utils.gemini_gateway import GeminiGateway, set_gateway
+    from utils.llm_backends import FakeBackend
+
+    backend = FakeBackend(
+        median_latency=args.median_latency,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+    )
+    gateway = GeminiGateway(backend)
+    set_gateway(gateway)
+
+    results = [run_session(n, args.timeout) for n in session_numbers]
+    stats = gateway.stats()
+    stats["model_calls"] = backend.calls
+    return results, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 4,
+                        help="number of sessions in flight (one worker process each)")
+    parser.add_argument("--median-latency", type=float, default=0.8,
+                        help="median fake model latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    # Fresh, throwaway storage so runs don't share caches with the real app
+    os.environ.setdefault("STUDY_BUDDY_DATA_DIR", tempfile.mkdtemp(prefix="study-buddy-load-"))
+
+    batches = [list(range(i, args.sessions, args.concurrency)) for i in range(args.concurrency)]
+    batches = [batch for batch in batches if batch]
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(batches)) as pool:
+        outputs = list(pool.map(run_worker, batches, [args] * len(batches)))
+    elapsed = time.perf_counter() - started
+
+    results = [result for batch_results, _ in outputs for result in batch_results]
+    worker_stats = [stats for _, stats in outputs]
+    failed = [errors for _, errors in results if errors]
+    print(f"{len(results)} sessions in {elapsed:.1f}s "
+          f"({len(results) / elapsed * 60:.1f} sessions/min), {len(failed)} with errors")
+    print(f"{'step':<12}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for step in STEPS:
+        values = [timings[step] for timings, _ in results]
+        print(f"{step:<12}" + "".join(
+            f"{percentile(values, pct):>8.2f}s" for pct in (50, 90, 99, 100)
+        ))
+    print(f"model calls: {sum(s['model_calls'] for s in worker_stats)}, "
+          f"gateway retries: {sum(s['retries'] for s in worker_stats)}, "
+          f"coalesced: {sum(s['coalesced'] for s in worker_stats)}, "
+          f"max queue depth: {max(s['max_waiting'] for s in worker_stats)}, "
+          f"max wait: {max(s['max_wait_seconds'] for s in worker_stats):.2f}s")
+    for errors in failed[:5]:
+        print("error:", errors)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Speed of the Writing Challenge diff engine on essay-length texts.
+
+Generates a synthetic essay of ``--words`` words and rewrites of it with a
+given share of sentences edited, then times ``utils.text_diff.analyze_rewrite``
+(first call and cached call) against ``difflib.SequenceMatcher`` over
+characters and over words.
+
+    python benchmarks/text_diff.py --words 10000 --edit-rates 0.02 0.1 0.5
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_essay(words, rng):
+    # Zipf-like vocabulary, so common words repeat the way they do in prose
+    vocabulary = [f"w{n}" for n in range(3000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    sentences, count = [], 0
+    while count < words:
+        length = rng.randint(8, 25)
+        sentence = rng.choices(vocabulary, weights, k=length)
+        sentences.append(" ".join(sentence).capitalize() + ".")
+        count += length
+    return sentences
+
+
+def rewrite(sentences, rate, rng):
+    result = []
+    for sentence in sentences:
+        roll = rng.random()
+        if roll >= rate:
+            result.append(sentence)
+            continue
+        words = sentence.rstrip(".").split()
+        action = rng.choice(("edit", "delete", "insert"))
+        if action == "edit":
+            for _ in range(rng.randint(1, 4)):
+                words[rng.randrange(len(words))] = f"new{rng.randrange(10 ** 6)}"
+            result.append(" ".join(words) + ".")
+        elif action == "insert":
+            result.append(sentence)
+            result.append(" ".join(f"added{rng.randrange(10 ** 6)}" for _ in range(10)) + ".")
+    return result
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=10000)
+    parser.add_argument("--edit-rates", type=float, nargs="+", default=[0.02, 0.1, 0.5])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sys.path.insert(0, ROOT)
+    from utils import text_diff
+
+    rng = random.Random(args.seed)
+    sentences = synthetic_essay(args.words, rng)
+    original = " ".join(sentences)
+
+    print(f"{'edited':>7} {'analyze':>9} {'cached':>9} {'difflib words':>14} {'difflib chars':>14}")
+    for rate in args.edit_rates:
+        revised = " ".join(rewrite(sentences, rate, rng))
+        a, b = text_diff.tokenize(original)[0], text_diff.tokenize(revised)[0]
+
+        def analyze():
+            text_diff._cache.clear()
+            text_diff.analyze_rewrite(original, revised)
+
+        cold = timed(analyze)
+        text_diff.analyze_rewrite(original, revised)
+        cached = timed(lambda: text_diff.analyze_rewrite(original, revised), repeat=100)
+        words = timed(lambda: difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes())
+        chars = timed(lambda: difflib.SequenceMatcher(None, original, revised).get_opcodes(), repeat=1)
+        print(f"{rate:>7.0%} {cold * 1000:>7.1f}ms {cached * 1e6:>7.1f}us "
+              f"{words * 1000:>12.1f}ms {chars * 1000:>12.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
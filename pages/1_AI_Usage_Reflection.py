@@ -1,6 +1,14 @@
 import streamlit as st
-import google.generativeai as genai
-from datetime import datetime
+import uuid
+from utils.assessment import QUESTION_CONFIG, QUESTION_MODEL, QUESTIONS_PER_SET, generate_question_set
+from utils.gemini_gateway import get_gateway
+from utils.identity import get_user_id
+from utils.journal_store import JournalStore
+from utils.journal_summary import SUMMARY_MODEL, build_journal_context, empty_digest, update_digest
+from utils.feedback_report import REPORT_SECTIONS, split_sections
+from utils.question_pool import QuestionPool
+from utils.scoring import (MAX_SCORE_PER_QUESTION, UNANSWERED, CohortScores, answer_indices,
+                           question_categories, score_answers)
 
 # Page Configuration
 st.set_page_config(
@@ -44,14 +52,16 @@ st.markdown("""
 # Initialize session state
 def init_session_state():
     session_defaults = {
+        "session_id": uuid.uuid4().hex,
         "selected_module": None,
         "reflection1": "",
         "reflection2": "",
         "reflection3": "",
         "habit_questions": [],
         "user_answers": {},
-        "journal_entries": [],
-        "last_saved": None
+        "journal_cursors": [None],
+        "last_saved": None,
+        "feedback_report": None
     }
     
     for key, value in session_defaults.items():
@@ -60,41 +70,80 @@ def init_session_state():
 
 init_session_state()
 
-# Page Header
-st.title("AI Usage Reflection")
-st.markdown("""
-Reflect on your AI usage experience and habits to improve your learning practices.
-Track your progress and receive personalized feedback.
-""")
-st.markdown("---")
+JOURNAL_PAGE_SIZE = 10
 
-# Module selection
-st.markdown("### Select a Reflection Module")
-cols = st.columns(3)
-module_data = [
-    {"name": "Usage Experience Journal", "key": "experience", "desc": "Record your AI-assisted learning experiences"},
-    {"name": "Usage Habit Assessment", "key": "assessment", "desc": "Evaluate your AI usage patterns"},
-    {"name": "Your Personal Report", "key": "report", "desc": "Get personalized feedback"}
-]
+@st.cache_resource
+def get_journal_store():
+    return JournalStore()
 
-for i, module in enumerate(module_data):
-    with cols[i]:
-        if st.button(
-            module["name"],
-            key=module["key"],
-            help=module["desc"],
-            use_container_width=True
-        ):
-            st.session_state.selected_module = module["key"]
-            st.rerun()
+@st.cache_resource
+def get_cohort_scores():
+    return CohortScores()
 
-st.markdown("---")
+journal_store = get_journal_store()
+user_id = get_user_id()
 
-# --- Usage Experience Journal ---
-if st.session_state.selected_module == "experience":
-    st.header("Usage Experience Journal")
-    st.markdown("Reflect on your recent experiences using AI for learning tasks.")
-    
+def refill_question_set():
+    # Runs on the pool's worker thread; skips the response cache so each
+    # refill produces a fresh set instead of the same cached one
+    return generate_question_set(
+        lambda prompt: get_gateway().generate(QUESTION_MODEL, prompt, QUESTION_CONFIG, use_cache=False)
+    )
+
+@st.cache_resource
+def get_question_pool():
+    return QuestionPool(refill_question_set).start()
+
+def get_journal_context():
+    # Fold entries that left the recent window into the rolling digest; this
+    # is a no-op (no model call) unless new entries have aged out
+    journal = journal_store.view(user_id)
+    digest = journal_store.load_digest(user_id) or empty_digest()
+    updated = update_digest(
+        digest,
+        journal,
+        lambda prompt: get_gateway().generate(SUMMARY_MODEL, prompt)
+    )
+    if updated is not digest:
+        journal_store.save_digest(user_id, updated)
+    return build_journal_context(journal, updated)
+
+def render_report(text):
+    for section in split_sections(text):
+        if section.strip():
+            st.markdown(section)
+
+def stream_report(model_name, prompt):
+    """Render each report section as soon as its text arrives."""
+    placeholders = [st.empty() for _ in range(len(REPORT_SECTIONS) + 1)]
+    rendered = [""] * len(placeholders)
+    placeholders[0].info("Analyzing your usage patterns...")
+    text = ""
+    try:
+        for chunk in get_gateway().stream(model_name, prompt):
+            text += chunk
+            for idx, section in enumerate(split_sections(text)):
+                if section != rendered[idx]:
+                    placeholders[idx].markdown(section)
+                    rendered[idx] = section
+    except Exception as e:
+        # Keep whatever arrived so the student doesn't lose the partial report
+        st.session_state.feedback_report = {"text": text, "complete": False}
+        if not text:
+            placeholders[0].empty()
+        st.warning(f"The report was interrupted ({str(e)}). Generate it again to get the full report.")
+        return
+    if text:
+        st.session_state.feedback_report = {"text": text, "complete": True}
+    else:
+        placeholders[0].empty()
+        st.error("Could not generate feedback. Please try again.")
+
+# --- Page sections ---
+# Interactive sections run as fragments: saving an entry, paging through the
+# journal or generating feedback reruns only that section, not the whole page.
+@st.fragment
+def journal_section():
     with st.container():
         st.subheader("New Journal Entry")
         with st.form("journal_form"):
@@ -117,23 +166,32 @@ if st.session_state.selected_module == "experience":
             submitted = st.form_submit_button("Save Entry")
             if submitted:
                 if st.session_state.reflection1 and st.session_state.reflection2 and st.session_state.reflection3:
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-                    entry = {
-                        "task": st.session_state.reflection1,
-                        "tool": st.session_state.reflection2,
-                        "usage": st.session_state.reflection3,
-                        "date": timestamp
-                    }
-                    st.session_state.journal_entries.append(entry)
-                    st.session_state.last_saved = timestamp
+                    entry = journal_store.append(
+                        user_id,
+                        st.session_state.reflection1,
+                        st.session_state.reflection2,
+                        st.session_state.reflection3
+                    )
+                    st.session_state.last_saved = entry["date"]
+                    st.session_state.journal_cursors = [None]
                     st.success("Journal entry saved successfully!")
                 else:
                     st.warning("Please complete all fields before saving.")
     
-    if st.session_state.journal_entries:
+    journal_entry_list()
+
+@st.fragment
+def journal_entry_list():
+    # Only the visible page of entries is loaded; older pages are fetched by cursor
+    total_entries = journal_store.count(user_id)
+    if total_entries:
         st.subheader("Your Journal Entries")
-        for idx, entry in enumerate(reversed(st.session_state.journal_entries)):
-            with st.expander(f"Entry {len(st.session_state.journal_entries)-idx} - {entry['date']}"):
+        page_no = len(st.session_state.journal_cursors) - 1
+        entries, next_cursor = journal_store.page(
+            user_id, limit=JOURNAL_PAGE_SIZE, before=st.session_state.journal_cursors[-1]
+        )
+        for idx, entry in enumerate(entries):
+            with st.expander(f"Entry {total_entries - page_no*JOURNAL_PAGE_SIZE - idx} - {entry['date']}"):
                 st.markdown(f"""
                 <div class="reflection-card">
                     <p><strong>Task:</strong> {entry['task']}</p>
@@ -141,6 +199,101 @@ if st.session_state.selected_module == "experience":
                     <p><strong>Usage:</strong> {entry['usage']}</p>
                 </div>
                 """, unsafe_allow_html=True)
+        
+        # Callbacks update the cursor before the fragment reruns
+        col1, col2 = st.columns(2)
+        with col1:
+            if page_no > 0:
+                st.button("Newer entries", use_container_width=True,
+                          on_click=st.session_state.journal_cursors.pop)
+        with col2:
+            if next_cursor is not None:
+                st.button("Older entries", use_container_width=True,
+                          on_click=st.session_state.journal_cursors.append, args=(next_cursor,))
+
+@st.fragment
+def report_feedback():
+    generate_clicked = st.button("Generate Comprehensive Feedback", type="primary")
+    if generate_clicked:
+        if journal_store.count(user_id) or st.session_state.habit_questions:
+            try:
+                model_name = "gemini-2.5-flash"
+                
+                journal_context = get_journal_context()
+                
+                assessment_context = "\n".join(
+                    f"Q: {q['text']}\nA: {st.session_state.user_answers.get(f'q{i}', 'Not answered')}"
+                    for i, q in enumerate(st.session_state.habit_questions)
+                ) if st.session_state.habit_questions else "No assessment answers available"
+                
+                prompt = f"""
+                Based on the following user data, provide a comprehensive AI usage analysis:
+                
+                JOURNAL ENTRIES:
+                {journal_context}
+                
+                ASSESSMENT ANSWERS:
+                {assessment_context}
+                
+                Please structure your response with these sections:
+                1. Usage Patterns Analysis
+                2. Strengths in AI Utilization
+                3. Areas for Improvement
+                4. Recommended Strategies
+                5. Suggested Tools and Resources
+                
+                Keep the tone professional yet accessible, and provide specific, actionable recommendations.
+                """
+                
+                st.subheader("Personalized Feedback Report")
+                stream_report(model_name, prompt)
+            except Exception as e:
+                st.error(f"An error occurred: {str(e)}")
+        else:
+            st.warning("Please complete at least one module (Journal or Assessment) before generating feedback.")
+    elif st.session_state.feedback_report:
+        # Show the last report on reruns instead of regenerating it
+        st.subheader("Personalized Feedback Report")
+        render_report(st.session_state.feedback_report["text"])
+        if not st.session_state.feedback_report["complete"]:
+            st.warning("This report is incomplete. Generate it again to get the full report.")
+
+# Page Header
+st.title("AI Usage Reflection")
+st.markdown("""
+Reflect on your AI usage experience and habits to improve your learning practices.
+Track your progress and receive personalized feedback.
+""")
+st.markdown("---")
+
+# Module selection
+st.markdown("### Select a Reflection Module")
+cols = st.columns(3)
+module_data = [
+    {"name": "Usage Experience Journal", "key": "experience", "desc": "Record your AI-assisted learning experiences"},
+    {"name": "Usage Habit Assessment", "key": "assessment", "desc": "Evaluate your AI usage patterns"},
+    {"name": "Your Personal Report", "key": "report", "desc": "Get personalized feedback"}
+]
+
+for i, module in enumerate(module_data):
+    with cols[i]:
+        if st.button(
+            module["name"],
+            key=module["key"],
+            help=module["desc"],
+            use_container_width=True
+        ):
+            st.session_state.selected_module = module["key"]
+            st.rerun()
+
+st.markdown("---")
+
+# --- Usage Experience Journal ---
+if st.session_state.selected_module == "experience":
+    st.header("Usage Experience Journal")
+    st.markdown("Reflect on your recent experiences using AI for learning tasks.")
+    
+    journal_section()
 
 # --- Usage Habit Assessment ---
 elif st.session_state.selected_module == "assessment":
@@ -149,59 +302,28 @@ elif st.session_state.selected_module == "assessment":
     
     if not st.session_state.habit_questions:
         st.info("Generate questions to begin your assessment.")
+        question_pool = get_question_pool()
         if st.button("Generate Assessment Questions"):
-            try:
-                genai.configure(api_key=st.secrets["google"]["api_key"])
-                model = genai.GenerativeModel("gemini-2.0-flash") # Make sure model name is correct
+            # Serve a pre-generated set when one is ready; otherwise fall back to a live call
+            pooled_questions = question_pool.take(st.session_state.session_id)
+            if pooled_questions:
+                st.session_state.habit_questions = pooled_questions
+                st.rerun()
 
-                prompt = """Generate exactly 5 multiple-choice questions about AI usage habits for students. 
-                Each question should have 4 options (A-D).
-                
-                STRICT FORMAT:
-                Question: [Question Text]
-                A. [Option A]
-                B. [Option B]
-                C. [Option C]
-                D. [Option D]
-                """
-                
+            try:
                 with st.spinner("Generating personalized questions..."):
-                    response = model.generate_content(prompt)
+                    gateway = get_gateway()
+                    questions = generate_question_set(
+                        lambda prompt: gateway.generate(QUESTION_MODEL, prompt, QUESTION_CONFIG),
+                        discard_fn=lambda prompt: gateway.invalidate(QUESTION_MODEL, prompt, QUESTION_CONFIG)
+                    )
                     
-                    if response.text:
-                        questions = []
-                        current_question = {}
-                        
-                        for line in response.text.split('\n'):
-                            line = line.strip()
-                            
-                            # FIX 1: Looser check for "Question:" (handles "1. Question:" or "**Question:**")
-                            if "Question:" in line:
-                                if current_question and 'options' in current_question:
-                                    questions.append(current_question)
-                                
-                                # Clean the text to remove "1. ", "**", etc.
-                                clean_text = line.split("Question:", 1)[1].strip()
-                                current_question = {
-                                    'text': clean_text,
-                                    'options': []
-                                }
-                            
-                            # FIX 2: Check if 'options' exists before appending
-                            elif line and len(line) > 0 and line[0] in ['A', 'B', 'C', 'D']:
-                                if 'options' in current_question:
-                                    current_question['options'].append(line)
-                        
-                        # Append the last question found
-                        if current_question and 'options' in current_question:
-                            questions.append(current_question)
-                        
-                        # Ensure we have questions before saving
-                        if questions:
-                            st.session_state.habit_questions = questions[:5]
-                            st.rerun()
-                        else:
-                            st.error("The AI generated a response, but we couldn't parse the questions. Please try again.")
+                    # Ensure we have a full set before saving
+                    if len(questions) == QUESTIONS_PER_SET:
+                        st.session_state.habit_questions = questions
+                        st.rerun()
+                    else:
+                        st.error("The AI couldn't produce a complete set of questions. Please try again.")
 
             except Exception as e:
                 st.error(f"Failed to generate questions: {str(e)}")
@@ -228,6 +350,13 @@ elif st.session_state.selected_module == "assessment":
                 submitted = st.form_submit_button("Submit Assessment")
                 if submitted:
                     if all(st.session_state.user_answers.values()):
+                        # Add this submission to the cohort distribution
+                        questions = st.session_state.habit_questions
+                        _, total_score, max_possible_score = score_answers(
+                            question_categories(questions),
+                            answer_indices(questions, st.session_state.user_answers)
+                        )
+                        get_cohort_scores().record(user_id, total_score / max_possible_score * 100)
                         st.success("Assessment submitted successfully!")
                     else:
                         st.warning("Please answer all questions before submitting.")
@@ -245,15 +374,15 @@ elif st.session_state.selected_module == "report":
     # Journal Summary Section
     with st.container():
         st.subheader("Your Journal Entries Summary")
-        if st.session_state.journal_entries:
-            latest_entry = st.session_state.journal_entries[-1]
+        latest_entry = journal_store.latest(user_id)
+        if latest_entry:
             st.markdown(f"""
             <div class="report-section">
                 <p><strong>Most Recent Entry:</strong> {latest_entry['date']}</p>
                 <p><strong>Task:</strong> {latest_entry['task']}</p>
                 <p><strong>Tool:</strong> {latest_entry['tool']}</p>
                 <p><strong>Usage:</strong> {latest_entry['usage']}</p>
-                <p><strong>Total Entries:</strong> {len(st.session_state.journal_entries)}</p>
+                <p><strong>Total Entries:</strong> {journal_store.count(user_id)}</p>
             </div>
             """, unsafe_allow_html=True)
         else:
@@ -263,40 +392,18 @@ elif st.session_state.selected_module == "report":
     if st.session_state.habit_questions:
         st.subheader("Your Assessment Results")
     
-        # Initialize scoring
-        total_score = 0
-        max_possible_score = 0
-        answered_questions = 0
+        # Scoring rules were fixed at generation time; score all answers in one lookup
+        questions = st.session_state.habit_questions
+        answers = answer_indices(questions, st.session_state.user_answers)
+        scores, total_score, max_possible_score = score_answers(question_categories(questions), answers)
+        answered_questions = int((answers != UNANSWERED).sum())
     
         # Display questions and answers
-        for idx, question in enumerate(st.session_state.habit_questions):
-            answer_key = f"q{idx}"
-            if answer_key in st.session_state.user_answers and st.session_state.user_answers[answer_key]:
-                answer_text = st.session_state.user_answers[answer_key]
-                option_letter = answer_text[0] if answer_text else ""
-            
-                # Context-aware scoring
-                if "how often" in question['text'].lower() or "frequency" in question['text'].lower():
-                    # Frequency questions: A=0, B=1, C=2, D=3
-                    score = ord(option_letter.upper()) - ord('A') if option_letter in ['A','B','C','D'] else 0
-                elif "feel" in question['text'].lower() or "ethical" in question['text'].lower():
-                    # Ethical questions: Reverse score (A=3, B=2, C=1, D=0)
-                    score = 3 - (ord(option_letter.upper()) - ord('A')) if option_letter in ['A','B','C','D'] else 0
-                elif "task" in question['text'].lower() or "use" in question['text'].lower():
-                    # Usage type questions: All options score 1 (neutral)
-                    score = 1
-                else:
-                    # Default scoring: Middle options score more (A=1, B=2, C=2, D=1)
-                    score_map = {'A':1, 'B':2, 'C':2, 'D':1}
-                    score = score_map.get(option_letter.upper(), 0)
-            
-                total_score += score
-                max_possible_score += 3  # max score per question
-                answered_questions += 1
-            
+        for idx, question in enumerate(questions):
+            if answers[idx] != UNANSWERED:
                 st.markdown(f"""
                 <p><strong>{idx+1}. {question['text']}</strong><br>
-                <em>Your answer:</em> {answer_text} (Score: {score}/3)</p>
+                <em>Your answer:</em> {st.session_state.user_answers[f"q{idx}"]} (Score: {scores[idx]}/{MAX_SCORE_PER_QUESTION})</p>
                 """, unsafe_allow_html=True)
     
         if answered_questions > 0:
@@ -306,6 +413,9 @@ elif st.session_state.selected_module == "report":
             st.metric("Your AI Usage Score", 
                     f"{total_score}/{max_possible_score}",
                     f"{percentage:.1f}%")
+            percentile = get_cohort_scores().percentile_rank(percentage, user_id)
+            if percentile is not None:
+                st.caption(f"You scored higher than {percentile:.0f}% of the other students who took the assessment.")
         
             # Contextual interpretation
             if percentage >= 80:
@@ -322,52 +432,7 @@ elif st.session_state.selected_module == "report":
             st.warning("No answers submitted for assessment")
     
     # Generate Feedback Section
-    if st.button("Generate Comprehensive Feedback", type="primary"):
-        if st.session_state.journal_entries or st.session_state.habit_questions:
-            try:
-                genai.configure(api_key=st.secrets["google"]["api_key"])
-                model = genai.GenerativeModel("gemini-2.5-flash")
-                
-                journal_context = "\n".join(
-                    f"Entry {idx+1} ({entry['date']}): Task: {entry['task']}, Tool: {entry['tool']}, Usage: {entry['usage']}"
-                    for idx, entry in enumerate(st.session_state.journal_entries)
-                ) if st.session_state.journal_entries else "No journal entries available"
-                
-                assessment_context = "\n".join(
-                    f"Q: {q['text']}\nA: {st.session_state.user_answers.get(f'q{i}', 'Not answered')}"
-                    for i, q in enumerate(st.session_state.habit_questions)
-                ) if st.session_state.habit_questions else "No assessment answers available"
-                
-                prompt = f"""
-                Based on the following user data, provide a comprehensive AI usage analysis:
-                
-                JOURNAL ENTRIES:
-                {journal_context}
-                
-                ASSESSMENT ANSWERS:
-                {assessment_context}
-                
-                Please structure your response with these sections:
-                1. Usage Patterns Analysis
-                2. Strengths in AI Utilization
-                3. Areas for Improvement
-                4. Recommended Strategies
-                5. Suggested Tools and Resources
-                
-                Keep the tone professional yet accessible, and provide specific, actionable recommendations.
-                """
-                
-                with st.spinner("Analyzing your usage patterns..."):
-                    response = model.generate_content(prompt)
-                    if response.text:
-                        st.subheader("Personalized Feedback Report")
-                        st.markdown(response.text)
-                    else:
-                        st.error("Could not generate feedback. Please try again.")
-            except Exception as e:
-                st.error(f"An error occurred: {str(e)}")
-        else:
-            st.warning("Please complete at least one module (Journal or Assessment) before generating feedback.")
+    report_feedback()
 
 else:
     st.info("Please select a module from the options above to begin your reflection.")
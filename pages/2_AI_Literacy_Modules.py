@@ -1,5 +1,9 @@
 import streamlit as st
 
+from utils.content_catalog import ContentCatalog
+from utils.identity import get_user_id
+from utils.module_progress import ModuleProgress
+
 # Page Configuration
 st.set_page_config(
     page_title="AI Literacy Modules",
@@ -37,179 +41,126 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_content_catalog():
+    # One compiled catalog per server process; it reloads itself when the content files change
+    return ContentCatalog()
+
+@st.cache_resource
+def get_module_progress():
+    return ModuleProgress()
+
+
+catalog = get_content_catalog()
+modules = catalog.modules
+progress_store = get_module_progress()
+user_id = get_user_id()
+
 # Initialize session state
 if "selected_module" not in st.session_state:
     st.session_state.selected_module = None
 if "completed_tasks" not in st.session_state:
-    st.session_state.completed_tasks = {
-        "module1": [False, False, False],
-        "module2": [False, False, False],
-        "module3": [False, False, False],
-        "module4": [False, False, False]
-    }
+    st.session_state.completed_tasks = {}
+for module in modules:
+    # Saved progress is read once per session; the session copy is kept in step with every change
+    if module["key"] not in st.session_state.completed_tasks:
+        st.session_state.completed_tasks[module["key"]] = progress_store.progress(
+            user_id, module["key"], len(module["checklist"])
+        )
+    tasks = st.session_state.completed_tasks[module["key"]]
+    # Content edits can add checklist items to a module already in progress
+    tasks.extend([False] * (len(module["checklist"]) - len(tasks)))
 
 # Main Content Area
 st.title("AI Literacy Learning Modules")
 st.markdown("Develop essential skills for interacting with artificial intelligence technologies.")
 st.markdown("---")
 
-# Module buttons in main content
+# Module buttons in main content, four per row
 st.markdown("### Select a Learning Module")
-button_cols = st.columns(4)
-module_names = [
-    "Conceptual Understanding",
-    "AI Ethics",
-    "Critical Thinking",
-    "Using AI for Learning"
-]
-
-for i, col in enumerate(button_cols):
-    with col:
-        if st.button(
-            module_names[i],
-            key=f"module{i+1}",
-            help=f"Click to view {module_names[i]} module",
-            use_container_width=True
-        ):
-            st.session_state.selected_module = f"module{i+1}"
+for row in range(0, len(modules), 4):
+    button_cols = st.columns(4)
+    for col, module in zip(button_cols, modules[row:row + 4]):
+        with col:
+            if st.button(
+                module["button"],
+                key=module["key"],
+                help=f"Click to view {module['button']} module",
+                use_container_width=True
+            ):
+                st.session_state.selected_module = module["key"]
 
 st.markdown("---")
 
-# Module content display
-def render_module(title, content, resources, checklist, module_key):
-    st.header(title)
+def toggle_task(module_key, task_index):
+    done = st.session_state[f"{module_key}_task_{task_index}"]
+    st.session_state.completed_tasks[module_key][task_index] = done
+    # Buffered and written in the background with other students' changes
+    progress_store.set_task(user_id, module_key, task_index, done)
+
+# Ticking a task reruns only the progress panel, not the module content
+@st.fragment
+def progress_panel(module):
+    module_key = module["key"]
+    st.subheader("Your Progress")
+    completed = st.session_state.completed_tasks[module_key]
+    for i, item in enumerate(module["checklist"]):
+        st.checkbox(
+            item,
+            value=completed[i],
+            key=f"{module_key}_task_{i}",
+            on_change=toggle_task,
+            args=(module_key, i),
+            label_visibility="visible"
+        )
+
+    completion = sum(completed[:len(module["checklist"])])/len(module["checklist"])
+    st.metric("Completion", f"{int(completion*100)}%")
+
+def cohort_progress():
+    summary = progress_store.cohort_summary({module["key"]: len(module["checklist"]) for module in modules})
+    rows = []
+    for module in modules:
+        stats = summary[module["key"]]
+        row = {
+            "Module": module["button"],
+            "Students": stats["learners"],
+            "Completed": stats["completed"],
+            "Average completion": f"{stats['average_completion']:.0%}",
+        }
+        for i, rate in enumerate(stats["task_rates"]):
+            row[f"Task {i + 1}"] = f"{rate:.0%}"
+        rows.append(row)
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+    st.caption("Students who have ticked at least one task. Updated within a few seconds of each change.")
+
+# Module content display; all HTML is rendered once when the catalog loads
+def render_module(module):
+    st.header(module["title"])
     st.markdown("---")
     
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        st.markdown(content)
+        st.markdown(module["body_html"], unsafe_allow_html=True)
         
         with st.expander("Learning Resources", expanded=True):
-            for resource in resources:
-                st.markdown(f"""
-                <div class="resource-card">
-                    <h4>{resource['title']}</h4>
-                    <p>{resource['description']}</p>
-                    {f"<a href='{resource['link']}' target='_blank'>Resource will be here!</a>" if 'link' in resource else ""}
-                </div>
-                """, unsafe_allow_html=True)
+            for resource_html in module["resources_html"]:
+                st.markdown(resource_html, unsafe_allow_html=True)
     
     with col2:
-        st.subheader("Your Progress")
-        for i, item in enumerate(checklist):
-            key = f"{module_key}_task_{i}"
-            st.session_state.completed_tasks[module_key][i] = st.checkbox(
-                item, 
-                value=st.session_state.completed_tasks[module_key][i],
-                key=key,
-                label_visibility="visible"
-            )
-        
-        completion = sum(st.session_state.completed_tasks[module_key])/len(checklist)
-        st.metric("Completion", f"{int(completion*100)}%")
-
-if st.session_state.selected_module == "module1":
-    render_module(
-        "Module 1: Conceptual Understanding",
-        """
-        Build foundational knowledge about artificial intelligence:
-        - **What is AI?** Explore definitions, recognition, and applications
-        - **Machine Learning** How systems learn from data
-        - **NLP Fundamentals** How computers process human language
-        - **Algorithmic Decision Making** Understanding AI choices
-        """,
-        [
-            {"title": "Introductory Video", "description": "5 min overview of key concepts", "link": "#"},
-            {"title": "Interactive Concept Map", "description": "Visualize AI relationships", "link": "#"},
-            {"title": "Knowledge Check", "description": "Test your understanding", "link": "#"}
-        ],
-        [
-            "Watch introductory video",
-            "Review concept map",
-            "Complete knowledge check"
-        ],
-        "module1"
-    )
-
-elif st.session_state.selected_module == "module2":
-    render_module(
-        "Module 2: AI Ethics",
-        """
-        Examine the ethical dimensions of AI systems:
-        - **Privacy Concerns** Data collection and surveillance
-        - **Misinformation** AI exacerbates misinformation and fake news
-        - **Bias in Algorithms** How prejudice enters systems
-        - **Educational Ethics** Using AI responsibly in education
-        """,
-        [
-            {"title": "Ethical Framework Video", "description": "Approaches to AI ethics", "link": "#"},
-            {"title": "Case Studies", "description": "Real-world ethical dilemmas", "link": "#"},
-            {"title": "Discussion Forum", "description": "Share your perspectives", "link": "#"}
-        ],
-        [
-            "Watch ethics video",
-            "Analyze 3 case studies",
-            "Participate in forum"
-        ],
-        "module2"
-    )
-
-elif st.session_state.selected_module == "module3":
-    render_module(
-        "Module 3: Critical Thinking",
-        """
-        Develop skills to evaluate AI outputs critically:
-        - **Verifying Accuracy** Fact-checking AI responses
-        - **Identifying Bias** Recognizing skewed perspectives
-        - **Prompt Engineering** Crafting effective queries
-        """,
-        [
-            {"title": "Critical Analysis Video", "description": "Techniques for evaluation", "link": "#"},
-            {"title": "Bias Detection Exercise", "description": "Practice identifying issues", "link": "#"},
-            {"title": "Prompt Workshop", "description": "Improve your queries", "link": "#"}
-        ],
-        [
-            "Watch analysis video",
-            "Complete bias exercise",
-            "Participate in prompt workshop"
-        ],
-        "module3"
-    )
-
-elif st.session_state.selected_module == "module4":
-    render_module(
-        "Module 4: Using AI for Learning",
-        """
-        Strategically integrate AI into your learning process:
-        - **Goal Setting** Defining clear learning objectives
-        - **Independent Practice** Building skills before using AI
-        - **Reflective Practice** Evaluating AI's impact on learning
-        
-        **Featured Tools:**
-        - **ChatGPT** for brainstorming
-        - **Google Gemini** for problem-solving
-        - **Claude** for coding
-        """,
-        [
-            {"title": "Tool Tutorials", "description": "Guides for popular AI tools", "link": "#"},
-            {"title": "Learning Plan Template", "description": "Structure your AI use", "link": "#"},
-            {"title": "Have a try on the AI Challenges & Activities section!", "description": "Hands-on activities", "link": "#"}
-        ],
-        [
-            "Complete tool tutorials",
-            "Create learning plan",
-            "AI Challenges & Activities"
-        ],
-        "module4"
-    )
+        progress_panel(module)
+
+if catalog.error:
+    st.warning(f"The latest module content update could not be loaded, showing the previous version: {catalog.error}")
 
+selected = catalog.get(st.session_state.selected_module) if st.session_state.selected_module else None
+if selected:
+    render_module(selected)
 else:
     st.info("Select a module from the options above to begin learning.")
     st.markdown("### Module Overview")
-    st.markdown("""
-    - **Conceptual Understanding**: Build foundational knowledge
-    - **AI Ethics**: Examine responsible use
-    - **Critical Thinking**: Evaluate AI outputs
-    - **Using AI for Learning**: Strategic integration
-    """)
+    st.markdown(catalog.overview_html, unsafe_allow_html=True)
+
+    with st.expander("Cohort progress (instructor view)"):
+        cohort_progress()
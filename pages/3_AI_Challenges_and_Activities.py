@@ -1,5 +1,131 @@
 import streamlit as st
 
+from utils.code_runner import CodeRunner
+from utils.gemini_gateway import get_gateway
+from utils.grading import GRADING_CONFIG, GRADING_MODEL, MAX_SCORE
+from utils.grading_queue import GradingQueue
+from utils.text_diff import WRITING_PARAGRAPH, analyze_rewrite
+
+GRADING_POLL_INTERVAL = "2s"
+
+@st.cache_resource
+def get_grading_queue():
+    # Never cached: identical answers still get a fresh, independent grade
+    return GradingQueue(
+        lambda prompt: get_gateway().generate(GRADING_MODEL, prompt, GRADING_CONFIG, use_cache=False)
+    ).start()
+
+@st.cache_resource
+def get_code_runner():
+    # Warm sandbox processes shared by every session
+    return CodeRunner().start()
+
+def run_hidden_tests(code):
+    st.session_state.code_results = get_code_runner().run(code)
+    return st.session_state.code_results
+
+def show_test_results(result):
+    if result["error"]:
+        st.error(result["error"])
+        return
+    message = f"Hidden tests: {result['passed']}/{result['total']} passed"
+    (st.success if result["passed"] == result["total"] else st.warning)(message)
+    st.dataframe(
+        [
+            {
+                "Test": test["name"],
+                "Result": "✅ Pass" if test["passed"] else "❌ Fail",
+                "Time (ms)": round(test["seconds"] * 1000, 3) if test["seconds"] is not None else None,
+                "Details": test["message"],
+            }
+            for test in result["tests"]
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+def test_summary(result):
+    if result["error"]:
+        return result["error"]
+    return "\n".join(
+        f"{test['name']}: {'pass' if test['passed'] else 'FAIL'} ({test['message']})" for test in result["tests"]
+    )
+
+CLAIM_ICONS = {"fixed": "✅", "removed": "✅", "partly fixed": "🟡", "dropped": "❌", "unchanged": "❌",
+               "not in original": "➖"}
+
+def show_edit_analysis(analysis):
+    # Cached per (original, rewrite), so reruns that don't change the texts are free
+    st.markdown("""
+    <style>
+        .diff-view ins { background-color: #d4edda; text-decoration: none; }
+        .diff-view del { background-color: #f8d7da; color: #721c24; }
+    </style>
+    """, unsafe_allow_html=True)
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        if analysis["coverage"] is not None:
+            st.metric("False claims corrected", f"{analysis['coverage']:.0%}")
+        for claim in analysis["claims"]:
+            st.markdown(f"{CLAIM_ICONS[claim['status']]} {claim['label']} *({claim['status']})*")
+        if any(claim["status"] == "dropped" for claim in analysis["claims"]):
+            st.caption("Most of the original paragraph was replaced, so claims that disappeared "
+                       "with it don't count as corrected.")
+        st.caption(f"{analysis['words_changed']} words changed, {analysis['words_added']} added; "
+                   f"{analysis['sentences_kept']} of {analysis['sentences_total']} sentences kept as they were.")
+    with col2:
+        st.markdown(f'<div class="diff-view">{analysis["html"]}</div>', unsafe_allow_html=True)
+
+def edit_summary(analysis):
+    return "\n".join(f"{claim['claim']} -> {claim['status']}" for claim in analysis["claims"])
+
+def submit_for_grading(challenge, fields):
+    st.session_state.grading_jobs[challenge] = get_grading_queue().submit(challenge, fields)
+
+def show_feedback(job):
+    if job["status"] == "failed":
+        st.error(f"{job['error']} Please submit again.")
+        return
+    result = job["result"]
+    st.success(result["summary"] or "Your submission has been graded.")
+    st.metric("Score", f"{result['score']}/{MAX_SCORE}")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Strengths**")
+        for point in result["strengths"]:
+            st.markdown(f"- {point}")
+    with col2:
+        st.markdown("**To improve**")
+        for point in result["improvements"]:
+            st.markdown(f"- {point}")
+
+# Polls only this fragment while the submission waits for its grader; the
+# script thread never blocks on the model
+@st.fragment(run_every=GRADING_POLL_INTERVAL)
+def grading_progress(job_id):
+    job = get_grading_queue().status(job_id)
+    if job is None or job["status"] in ("done", "failed"):
+        # Rerun the page once to show the result and stop polling
+        st.rerun()
+    if job["status"] == "queued":
+        st.info(f"Your submission is queued for feedback (position {job['position']})...")
+    else:
+        st.info("Grading your submission...")
+
+def grading_feedback(challenge):
+    job_id = st.session_state.grading_jobs.get(challenge)
+    if not job_id:
+        return
+    job = get_grading_queue().status(job_id)
+    if job is None:
+        # Server restarted or the job aged out
+        del st.session_state.grading_jobs[challenge]
+        st.warning("Your earlier submission's feedback is no longer available. Please submit again.")
+    elif job["status"] in ("done", "failed"):
+        show_feedback(job)
+    else:
+        grading_progress(job_id)
+
 def main():
     st.set_page_config(page_title="AI Challenges", layout="wide")
 
@@ -13,6 +139,8 @@ def main():
     # Initialize session state for selected challenge
     if "selected_challenge" not in st.session_state:
         st.session_state.selected_challenge = None
+    if "grading_jobs" not in st.session_state:
+        st.session_state.grading_jobs = {}  # challenge -> latest grading job ID
     
     # Challenge Selection Buttons
     st.markdown("### Select a Challenge or Activity")
@@ -49,20 +177,28 @@ def main():
         4. Explain your changes
         """)
         
-        ai_writing = st.text_area("AI-Generated Paragraph:", 
-                                "Artificial intelligence is when computers can think like humans. " +
-                                "All AI systems are completely objective and never make mistakes. " +
-                                "Machine learning is the same as artificial intelligence.",
-                                height=150)
+        st.text_area("AI-Generated Paragraph:", WRITING_PARAGRAPH, height=150, disabled=True)
         
         user_rewrite = st.text_area("Your Improved Version:", height=150)
         user_explanation = st.text_area("Explain your changes:", height=100)
+
+        # Always diff against the seeded paragraph, even if the box above was edited
+        analysis = analyze_rewrite(WRITING_PARAGRAPH, user_rewrite) if user_rewrite else None
+        if analysis:
+            with st.expander("Your edits", expanded=True):
+                show_edit_analysis(analysis)
         
         if st.button("Submit Writing Challenge"):
             if user_rewrite and user_explanation:
-                st.success("Writing challenge submitted! Your critical thinking skills are developing well.")
+                submit_for_grading("writing", {
+                    "AI-Generated Paragraph:": WRITING_PARAGRAPH,
+                    "Improved Version:": user_rewrite,
+                    "Seeded false claims and whether the rewrite corrected them:": edit_summary(analysis),
+                    "Explanation of changes:": user_explanation,
+                })
             else:
                 st.warning("Please complete both the rewrite and explanation.")
+        grading_feedback("writing")
     
     # Reading Challenge
     elif st.session_state.selected_challenge == "reading":
@@ -94,9 +230,14 @@ def main():
         
         if st.button("Submit Reading Challenge"):
             if user_critique:
-                st.success("Excellent analysis! You've demonstrated strong critical reading skills.")
+                submit_for_grading("reading", {
+                    "Original Text:": original_text,
+                    "AI-Generated Summary:": ai_summary,
+                    "Analysis:": user_critique,
+                })
             else:
                 st.warning("Please provide your analysis of the AI summary.")
+        grading_feedback("reading")
     
     # Coding Challenge
     elif st.session_state.selected_challenge == "coding":
@@ -118,11 +259,28 @@ def main():
         user_code = st.text_area("Your Improved Code:", height=150)
         code_explanation = st.text_area("Explanation of Changes:", height=100)
         
-        if st.button("Submit Coding Challenge"):
+        test_col, submit_col = st.columns([1, 4])
+        with test_col:
+            run_tests = st.button("Run Hidden Tests", disabled=not user_code)
+        with submit_col:
+            submitted = st.button("Submit Coding Challenge")
+        if run_tests:
+            run_hidden_tests(user_code)
+        if submitted:
             if user_code and code_explanation:
-                st.success("Code improvements submitted! You've demonstrated authentic understanding.")
+                # The grader sees how the code did on the hidden tests
+                results = run_hidden_tests(user_code)
+                submit_for_grading("coding", {
+                    "AI-Generated Code:": ai_code,
+                    "Improved Code:": user_code,
+                    "Hidden test results:": test_summary(results),
+                    "Explanation of Changes:": code_explanation,
+                })
             else:
                 st.warning("Please complete both the code improvements and explanation.")
+        if st.session_state.get("code_results"):
+            show_test_results(st.session_state.code_results)
+        grading_feedback("coding")
     
     # Ethics Debate
     elif st.session_state.selected_challenge == "ethics":
@@ -150,9 +308,15 @@ def main():
         
         if st.button("Submit Ethics Debate"):
             if pro_args and con_args and personal_position:
-                st.success("Debate submitted! You've shown thoughtful consideration of AI ethics.")
+                submit_for_grading("ethics", {
+                    "Debate Topic:": debate_prompt,
+                    "Arguments FOR:": pro_args,
+                    "Arguments AGAINST:": con_args,
+                    "Position and Justification:": personal_position,
+                })
             else:
                 st.warning("Please complete all debate sections.")
+        grading_feedback("ethics")
     
     # Default message when no challenge selected
     else:
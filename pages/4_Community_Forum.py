@@ -1,5 +1,218 @@
 import streamlit as st
-from datetime import datetime
+
+from utils.forum_ranking import FEEDS
+from utils.forum_records import INSIGHT_CATEGORIES, QUESTION_TAGS, RESOURCE_TYPES
+from utils.forum_store import ForumStore
+from utils.identity import get_user_id
+
+@st.cache_resource
+def get_forum_store():
+    # One store (and connection pool) per server process, shared by all sessions
+    return ForumStore()
+
+FORUM_PAGE_SIZE = 10
+FORUM_POLL_INTERVAL = "15s"
+REPLIES_PAGE_SIZE = 5
+
+def load_more(post_type):
+    st.session_state.forum_pages[post_type] += 1
+
+def reset_pages(post_type):
+    st.session_state.forum_pages[post_type] = 1
+
+def feed_filters(forum_store, post_type, facet_field, facet_values):
+    # Search box and facet filter above each feed; changing either starts from page one
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        query = st.text_input("Search", key=f"search_{post_type}", on_change=reset_pages,
+                              args=(post_type,), placeholder="Search titles, posts and replies")
+    with col2:
+        counts = forum_store.facet_counts(post_type, facet_field)
+        selected = st.multiselect("Filter", facet_values, key=f"filter_{post_type}",
+                                  format_func=lambda value: f"{value} ({counts.get(value, 0)})",
+                                  on_change=reset_pages, args=(post_type,))
+    return query.strip(), {facet_field: selected}
+
+def feed_sort(post_type):
+    return st.radio("Sort by", ["recent"] + list(FEEDS[post_type]), key=f"sort_{post_type}",
+                    format_func=str.title, horizontal=True, on_change=reset_pages, args=(post_type,))
+
+def feed_posts(forum_store, post_type, query, filters, sort="recent"):
+    """Posts for the pages loaded so far, and whether there are more."""
+    pages = st.session_state.forum_pages[post_type]
+    if query or any(filters.values()):
+        limit = pages * FORUM_PAGE_SIZE
+        posts = forum_store.search(post_type, query, filters, limit=limit + 1)
+        return posts[:limit], len(posts) > limit
+
+    # Walk the cursors for every page loaded so far
+    posts, cursor = [], None
+    for _ in range(pages):
+        if sort == "recent":
+            page, cursor = forum_store.page(post_type, FORUM_PAGE_SIZE, cursor)
+        else:
+            page, cursor = forum_store.ranked_page(post_type, sort, FORUM_PAGE_SIZE, cursor)
+        posts.extend(page)
+        if cursor is None:
+            break
+    return posts, cursor is not None
+
+def load_more_button(post_type, has_more):
+    if has_more:
+        st.button("Load more", key=f"load_more_{post_type}", on_click=load_more, args=(post_type,))
+
+def author_name():
+    return f"Student {get_user_id()[:6]}"
+
+def upvote(post_id):
+    get_forum_store().vote(post_id, get_user_id())
+
+def save(post_id):
+    get_forum_store().save(post_id)
+
+def add_reply(post_id, kind, key):
+    text = st.session_state[key].strip()
+    if text:
+        forum_store = get_forum_store()
+        add = forum_store.add_comment if kind == "comments" else forum_store.add_answer
+        add(post_id, author_name(), text)
+
+def discuss(post_id):
+    st.session_state.current_post = post_id
+
+def toggle_thread(post_id):
+    threads = st.session_state.open_threads
+    if post_id in threads:
+        del threads[post_id]
+    else:
+        threads[post_id] = REPLIES_PAGE_SIZE
+
+def show_more_replies(post_id):
+    st.session_state.open_threads[post_id] += REPLIES_PAGE_SIZE
+
+def reply_thread(post, kind):
+    # A closed thread is just its toggle button: replies are read and the
+    # reply form is built only once the student opens it
+    count = len(getattr(post, kind))
+    shown = st.session_state.open_threads.get(post.id)
+    if kind == "comments":
+        label = f"Comments ({count} replies)"
+    else:
+        label = f"Answers ({count})"
+    st.button(f"Hide {kind}" if shown else label, key=f"thread_{post.id}",
+              on_click=toggle_thread, args=(post.id,))
+    if not shown:
+        return
+
+    for reply in get_forum_store().replies(post.id, kind, limit=shown):
+        st.markdown(f"{reply.author}: {reply.content}")
+        if kind == "answers":
+            st.caption(f"Posted on {reply.date}")
+    if count > shown:
+        st.button(f"Show more ({count - shown} more)", key=f"more_{kind}_{post.id}",
+                  on_click=show_more_replies, args=(post.id,))
+
+    if kind == "comments":
+        with st.form(key=f"comment_form_{post.id}", clear_on_submit=True):
+            st.text_input("Add a comment", key=f"comment_{post.id}")
+            st.form_submit_button("Post Comment", on_click=add_reply,
+                                  args=(post.id, "comments", f"comment_{post.id}"))
+    else:
+        with st.form(key=f"answer_form_{post.id}", clear_on_submit=True):
+            st.text_area("Your Answer", height=100, key=f"answer_{post.id}")
+            st.form_submit_button("Post Answer", on_click=add_reply,
+                                  args=(post.id, "answers", f"answer_{post.id}"))
+
+# Each card is a fragment: its buttons and forms rerun just that card, and the
+# actions run as callbacks so the card redraws with the updated post
+@st.fragment
+def insight_card(post_id):
+    post = get_forum_store().get(post_id)
+    with st.container():
+        st.markdown(f"### {post.title}")
+        st.caption(f"Posted by {post.author} on {post.date} | Tags: {', '.join(post.categories)}")
+        st.markdown(post.content)
+        reply_thread(post, "comments")
+        st.markdown("---")
+
+@st.fragment
+def question_card(post_id):
+    forum_store = get_forum_store()
+    post = forum_store.get(post_id)
+    with st.container():
+        col1, col2 = st.columns([1, 10])
+        with col1:
+            st.markdown(f"### {forum_store.counter(post_id, 'votes')}")
+            st.markdown("votes")
+            voted = forum_store.has_voted(post_id, get_user_id())
+            st.button("Upvoted" if voted else "Upvote", key=f"upvote_{post_id}", disabled=voted,
+                      on_click=upvote, args=(post_id,))
+        
+        with col2:
+            st.markdown(f"### {post.title}")
+            st.caption(f"Asked by {post.author} on {post.date} | Tags: {', '.join(post.tags)}")
+            st.markdown(post.content)
+            
+            reply_thread(post, "answers")
+            st.markdown("---")
+
+@st.fragment
+def resource_card(post_id):
+    forum_store = get_forum_store()
+    post = forum_store.get(post_id)
+    with st.container():
+        st.markdown(f"##### {post.resource_type.upper()}")
+        st.markdown(f"### {post.title}")
+        if post.url:
+            st.markdown(f"[Visit Resource]({post.url})")
+        st.caption(f"Shared by {post.author} on {post.date} | {forum_store.counter(post_id, 'saves')} saves")
+        st.markdown(post.description)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button("Save", key=f"save_{post_id}", on_click=save, args=(post_id,))
+        with col2:
+            st.button("Discuss", key=f"discuss_{post_id}", on_click=discuss, args=(post_id,))
+        
+        st.markdown("---")
+
+def post_pending_question():
+    pending = st.session_state.pending_question
+    get_forum_store().add_post("question", pending['title'], pending['content'], author_name(),
+                               tags=pending['tags'])
+    st.session_state.pending_question = None
+    st.toast("Question posted successfully!")
+
+def discard_pending_question():
+    st.session_state.pending_question = None
+
+def similar_questions_notice(forum_store):
+    st.warning("Your question looks like one that has already been asked. Check these first:")
+    for post_id, similarity in st.session_state.pending_question['similar']:
+        post = forum_store.get(post_id)
+        st.markdown(f"- **{post.title}** ({len(post.answers)} answers, {similarity:.0%} similar)")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button("Post anyway", on_click=post_pending_question)
+    with col2:
+        st.button("Discard my question", on_click=discard_pending_question)
+
+@st.fragment(run_every=FORUM_POLL_INTERVAL)
+def forum_updates():
+    # Polls the change log; with nothing new this is a version check and no output
+    changes = get_forum_store().changes_since(st.session_state.forum_version)
+    if changes is None:
+        st.info("Lots of new activity in the forum.")
+    else:
+        me = author_name()
+        new_posts = sum(post.author != me for post in changes['posts'])
+        new_replies = sum(reply.author != me for _, reply in changes['comments'] + changes['answers'])
+        if not new_posts and not new_replies:
+            return
+        st.info(f"{new_posts} new post{'s' if new_posts != 1 else ''} and "
+                f"{new_replies} new {'replies' if new_replies != 1 else 'reply'} since you opened the forum.")
+    if st.button("Show updates", key="show_forum_updates"):
+        st.rerun()
 
 def community_forum():
     st.title("Community Forum")
@@ -7,10 +220,19 @@ def community_forum():
     Connect with peers to share experiences, ask questions, and discover AI resources.
     """)
     
-    # Initialize session state for posts
-    if 'forum_posts' not in st.session_state:
-        st.session_state.forum_posts = []
+    forum_store = get_forum_store()
+    author = author_name()
+    if 'current_post' not in st.session_state:
         st.session_state.current_post = None
+    if 'open_threads' not in st.session_state:
+        st.session_state.open_threads = {}  # post id -> replies shown
+    if 'pending_question' not in st.session_state:
+        st.session_state.pending_question = None
+    if 'forum_pages' not in st.session_state:
+        st.session_state.forum_pages = {"insight": 1, "question": 1, "resource": 1}
+    # Everything rendered below includes all changes up to this version
+    st.session_state.forum_version = forum_store.current_version()
+    forum_updates()
     
     # Create tabs for forum modules
     tab1, tab2, tab3 = st.tabs([
@@ -32,47 +254,22 @@ def community_forum():
             with st.form("insight_form"):
                 title = st.text_input("Post Title")
                 content = st.text_area("Your Experience/Insight", height=200)
-                categories = st.multiselect("Tags", 
-                                          ["Writing", "Research", "Coding", 
-                                           "Ethics", "Productivity", "Other"])
+                categories = st.multiselect("Tags", INSIGHT_CATEGORIES)
                 submit = st.form_submit_button("Share Post")
                 
                 if submit:
                     if title and content:
-                        new_post = {
-                            "type": "insight",
-                            "title": title,
-                            "content": content,
-                            "categories": categories,
-                            "author": "Current User",
-                            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                            "comments": []
-                        }
-                        st.session_state.forum_posts.append(new_post)
+                        forum_store.add_post("insight", title, content, author, categories=categories)
                         st.success("Post shared successfully!")
                     else:
                         st.warning("Please add a title and content")
         
         st.subheader("Recent Posts")
-        for post in [p for p in st.session_state.forum_posts if p["type"] == "insight"]:
-            with st.container():
-                st.markdown(f"### {post['title']}")
-                st.caption(f"Posted by {post['author']} on {post['date']} | Tags: {', '.join(post['categories'])}")
-                st.markdown(post['content'])
-                with st.expander(f"Comments ({len(post['comments'])} replies)"):
-                    for comment in post['comments']:
-                        st.markdown(f"{comment['author']}: {comment['content']}")
-                    
-                    with st.form(key=f"comment_form_{post['title']}"):
-                        new_comment = st.text_input("Add a comment")
-                        if st.form_submit_button("Post Comment") and new_comment:
-                            post['comments'].append({
-                                "author": "Current User",
-                                "content": new_comment,
-                                "date": datetime.now().strftime("%Y-%m-%d %H:%M")
-                            })
-                            st.rerun()
-                st.markdown("---")
+        query, filters = feed_filters(forum_store, "insight", "categories", INSIGHT_CATEGORIES)
+        posts, has_more = feed_posts(forum_store, "insight", query, filters)
+        for post in posts:
+            insight_card(post.id)
+        load_more_button("insight", has_more)
     
     with tab2:
         st.header("Ask & Answer Questions")
@@ -87,59 +284,33 @@ def community_forum():
             with st.form("question_form"):
                 title = st.text_input("Question Title")
                 content = st.text_area("Detailed Question", height=200)
-                tags = st.multiselect("Tags", 
-                                    ["ChatGPT", "Grammarly", "Research", 
-                                     "Coding", "Troubleshooting", "Other"])
+                tags = st.multiselect("Tags", QUESTION_TAGS)
                 submit = st.form_submit_button("Post Question")
                 
                 if submit:
                     if title and content:
-                        new_post = {
-                            "type": "question",
-                            "title": title,
-                            "content": content,
-                            "tags": tags,
-                            "author": "Current User",
-                            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                            "answers": [],
-                            "votes": 0
-                        }
-                        st.session_state.forum_posts.append(new_post)
-                        st.success("Question posted successfully!")
+                        similar = forum_store.similar_questions(title, content)
+                        if similar:
+                            # Hold the question until the student has seen the similar ones
+                            st.session_state.pending_question = {
+                                "title": title, "content": content, "tags": tags,
+                                "similar": [(post.id, similarity) for post, similarity in similar],
+                            }
+                        else:
+                            forum_store.add_post("question", title, content, author, tags=tags)
+                            st.success("Question posted successfully!")
                     else:
                         st.warning("Please add a title and question details")
+            if st.session_state.pending_question:
+                similar_questions_notice(forum_store)
         
         st.subheader("Recent Questions")
-        for post in [p for p in st.session_state.forum_posts if p["type"] == "question"]:
-            with st.container():
-                col1, col2 = st.columns([1, 10])
-                with col1:
-                    st.markdown(f"### {post['votes']}")
-                    st.markdown("votes")
-                    if st.button("Upvote", key=f"upvote_{post['title']}"):
-                        post['votes'] += 1
-                        st.rerun()
-                
-                with col2:
-                    st.markdown(f"### {post['title']}")
-                    st.caption(f"Asked by {post['author']} on {post['date']} | Tags: {', '.join(post['tags'])}")
-                    st.markdown(post['content'])
-                    
-                    with st.expander(f"Answers ({len(post['answers'])})"):
-                        for answer in post['answers']:
-                            st.markdown(f"{answer['author']}: {answer['content']}")
-                            st.caption(f"Posted on {answer['date']}")
-                        
-                        with st.form(key=f"answer_form_{post['title']}"):
-                            new_answer = st.text_area("Your Answer", height=100)
-                            if st.form_submit_button("Post Answer") and new_answer:
-                                post['answers'].append({
-                                    "author": "Current User",
-                                    "content": new_answer,
-                                    "date": datetime.now().strftime("%Y-%m-%d %H:%M")
-                                })
-                                st.rerun()
-                    st.markdown("---")
+        sort = feed_sort("question")
+        query, filters = feed_filters(forum_store, "question", "tags", QUESTION_TAGS)
+        posts, has_more = feed_posts(forum_store, "question", query, filters, sort)
+        for post in posts:
+            question_card(post.id)
+        load_more_button("question", has_more)
     
     with tab3:
         st.header("AI Resources & Trends")
@@ -152,9 +323,7 @@ def community_forum():
         
         with st.expander("Share New Resource", expanded=False):
             with st.form("resource_form"):
-                resource_type = st.selectbox("Resource Type", 
-                                           ["Article", "Tool", "Research Paper", 
-                                            "Tutorial", "Event", "News", "Other"])
+                resource_type = st.selectbox("Resource Type", RESOURCE_TYPES)
                 title = st.text_input("Title")
                 url = st.text_input("URL (optional)")
                 description = st.text_area("Description", height=150)
@@ -162,42 +331,19 @@ def community_forum():
                 
                 if submit:
                     if title and description:
-                        new_post = {
-                            "type": "resource",
-                            "resource_type": resource_type,
-                            "title": title,
-                            "url": url,
-                            "description": description,
-                            "author": "Current User",
-                            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                            "saves": 0
-                        }
-                        st.session_state.forum_posts.append(new_post)
+                        forum_store.add_post("resource", title, description, author,
+                                             resource_type=resource_type, url=url)
                         st.success("Resource shared successfully!")
                     else:
                         st.warning("Please add a title and description")
         
         st.subheader("Recent Resources")
-        for post in [p for p in st.session_state.forum_posts if p["type"] == "resource"]:
-            with st.container():
-                st.markdown(f"##### {post['resource_type'].upper()}")
-                st.markdown(f"### {post['title']}")
-                if post['url']:
-                    st.markdown(f"[Visit Resource]({post['url']})")
-                st.caption(f"Shared by {post['author']} on {post['date']} | {post['saves']} saves")
-                st.markdown(post['description'])
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("Save", key=f"save_{post['title']}"):
-                        post['saves'] += 1
-                        st.rerun()
-                with col2:
-                    if st.button("Discuss", key=f"discuss_{post['title']}"):
-                        st.session_state.current_post = post
-                        st.rerun()
-                
-                st.markdown("---")
+        sort = feed_sort("resource")
+        query, filters = feed_filters(forum_store, "resource", "resource_type", RESOURCE_TYPES)
+        posts, has_more = feed_posts(forum_store, "resource", query, filters, sort)
+        for post in posts:
+            resource_card(post.id)
+        load_more_button("resource", has_more)
 
 def main():
     st.set_page_config(page_title="Community Forum", layout="wide")
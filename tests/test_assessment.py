@@ -0,0 +1,49 @@
+import json
+
+from utils.assessment import QUESTIONS_PER_SET, generate_question_set, parse_question_json, repair_question
+
+
+def question(n, options=("Never", "Sometimes", "Often", "Always")):
+    return {"question": f"How often do you use AI for task {n}?", "options": list(options)}
+
+
+def test_repair_strips_numbering_and_letter_labels():
+    repaired = repair_question({
+        "question": "**1. Question: How do you feel about AI tutors?**",
+        "options": ["A. Great", "b) Fine", "Fine", "(C) Unsure", "D: Opposed"],
+    })
+    assert repaired == {
+        "text": "How do you feel about AI tutors?",
+        "options": ["A. Great", "B. Fine", "C. Unsure", "D. Opposed"],
+        "category": "ethical",
+    }
+
+
+def test_questions_without_four_distinct_options_are_dropped():
+    assert repair_question(question(1, ["Yes", "yes", "No", "Maybe"])) is None
+    assert repair_question({"question": "", "options": ["A", "B", "C", "D"]}) is None
+    assert repair_question("not a question") is None
+
+
+def test_falls_back_to_the_line_format():
+    text = "Question: How often do you check AI answers?\nA. Never\nB. Rarely\nC. Often\nD. Always"
+    assert [q["text"] for q in parse_question_json(text)] == ["How often do you check AI answers?"]
+
+
+def test_only_missing_questions_are_requested_again():
+    prompts, discarded = [], []
+    responses = [
+        json.dumps([question(1), question(2), question(2), {"question": "Broken"}]),
+        "not json at all",
+        json.dumps([question(3), question(4), question(5), question(6)]),
+    ]
+
+    def generate(prompt):
+        prompts.append(prompt)
+        return responses[len(prompts) - 1]
+
+    questions = generate_question_set(generate, discarded.append)
+    assert len(questions) == QUESTIONS_PER_SET
+    assert [q["text"][-7:] for q in questions] == ["task 1?", "task 2?", "task 3?", "task 4?", "task 5?"]
+    assert "exactly 3 " in prompts[1] and "task 2?" in prompts[1]
+    assert discarded == [prompts[1]]
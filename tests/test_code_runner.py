@@ -0,0 +1,58 @@
+import pytest
+
+from utils.code_runner import CodeRunner
+
+GOOD = "def calculate_average(numbers):\n    return sum(numbers) / len(numbers) if numbers else 0"
+
+
+@pytest.fixture(scope="module")
+def runner():
+    runner = CodeRunner(workers=1).start()
+    if runner.run(GOOD)["error"]:
+        runner.close()
+        pytest.skip("the sandbox needs Linux namespaces, which aren't available here")
+    yield runner
+    runner.close()
+
+
+def messages(result):
+    return {test["name"]: (test["passed"], test["message"]) for test in result["tests"]}
+
+
+def test_a_correct_solution_passes_every_test(runner):
+    result = runner.run(GOOD)
+    assert result["error"] is None
+    assert result["passed"] == result["total"] == 6
+
+
+def test_crashing_on_an_empty_list_fails_only_that_test(runner):
+    result = runner.run("def calculate_average(numbers):\n    return sum(numbers) / len(numbers)")
+    assert result["passed"] == 5
+    assert messages(result)["Empty list"][0] is False
+
+
+def test_runaway_code_is_stopped_and_the_runner_recovers(runner):
+    result = runner.run("def calculate_average(numbers):\n    while True:\n        pass")
+    assert result["passed"] == 0
+    assert runner.run(GOOD)["passed"] == 6
+
+
+def test_submissions_cannot_see_the_app_environment_or_files(runner):
+    # Each returns the right answer for the first test only if it sees nothing;
+    # Python itself may add LC_CTYPE when it starts under the C locale
+    for code in (
+        "import os\ndef calculate_average(n):\n    return 2.5 if set(os.environ) <= {'PATH', 'LC_CTYPE'} else 0",
+        "import os\ndef calculate_average(n):\n    try:\n        return 2.5 if os.listdir('/') == [] else 0\n"
+        "    except OSError:\n        return 2.5",
+        "def calculate_average(n):\n    try:\n        open('/etc/passwd')\n    except OSError:\n"
+        "        return 2.5\n    return 0",
+    ):
+        assert messages(runner.run(code))["Whole numbers"][0]
+
+
+def test_values_that_only_pretend_to_be_equal_fail(runner):
+    result = runner.run(
+        "class Anything(float):\n    def __eq__(self, other):\n        return True\n"
+        "def calculate_average(numbers):\n    return Anything(99)"
+    )
+    assert result["passed"] == 0
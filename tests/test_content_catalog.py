@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from utils.content_catalog import CONTENT_DIR, ContentCatalog, ContentError, load_pack, render_markdown
+
+MODULE = '''
+key = "{key}"
+button = "Basics"
+title = "Module 1: Basics"
+summary = "What AI is"
+body = """
+## Why it matters
+Use **AI** with *care*.
+- Check [sources](https://example.com)
+"""
+checklist = ["Read the intro"]
+[[resources]]
+title = "Guide <1>"
+description = "A short guide"
+'''
+
+
+def write_module(directory, name="01.toml", key="basics", text=None):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(text if text is not None else MODULE.format(key=key))
+    return path
+
+
+def test_renders_the_markdown_subset_and_escapes_html():
+    assert render_markdown("## Title\nSome `code` & <b>text</b>\n\n- one\n- **two**") == (
+        "<h2>Title</h2>\n<p>Some <code>code</code> &amp; &lt;b&gt;text&lt;/b&gt;</p>\n"
+        "<ul><li>one</li><li><strong>two</strong></li></ul>"
+    )
+
+
+def test_compiles_modules_in_file_name_order(tmp_path):
+    write_module(tmp_path, "02.toml", key="second")
+    write_module(tmp_path, "01.toml", key="first")
+    pack = load_pack(tmp_path)
+    assert [module["key"] for module in pack["modules"]] == ["first", "second"]
+    module = pack["by_key"]["first"]
+    assert '<a href="https://example.com" target="_blank">sources</a>' in module["body_html"]
+    assert "<h4>Guide &lt;1&gt;</h4>" in module["resources_html"][0]
+
+
+def test_invalid_packs_are_rejected(tmp_path):
+    write_module(tmp_path, "01.toml", key="same")
+    write_module(tmp_path, "02.toml", key="same")
+    with pytest.raises(ContentError, match="duplicate module keys: same"):
+        load_pack(tmp_path)
+    write_module(tmp_path, "02.toml", text=MODULE.format(key="other").replace('["Read the intro"]', "[]"))
+    with pytest.raises(ContentError, match="02.toml: 'checklist'"):
+        load_pack(tmp_path)
+
+
+def test_reloads_changes_and_keeps_the_last_good_pack(tmp_path):
+    path = write_module(tmp_path, key="basics")
+    catalog = ContentCatalog(str(tmp_path), check_interval=0)
+    assert [module["key"] for module in catalog.modules] == ["basics"]
+
+    write_module(tmp_path, "02.toml", text="key = ")
+    assert [module["key"] for module in catalog.modules] == ["basics"]
+    assert catalog.error.startswith("02.toml")
+
+    os.remove(os.path.join(tmp_path, "02.toml"))
+    write_module(tmp_path, key="renamed")
+    os.utime(path, ns=(0, 0))
+    assert catalog.get("renamed") is not None
+    assert catalog.error is None
+
+
+def test_shipped_content_pack_is_valid():
+    assert load_pack(CONTENT_DIR)["modules"]
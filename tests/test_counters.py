@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from utils.counters import WriteBehindCounters
+
+
+def make_counters(applied, fail=False):
+    def apply(deltas):
+        if fail:
+            raise RuntimeError("database is locked")
+        applied.append(deltas)
+    return WriteBehindCounters(apply, shards=4, flush_interval=3600)
+
+
+def test_increments_from_many_threads_merge_into_one_batch():
+    applied = []
+    counters = make_counters(applied)
+
+    def bump():
+        for _ in range(500):
+            counters.add(("saves", 1))
+            counters.add(("saves", 2), 2)
+
+    threads = [threading.Thread(target=bump) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counters.pending(("saves", 1)) == 4000
+    assert counters.flush() == 2
+    assert applied == [{("saves", 1): 4000, ("saves", 2): 8000}]
+    assert counters.pending(("saves", 1)) == 0
+    assert counters.flush() == 0
+
+
+def test_pending_prefix_sums_matching_keys():
+    counters = make_counters([])
+    counters.add(("vote", 1, "alice"))
+    counters.add(("vote", 1, "bob"))
+    counters.add(("vote", 2, "alice"))
+    counters.add(("saves", 1))
+    assert counters.pending_prefix(("vote", 1)) == 2
+    assert counters.pending_prefix(("vote",)) == 3
+
+
+def test_failed_flush_keeps_the_deltas_for_the_next_one():
+    counters = make_counters([], fail=True)
+    counters.add(("saves", 1), 3)
+    with pytest.raises(RuntimeError):
+        counters.flush()
+    assert counters.pending(("saves", 1)) == 3
+    assert counters.stats()["failures"] == 1
+    counters.apply_fn = lambda deltas: None
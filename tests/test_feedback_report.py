@@ -0,0 +1,31 @@
+from utils.feedback_report import split_sections
+
+REPORT = """Here is your report.
+## 1. Usage Patterns Analysis
+You mostly summarize readings.
+## 2. Strengths in AI Utilization
+1. You verify facts.
+3. Areas for Improvement
+5. Try summarising first.
+**4. Recommended Strategies**
+Plan before prompting.
+"""
+
+
+def test_splits_on_numbered_section_headings_only():
+    preamble, *sections = split_sections(REPORT)
+    assert preamble == "Here is your report.\n"
+    assert [section.splitlines()[0] for section in sections] == [
+        "## 1. Usage Patterns Analysis",
+        "## 2. Strengths in AI Utilization",
+        "3. Areas for Improvement",
+        "**4. Recommended Strategies**",
+    ]
+    assert "5. Try summarising first." in sections[2]
+
+
+def test_partial_text_ends_with_the_section_being_written():
+    partial = REPORT[:REPORT.index("verify") + 3]
+    sections = split_sections(partial)
+    assert len(sections) == 3
+    assert sections[-1].endswith("1. You ver")
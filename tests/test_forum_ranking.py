@@ -0,0 +1,54 @@
+from utils.forum_ranking import HOT_EPOCH, HOT_HALF_LIFE, ForumRankings, hot_score
+from utils.forum_records import Post
+
+DAY = 24 * 3600
+
+
+def question(post_id, votes=0, age_days=0):
+    return Post(post_id, "question", f"Q{post_id}", "Body", "alice", HOT_EPOCH + 100 * DAY - age_days * DAY,
+                votes=votes)
+
+
+def page_all(rankings, post_type, feed, limit):
+    ids, cursor = [], None
+    while True:
+        page, cursor = rankings.page(post_type, feed, limit, cursor)
+        ids += page
+        if cursor is None:
+            return ids
+
+
+def test_ten_times_the_votes_is_worth_one_half_life_of_age():
+    assert hot_score(100, HOT_EPOCH) == hot_score(10, HOT_EPOCH + HOT_HALF_LIFE)
+    assert hot_score(-10, HOT_EPOCH) < hot_score(0, HOT_EPOCH) < hot_score(1, HOT_EPOCH + 1)
+
+
+def test_top_and_hot_feeds_page_best_first():
+    rankings = ForumRankings()
+    posts = [question(1, votes=50, age_days=10), question(2, votes=5), question(3, votes=20, age_days=1)]
+    for post in posts:
+        rankings.update(post)
+    assert page_all(rankings, "question", "top", limit=2) == [1, 3, 2]
+    assert page_all(rankings, "question", "hot", limit=2) == [2, 3, 1]
+
+
+def test_updates_move_one_post_and_refresh_cached_pages():
+    rankings = ForumRankings()
+    posts = {post_id: question(post_id, votes=post_id) for post_id in range(1, 6)}
+    for post in posts.values():
+        rankings.update(post)
+    assert rankings.page("question", "top", 2)[0] == [5, 4]
+    posts[1].votes = 100
+    rankings.update(posts[1])
+    assert rankings.page("question", "top", 2)[0] == [1, 5]
+
+
+def test_answered_questions_leave_the_unanswered_feed():
+    rankings = ForumRankings()
+    old, new = question(1, age_days=2), question(2)
+    rankings.update(old)
+    rankings.update(new)
+    assert page_all(rankings, "question", "unanswered", limit=1) == [2, 1]
+    new.add_reply("answers", "bob", "Try this", new.created_at + 60)
+    rankings.update(new)
+    assert page_all(rankings, "question", "unanswered", limit=1) == [1]
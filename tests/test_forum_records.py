@@ -0,0 +1,25 @@
+from utils.forum_records import NO_REPLIES, TAG_VOCABULARY, Post, tag_mask, tag_names
+
+
+def test_tags_round_trip_through_the_bitmask():
+    assert tag_names(tag_mask(["Coding", "Writing"])) == ["Writing", "Coding"]
+    assert tag_names(tag_mask([])) == []
+
+
+def test_unknown_tags_are_added_to_the_vocabulary():
+    mask = tag_mask(["Tag added by a test"])
+    assert TAG_VOCABULARY[-1] == "Tag added by a test"
+    assert tag_names(mask) == ["Tag added by a test"]
+
+
+def test_replies_are_stored_column_wise():
+    post = Post(1, "question", "Title", "Body", "alice", 1700000000, tags=["Coding"])
+    assert post.comments is NO_REPLIES and len(post.answers) == 0 and post.answers[0:5] == []
+    for n in range(3):
+        post.add_reply("comments", f"user {n}", f"comment {n}", 1700000000 + n)
+    assert post.answers is NO_REPLIES
+    assert len(post.comments) == 3
+    assert [reply.content for reply in post.comments[1:]] == ["comment 1", "comment 2"]
+    assert post.comments[0].author == "user 0"
+    assert [reply.created_at for reply in post.comments] == [1700000000, 1700000001, 1700000002]
+    assert post.tags == post.categories == ["Coding"]
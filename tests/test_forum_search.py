@@ -0,0 +1,50 @@
+from utils.forum_search import SearchIndex, tokenize
+
+
+def make_index():
+    index = SearchIndex()
+    index.add_post(1, "Citing ChatGPT in essays", "How should I cite ChatGPT output?",
+                   facets={"type": "question", "tags": ["ChatGPT"]})
+    index.add_post(2, "Debugging with AI", "ChatGPT helped me find an off-by-one error.",
+                   facets={"type": "question", "tags": ["Coding", "ChatGPT"]})
+    index.add_post(3, "Grammarly tips", "Grammarly catches comma splices.",
+                   facets={"type": "insight", "categories": ["Writing"]})
+    return index
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("How do I cite ChatGPT?") == ["cite", "chatgpt"]
+    assert tokenize(None) == []
+
+
+def test_title_matches_outrank_body_matches():
+    index = make_index()
+    results = index.search("citing")
+    assert [post_id for post_id, _ in results] == [1]
+    ranked = [post_id for post_id, _ in index.search("chatgpt debugging")]
+    assert ranked[0] == 2
+    assert set(ranked) == {1, 2}
+
+
+def test_rare_terms_weigh_more_than_common_ones():
+    index = make_index()
+    scores = dict(index.search("chatgpt grammarly"))
+    assert scores[3] > scores[1]
+
+
+def test_facet_filters_and_within_a_field_or_across_fields():
+    index = make_index()
+    assert [post_id for post_id, _ in index.search("", {"type": "question"})] == [2, 1]
+    assert [post_id for post_id, _ in index.search("chatgpt", {"tags": ["Coding"]})] == [2]
+    assert index.search("chatgpt", {"type": "insight"}) == []
+    assert {post_id for post_id, _ in index.search("", {"tags": ["Coding", "ChatGPT"]})} == {1, 2}
+    assert index.facet_counts("tags", {"type": "question"}) == {"ChatGPT": 2, "Coding": 1}
+
+
+def test_replies_are_folded_into_their_post():
+    index = make_index()
+    assert index.search("zotero") == []
+    index.add_text(1, "Zotero can store the citation for you.")
+    index.add_text(99, "Zotero reply to a post that isn't indexed")
+    assert [post_id for post_id, _ in index.search("zotero")] == [1]
+    assert len(index) == 3
@@ -0,0 +1,104 @@
+import sqlite3
+
+from utils.forum_store import ForumStore
+
+
+def make_store(path):
+    return ForumStore(path=str(path), pool_size=2, sync_seconds=0, counter_flush_interval=3600)
+
+
+def add_questions(store, count):
+    return [
+        store.add_post("question", f"Question {n}", f"Body of question {n}", "alice", tags=["Coding"])
+        for n in range(count)
+    ]
+
+
+def test_pages_posts_newest_first(tmp_path):
+    store = make_store(tmp_path / "forum.sqlite3")
+    ids = add_questions(store, 7)
+    store.add_post("insight", "An insight", "Content", "bob", categories=["Writing"])
+    seen, cursor = [], None
+    while True:
+        posts, cursor = store.page("question", limit=3, before=cursor)
+        seen += [post.id for post in posts]
+        if cursor is None:
+            break
+    assert seen == ids[::-1]
+    assert store.count("question") == 7
+
+
+def test_a_user_votes_once_and_the_vote_lands_in_one_flush(tmp_path):
+    store = make_store(tmp_path / "forum.sqlite3")
+    post_id, other_id = add_questions(store, 2)
+    assert store.vote(post_id, "alice")
+    assert not store.vote(post_id, "alice")
+    assert store.vote(post_id, "bob")
+    assert store.counter(post_id, "votes") == 2
+    assert store.counter(other_id, "votes") == 0
+    store.counters.flush()
+    assert store.counters.pending_prefix(("vote", post_id)) == 0
+    assert store.get(post_id).votes == 2
+    with store.pool.connection() as conn:
+        voters = conn.execute("SELECT user_id FROM post_votes WHERE post_id = ? ORDER BY user_id", (post_id,))
+        assert [row[0] for row in voters] == ["alice", "bob"]
+
+
+def test_a_vote_already_cast_elsewhere_is_not_counted_again(tmp_path):
+    path = tmp_path / "forum.sqlite3"
+    first, second = make_store(path), make_store(path)
+    post_id = add_questions(first, 1)[0]
+    second.current_version()
+    assert first.vote(post_id, "alice")
+    assert second.vote(post_id, "alice")
+    first.counters.flush()
+    second.counters.flush()
+    assert first.get(post_id).votes == 1
+    assert second.get(post_id).votes == 1
+
+
+def test_other_processes_pick_up_changes_from_the_log(tmp_path):
+    path = tmp_path / "forum.sqlite3"
+    writer, reader = make_store(path), make_store(path)
+    version = reader.current_version()
+    post_id = add_questions(writer, 1)[0]
+    writer.add_comment(post_id, "bob", "A comment")
+    writer.add_answer(post_id, "carol", "An answer")
+    writer.save(post_id)
+    writer.counters.flush()
+
+    delta = reader.changes_since(version)
+    assert [post.id for post in delta["posts"]] == [post_id]
+    assert [reply.content for _, reply in delta["comments"]] == ["A comment"]
+    assert [reply.content for _, reply in delta["answers"]] == ["An answer"]
+    assert delta["counters"] == {post_id: {"votes": 0, "saves": 1}}
+    assert reader.changes_since(delta["version"])["posts"] == []
+    assert reader.search("question", "question")[0].id == post_id
+
+
+def test_counters_entries_are_coalesced_per_post(tmp_path):
+    store = make_store(tmp_path / "forum.sqlite3")
+    post_id = add_questions(store, 1)[0]
+    for _ in range(3):
+        store.save(post_id)
+        store.counters.flush()
+    with store.pool.connection() as conn:
+        kinds = [row[0] for row in conn.execute("SELECT kind FROM forum_changes ORDER BY version")]
+    assert kinds == ["post", "counters"]
+
+
+def test_old_change_logs_are_compacted_once(tmp_path):
+    path = tmp_path / "forum.sqlite3"
+    make_store(path)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany("INSERT INTO forum_changes (kind, post_id) VALUES ('counters', ?)", [(1,), (1,)])
+        conn.execute("PRAGMA user_version = 0")
+    make_store(path)
+    assert conn.execute("SELECT COUNT(*) FROM forum_changes").fetchone()[0] == 1
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+
+    with conn:
+        conn.executemany("INSERT INTO forum_changes (kind, post_id) VALUES ('counters', ?)", [(1,), (1,)])
+    make_store(path)
+    assert conn.execute("SELECT COUNT(*) FROM forum_changes").fetchone()[0] == 3
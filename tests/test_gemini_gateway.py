@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from utils.gemini_gateway import GeminiGateway
+from utils.llm_cache import LLMCache
+
+
+class Unavailable(Exception):
+    code = 503
+
+
+class ScriptedBackend:
+    """Fails the first ``failures`` calls for a prompt, then echoes it."""
+
+    def __init__(self, failures=0, latency=0.0):
+        self.failures = failures
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate(self, model_name, prompt, generation_config=None, stream=False):
+        with self._lock:
+            self.calls.append(prompt)
+            failed = self.calls.count(prompt) <= self.failures
+        time.sleep(self.latency)
+        if failed:
+            raise Unavailable("model overloaded")
+        return iter(["echo: ", prompt]) if stream else f"echo: {prompt}"
+
+
+def make_gateway(tmp_path, backend, **kwargs):
+    kwargs.setdefault("rate_per_second", 1000)
+    kwargs.setdefault("burst", 1000)
+    return GeminiGateway(backend, cache=LLMCache(str(tmp_path / "cache.sqlite3")), **kwargs)
+
+
+def test_retries_transient_errors(tmp_path):
+    gateway = make_gateway(tmp_path, ScriptedBackend(failures=2), base_delay=0.01)
+    assert gateway.generate("model", "hello") == "echo: hello"
+    assert gateway.stats()["retries"] == 2
+    assert gateway.stats()["calls"] == 3
+
+
+def test_gives_up_after_max_retries(tmp_path):
+    gateway = make_gateway(tmp_path, ScriptedBackend(failures=10), base_delay=0.01, max_retries=2)
+    with pytest.raises(Unavailable):
+        gateway.generate("model", "hello")
+    assert gateway.stats()["failures"] == 1
+
+
+def test_backoff_does_not_hold_a_concurrency_slot(tmp_path):
+    backend = ScriptedBackend(failures=1)
+    gateway = make_gateway(tmp_path, backend, max_concurrency=1, base_delay=0.5, max_delay=0.5)
+    finished = {}
+
+    def call(prompt):
+        gateway.generate("model", prompt, use_cache=False)
+        finished[prompt] = time.monotonic()
+
+    retrying = threading.Thread(target=call, args=("first",))
+    retrying.start()
+    while not backend.calls:
+        time.sleep(0.001)
+    time.sleep(0.01)
+    # "second" fails once too, but its call starts while "first" backs off
+    started = time.monotonic()
+    call("second")
+    retrying.join()
+    assert backend.calls[:2] == ["first", "second"]
+    assert finished["second"] - started < 1.0
+    assert gateway.stats()["active"] == 0
+
+
+def test_identical_prompts_in_flight_share_one_call(tmp_path):
+    backend = ScriptedBackend(latency=0.2)
+    gateway = make_gateway(tmp_path, backend)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gateway.generate("model", "same"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["echo: same"] * 5
+    assert backend.calls == ["same"]
+    assert gateway.stats()["coalesced"] == 4
+
+
+def test_stream_retries_before_the_first_chunk_and_caches_the_text(tmp_path):
+    backend = ScriptedBackend(failures=1)
+    gateway = make_gateway(tmp_path, backend, base_delay=0.01)
+    assert "".join(gateway.stream("model", "report")) == "echo: report"
+    assert list(gateway.stream("model", "report")) == ["echo: report"]
+    assert backend.calls == ["report", "report"]
@@ -0,0 +1,44 @@
+import multiprocessing
+import os
+
+from utils import identity
+
+
+def read_key(path, results):
+    results.put(identity._signing_key(path))
+
+
+def test_signing_key_is_created_once_and_reused(tmp_path):
+    path = str(tmp_path / "identity.key")
+    key = identity._signing_key(path)
+    assert len(key) == 32
+    identity._signing_key.cache_clear()
+    assert identity._signing_key(path) == key
+    assert os.listdir(tmp_path) == ["identity.key"]
+
+
+def test_processes_racing_to_create_the_key_agree(tmp_path):
+    path = str(tmp_path / "identity.key")
+    results = multiprocessing.get_context("fork").Queue()
+    workers = [
+        multiprocessing.get_context("fork").Process(target=read_key, args=(path, results))
+        for _ in range(8)
+    ]
+    for worker in workers:
+        worker.start()
+    keys = [results.get(timeout=10) for _ in workers]
+    for worker in workers:
+        worker.join()
+    assert len(set(keys)) == 1
+    assert len(keys[0]) == 32
+
+
+def test_only_tokens_signed_with_the_key_are_accepted(tmp_path, monkeypatch):
+    monkeypatch.setattr(identity, "data_path", lambda name: str(tmp_path / name))
+    identity._signing_key.cache_clear()
+    token = f"abc.{identity._signature('abc')}"
+    assert identity._verified(token) == "abc"
+    assert identity._verified("abc.0000") is None
+    assert identity._verified(f"abd.{identity._signature('abc')}") is None
+    assert identity._verified("abc.é") is None
+    assert identity._verified(None) is None
@@ -0,0 +1,65 @@
+from utils.journal_store import JournalStore
+
+
+def make_store(tmp_path, flush_interval=0.05):
+    return JournalStore(path=str(tmp_path / "journal.sqlite3"), flush_interval=flush_interval)
+
+
+def page_all(store, user_id, limit, between_pages=None):
+    tasks, cursor = [], None
+    while True:
+        entries, cursor = store.page(user_id, limit=limit, before=cursor)
+        tasks += [entry["task"] for entry in entries]
+        if between_pages:
+            between_pages()
+        if cursor is None:
+            return tasks
+
+
+def add(store, user_id, count, start=0):
+    for n in range(start, start + count):
+        store.append(user_id, f"task {n}", "tool", "usage")
+
+
+def test_pages_committed_entries_newest_first(tmp_path):
+    store = make_store(tmp_path)
+    add(store, "alice", 12)
+    add(store, "bob", 3)
+    assert store.flush(timeout=5)
+    assert page_all(store, "alice", limit=5) == [f"task {n}" for n in reversed(range(12))]
+    assert store.count("alice") == 12
+
+
+def test_queued_entries_are_read_back_before_commit(tmp_path):
+    store = make_store(tmp_path, flush_interval=1.0)
+    add(store, "alice", 3)
+    assert store.count("alice") == 3
+    assert store.latest("alice")["task"] == "task 2"
+    assert [entry["task"] for entry in store.view("alice")[0:3]] == ["task 0", "task 1", "task 2"]
+
+
+def test_paging_across_a_flush_returns_each_entry_once(tmp_path):
+    store = make_store(tmp_path, flush_interval=0.3)
+    add(store, "alice", 5)
+    assert store.flush(timeout=5)
+    add(store, "alice", 20, start=5)  # still queued when the first page is read
+    tasks = page_all(store, "alice", limit=4, between_pages=lambda: store.flush(timeout=5))
+    assert tasks == [f"task {n}" for n in reversed(range(25))]
+
+
+def test_view_indexes_history_oldest_first(tmp_path):
+    store = make_store(tmp_path)
+    add(store, "alice", 7)
+    assert store.flush(timeout=5)
+    view = store.view("alice")
+    assert len(view) == 7
+    assert view[0]["task"] == "task 0"
+    assert view[-1]["task"] == "task 6"
+    assert [entry["task"] for entry in view[2:4]] == ["task 2", "task 3"]
+
+
+def test_digest_round_trip(tmp_path):
+    store = make_store(tmp_path)
+    assert store.load_digest("alice") is None
+    store.save_digest("alice", {"folded": 3, "text": "summary"})
+    assert store.load_digest("alice") == {"folded": 3, "text": "summary"}
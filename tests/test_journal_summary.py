@@ -0,0 +1,60 @@
+from utils.journal_summary import (
+    build_journal_context, empty_digest, estimate_tokens, fallback_digest, update_digest,
+)
+
+
+def make_entries(count, tool="ChatGPT"):
+    return [
+        {"date": "2026-01-01 10:00", "task": f"task {n}", "tool": tool, "usage": f"usage {n}"}
+        for n in range(count)
+    ]
+
+
+def failing_summarizer(prompt):
+    raise RuntimeError("model unavailable")
+
+
+def test_nothing_aged_out_returns_the_same_digest():
+    digest = empty_digest()
+    assert update_digest(digest, make_entries(5), failing_summarizer) is digest
+
+
+def test_backlog_is_folded_a_chunk_at_a_time():
+    prompts = []
+
+    def summarize(prompt):
+        prompts.append(prompt)
+        return f"summary {len(prompts)}"
+
+    digest = update_digest(empty_digest(), make_entries(25), summarize, chunk_size=8)
+    assert digest == {"folded": 20, "text": "summary 3"}
+    assert len(prompts) == 3
+    assert "Entry 17 " in prompts[2] and "Entry 21 " not in prompts[2]
+    assert "summary 2" in prompts[2]
+
+
+def test_fallback_digest_keeps_the_newest_material_when_it_overflows():
+    entries = make_entries(5, tool="OldTool")
+    digest = update_digest(empty_digest(), entries, failing_summarizer, recent=0, budget=30)
+    for n in range(20):
+        entries += make_entries(5, tool=f"Tool{n}")
+        digest = update_digest(digest, entries, failing_summarizer, recent=0, budget=30)
+    assert digest["folded"] == len(entries)
+    assert estimate_tokens(digest["text"]) <= 32
+    assert digest["text"].startswith("5 earlier entries. Tools: Tool19 (5)")
+    assert "OldTool" not in digest["text"]
+
+
+def test_fallback_digest_puts_the_new_summary_first():
+    text = fallback_digest("older summary", make_entries(2))
+    assert text.splitlines() == ["2 earlier entries. Tools: ChatGPT (2). Tasks: task 0, task 1.", "older summary"]
+
+
+def test_context_stays_within_budget_and_keeps_the_newest_entries():
+    entries = make_entries(40)
+    digest = update_digest(empty_digest(), entries, lambda prompt: "Uses ChatGPT for most tasks.")
+    context = build_journal_context(entries, digest, budget=80)
+    assert context.startswith("Summary of entries 1-35:\nUses ChatGPT for most tasks.")
+    assert "Entry 40 " in context
+    assert estimate_tokens(context) <= 80 + 5
+    assert build_journal_context([], empty_digest()) == "No journal entries available"
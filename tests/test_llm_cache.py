@@ -0,0 +1,54 @@
+from utils.llm_cache import LLMCache, make_key
+
+
+def make_cache(tmp_path, **kwargs):
+    return LLMCache(str(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+def test_keys_ignore_prompt_indentation_but_not_model_or_config():
+    key = make_key("flash", "  Summarize\n      this   text\n")
+    assert key == make_key("flash", "Summarize\nthis text")
+    assert key != make_key("pro", "Summarize\nthis text")
+    assert key != make_key("flash", "Summarize\nthis text", {"temperature": 0})
+
+
+def test_responses_survive_a_restart(tmp_path):
+    make_cache(tmp_path).set("key", "response")
+    cache = make_cache(tmp_path)
+    assert cache.get("key") == "response"
+    assert cache.get("key") == "response"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_empty_responses_are_not_cached(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("key", "")
+    assert cache.get("key") is None
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=-1)
+    cache.set("key", "response")
+    assert cache.get("key") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = make_cache(tmp_path, max_memory_entries=2, max_disk_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    make_cache(tmp_path).get("a")
+    cache.set("c", "3")
+    assert cache.stats()["memory_entries"] == 2
+    fresh = make_cache(tmp_path)
+    assert fresh.get("b") is None
+    assert (fresh.get("a"), fresh.get("c")) == ("1", "3")
+
+
+def test_delete_drops_both_tiers(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("key", "response")
+    cache.delete("key")
+    assert cache.get("key") is None
+    assert make_cache(tmp_path).get("key") is None
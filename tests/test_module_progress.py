@@ -0,0 +1,45 @@
+from utils.module_progress import ModuleProgress
+
+
+def make_progress(tmp_path):
+    return ModuleProgress(path=str(tmp_path / "progress.sqlite3"), flush_interval=3600)
+
+
+def tick(progress, user_id, module_key, *task_indexes, done=True):
+    for task_index in task_indexes:
+        progress.set_task(user_id, module_key, task_index, done)
+
+
+def test_toggles_collapse_into_one_write(tmp_path):
+    progress = make_progress(tmp_path)
+    for done in (True, False, True):
+        progress.set_task("alice", "prompting", 1, done)
+    assert progress.progress("alice", "prompting", 3) == [False, True, False]
+    assert progress.flush() == 1
+    assert progress.progress("alice", "prompting", 3) == [False, True, False]
+
+
+def test_cohort_summary_from_rollups(tmp_path):
+    progress = make_progress(tmp_path)
+    tick(progress, "alice", "prompting", 0, 1, 2)
+    tick(progress, "bob", "prompting", 0)
+    tick(progress, "carol", "prompting", 0, done=False)
+    progress.flush()
+    tick(progress, "alice", "prompting", 2, done=False)
+    progress.flush()
+    summary = progress.cohort_summary({"prompting": 3, "ethics": 2})
+    assert summary["prompting"] == {
+        "learners": 2, "completed": 0, "average_completion": 0.5, "task_rates": [1.0, 0.5, 0.0],
+    }
+    assert summary["ethics"]["learners"] == 0
+
+
+def test_ticks_on_removed_tasks_do_not_count(tmp_path):
+    progress = make_progress(tmp_path)
+    tick(progress, "alice", "prompting", 0, 1)
+    tick(progress, "bob", "prompting", 3, 4)
+    tick(progress, "carol", "prompting", 0, 4)
+    progress.flush()
+    summary = progress.cohort_summary({"prompting": 2})["prompting"]
+    assert summary == {"learners": 2, "completed": 1, "average_completion": 0.75, "task_rates": [1.0, 0.5]}
+    assert progress.cohort_summary({"prompting": 5})["prompting"]["learners"] == 3
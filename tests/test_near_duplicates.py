@@ -0,0 +1,41 @@
+from utils.near_duplicates import NearDuplicateIndex, shingles
+
+QUESTION = "How do I cite ChatGPT in an APA style research paper for my history class?"
+
+
+def test_finds_a_reworded_question_and_skips_unrelated_ones():
+    index = NearDuplicateIndex()
+    index.add(1, QUESTION)
+    index.add(2, "Why does my Python loop skip the last element of the list?")
+    index.add(3, "")
+    matches = index.query("How do I cite ChatGPT in an APA style research paper for my history course?")
+    assert [post_id for post_id, _ in matches] == [1]
+    assert matches[0][1] > 0.7
+    assert index.query("Best note taking app for biology lectures?") == []
+    assert len(index) == 2
+
+
+def test_identical_text_is_a_perfect_match():
+    index = NearDuplicateIndex()
+    index.add(7, QUESTION)
+    assert index.query(QUESTION.upper() + "!!") == [(7, 1.0)]
+
+
+def test_index_grows_past_its_initial_capacity():
+    index = NearDuplicateIndex(capacity=2)
+    for post_id in range(10):
+        index.add(post_id, f"Question number {post_id} about {'x' * post_id} unique wording {post_id}")
+    index.add(42, QUESTION)
+    assert len(index) == 11
+    assert index.query(QUESTION, limit=1) == [(42, 1.0)]
+
+
+def test_similarity_estimates_jaccard():
+    index = NearDuplicateIndex(num_perm=256, bands=64)
+    a = "students should disclose when an ai tool drafted part of an essay"
+    b = "students should disclose when an ai tool drafted any part of their essays"
+    index.add(1, a)
+    matches = dict(index.query(b, threshold=0.0))
+    a_shingles, b_shingles = set(shingles(a).tolist()), set(shingles(b).tolist())
+    jaccard = len(a_shingles & b_shingles) / len(a_shingles | b_shingles)
+    assert abs(matches[1] - jaccard) < 0.15
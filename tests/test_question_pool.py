@@ -0,0 +1,52 @@
+import time
+
+from utils.question_pool import QuestionPool
+
+
+def question_set(n):
+    return [
+        {"text": f"Set {n} question {i}?", "options": ["A. One", "B. Two", "C. Three", "D. Four"]}
+        for i in range(5)
+    ]
+
+
+def test_rejects_invalid_and_duplicate_sets():
+    pool = QuestionPool(lambda: None)
+    assert pool.add(question_set(1))
+    assert not pool.add(question_set(1))
+    assert not pool.add(question_set(2)[:4])
+    assert pool.depth() == 1
+
+
+def test_a_session_never_gets_the_same_set_twice_and_sets_retire():
+    pool = QuestionPool(lambda: None, low_water=0, max_serves=2)
+    pool.add(question_set(1))
+    pool.add(question_set(2))
+    first = pool.take("alice")
+    assert pool.take("alice") != first
+    assert pool.take("alice") is None
+    assert pool.take("bob") == first
+    assert pool.depth() == 1
+    assert pool.stats()["empty"] == 1
+
+
+def test_served_sets_are_copies():
+    pool = QuestionPool(lambda: None, low_water=0)
+    pool.add(question_set(1))
+    pool.take("alice")[0]["options"].append("E. Five")
+    assert len(pool.take("bob")[0]["options"]) == 4
+
+
+def test_worker_refills_to_the_target():
+    made = []
+
+    def generate():
+        made.append(len(made))
+        return question_set(len(made))
+
+    pool = QuestionPool(generate, target=3).start()
+    deadline = time.monotonic() + 5
+    while pool.depth() < 3:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert pool.stats()["refills"] == 3
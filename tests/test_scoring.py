@@ -0,0 +1,67 @@
+import threading
+
+import numpy as np
+
+from utils.scoring import UNANSWERED, CohortScores, answer_indices, question_categories, score_answers
+
+QUESTIONS = [
+    {"text": "How often do you use AI?", "options": ["A. Never", "B. Rarely", "C. Often", "D. Daily"]},
+    {"text": "How do you feel about AI essays?", "options": ["A. Fine", "B. Okay", "C. Uneasy", "D. Opposed"]},
+    {"text": "Anything else?", "options": ["A. One", "B. Two", "C. Three", "D. Four"]},
+]
+
+
+def test_scores_answered_questions_by_category():
+    answers = answer_indices(QUESTIONS, {"q0": "Daily", "q1": "Fine"})
+    assert answers.tolist() == [3, 0, UNANSWERED]
+    scores, total, max_possible = score_answers(question_categories(QUESTIONS), answers)
+    assert scores.tolist() == [3, 3, 0]
+    assert (total, max_possible) == (6, 6)
+
+
+def test_percentile_leaves_out_the_students_own_score(tmp_path):
+    cohort = CohortScores(str(tmp_path / "scores.sqlite3"))
+    for n, percentage in enumerate([20, 40, 60, 80]):
+        cohort.record(f"student {n}", percentage)
+    cohort.record("me", 60)
+    assert cohort.percentile_rank(60) == 60.0
+    assert cohort.percentile_rank(60, "me") == 62.5
+    assert cohort.percentile_rank(60, "nobody") == 60.0
+
+
+def test_the_only_student_has_no_percentile(tmp_path):
+    cohort = CohortScores(str(tmp_path / "scores.sqlite3"))
+    cohort.record("me", 70)
+    assert cohort.percentile_rank(70, "me") is None
+
+
+def test_resubmitting_moves_a_student_instead_of_counting_twice(tmp_path):
+    path = str(tmp_path / "scores.sqlite3")
+    cohort, other_process = CohortScores(path), CohortScores(path)
+    cohort.record("me", 30)
+    other_process.record("me", 90)
+    assert cohort.size() == 1
+    assert cohort.percentile_rank(50) == 0.0
+
+
+def test_concurrent_resubmissions_from_several_processes_count_once(tmp_path):
+    path = str(tmp_path / "scores.sqlite3")
+    processes = [CohortScores(path) for _ in range(4)]
+    errors = []
+
+    def resubmit(cohort, offset):
+        try:
+            for n in range(50):
+                cohort.record("me", (offset + 7 * n) % 101)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=resubmit, args=(cohort, n)) for n, cohort in enumerate(processes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    fresh = CohortScores(path)
+    assert fresh.size() == 1
+    assert np.count_nonzero(fresh._counts) == 1
@@ -0,0 +1,71 @@
+import pytest
+
+from utils.text_diff import WRITING_CLAIMS, WRITING_PARAGRAPH, analyze_rewrite, diff_opcodes, tokenize
+
+CLAIM1, CLAIM2, CLAIM3 = (claim["claim"] for claim in WRITING_CLAIMS)
+
+
+def statuses(rewrite):
+    return [claim["status"] for claim in analyze_rewrite(WRITING_PARAGRAPH, rewrite)["claims"]]
+
+
+def rewrite(claim, old, new):
+    return WRITING_PARAGRAPH.replace(claim, claim.replace(old, new))
+
+
+def test_opcodes_rebuild_the_rewrite():
+    a, _ = tokenize("the quick brown fox jumps over the lazy dog")
+    b, _ = tokenize("the quick red fox leaps over the dog today")
+    rebuilt = []
+    for tag, i1, i2, j1, j2 in diff_opcodes(a, b):
+        assert (tag == "equal") == (a[i1:i2] == b[j1:j2])
+        rebuilt += b[j1:j2]
+    assert rebuilt == b
+
+
+def test_unchanged_paragraph_corrects_nothing():
+    analysis = analyze_rewrite(WRITING_PARAGRAPH, WRITING_PARAGRAPH)
+    assert statuses(WRITING_PARAGRAPH) == ["unchanged"] * 3
+    assert analysis["coverage"] == 0.0
+
+
+@pytest.mark.parametrize("text, expected", [
+    (rewrite(CLAIM1, "can think like humans", "perform tasks that usually need human intelligence"),
+     ["fixed", "unchanged", "unchanged"]),
+    (rewrite(CLAIM1, "can think", "cannot think"), ["fixed", "unchanged", "unchanged"]),
+    (rewrite(CLAIM2, "All AI systems are completely objective and never", "AI systems can be biased and"),
+     ["unchanged", "fixed", "unchanged"]),
+    (rewrite(CLAIM2, "never make", "sometimes make"), ["unchanged", "partly fixed", "unchanged"]),
+    (rewrite(CLAIM3, "the same as", "a subset of"), ["unchanged", "unchanged", "fixed"]),
+    (rewrite(CLAIM3, "is the same", "is not the same"), ["unchanged", "unchanged", "fixed"]),
+])
+def test_real_corrections(text, expected):
+    assert statuses(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    rewrite(CLAIM2, "completely objective", "very completely objective"),
+    rewrite(CLAIM2, "completely objective", "totally objective"),
+    rewrite(CLAIM2, "never make", "never never make"),
+    rewrite(CLAIM1, "can think", "can sort of think"),
+    rewrite(CLAIM3, "the same as", "really the same as"),
+    rewrite(CLAIM3, "is the same", "is not not the same"),
+])
+def test_filler_edits_are_not_corrections(text):
+    analysis = analyze_rewrite(WRITING_PARAGRAPH, text)
+    assert "fixed" not in statuses(text)
+    assert analysis["coverage"] == 0.0
+
+
+def test_removed_claim_counts_only_when_the_rest_is_kept():
+    without_claim2 = WRITING_PARAGRAPH.replace(CLAIM2 + " ", "")
+    assert statuses(without_claim2) == ["unchanged", "removed", "unchanged"]
+    assert analyze_rewrite(WRITING_PARAGRAPH, without_claim2)["coverage"] == pytest.approx(1 / 3)
+
+    discarded = analyze_rewrite(WRITING_PARAGRAPH, "hello")
+    assert [claim["status"] for claim in discarded["claims"]] == ["dropped"] * 3
+    assert discarded["coverage"] == 0.0
+
+
+def test_results_are_cached():
+    assert analyze_rewrite(WRITING_PARAGRAPH, "hello") is analyze_rewrite(WRITING_PARAGRAPH, "hello")
@@ -0,0 +1 @@
+# Shared helpers for the AI Study Buddy pages (storage, LLM access, indexes).
@@ -0,0 +1,166 @@
+"""Question generation helpers for the Usage Habit Assessment."""
+import json
+import re
+
+from utils.scoring import categorize_question
+
+QUESTION_MODEL = "gemini-2.0-flash"
+QUESTIONS_PER_SET = 5
+OPTION_LETTERS = ['A', 'B', 'C', 'D']
+
+MAX_GENERATION_ROUNDS = 3
+
+# Schema-constrained JSON output, so questions arrive as data rather than text
+QUESTION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "question": {"type": "string"},
+                "options": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["question", "options"],
+        },
+    },
+}
+
+def build_question_prompt(count=QUESTIONS_PER_SET, existing=()):
+    """Prompt for ``count`` questions, avoiding any already accepted."""
+    prompt = (
+        f"Generate exactly {count} multiple-choice questions about AI usage habits for students.\n"
+        "Each question should have exactly 4 answer options, ordered A-D, "
+        "without letter prefixes.\n"
+        'Return a JSON array of objects with keys "question" and "options".'
+    )
+    if existing:
+        prompt += "\nDo not repeat or rephrase these questions:\n" + "\n".join(
+            f"- {text}" for text in existing
+        )
+    return prompt
+
+
+_QUESTION_PREFIX_RE = re.compile(r"^\s*(?:\*\*)?\s*(?:\d+\s*[.)]\s*)?(?:Question\s*\d*\s*:\s*)?(?:\*\*)?\s*", re.IGNORECASE)
+_OPTION_PREFIX_RE = re.compile(r"^\s*(?:\(?[A-Da-d][.):]\s+)")
+
+
+def parse_questions(text):
+    """Parse the legacy line-based format into ``{'text', 'options'}`` dicts."""
+    questions = []
+    current_question = {}
+
+    for line in text.split('\n'):
+        line = line.strip()
+
+        # Looser check for "Question:" (handles "1. Question:" or "**Question:**")
+        if "Question:" in line:
+            if current_question and 'options' in current_question:
+                questions.append(current_question)
+
+            # Clean the text to remove "1. ", "**", etc.
+            clean_text = line.split("Question:", 1)[1].strip()
+            current_question = {
+                'text': clean_text,
+                'options': []
+            }
+
+        # Check if 'options' exists before appending
+        elif line and line[0] in OPTION_LETTERS:
+            if 'options' in current_question:
+                current_question['options'].append(line)
+
+    # Append the last question found
+    if current_question and 'options' in current_question:
+        questions.append(current_question)
+
+    return questions[:QUESTIONS_PER_SET]
+
+
+def is_valid_question_set(questions):
+    """True when every question has text and exactly one option per letter A-D."""
+    if len(questions) != QUESTIONS_PER_SET:
+        return False
+    for question in questions:
+        if not question.get('text'):
+            return False
+        letters = [opt[:1] for opt in question.get('options', [])]
+        if letters != OPTION_LETTERS:
+            return False
+    return True
+
+
+def repair_question(item):
+    """Normalize one generated question, or return None if it can't be salvaged.
+
+    Strips numbering and "Question:" prefixes, removes letter labels and
+    duplicate options, re-labels exactly four options A-D and assigns the
+    question's scoring category.
+    """
+    if not isinstance(item, dict):
+        return None
+    text = item.get('question', item.get('text'))
+    options = item.get('options')
+    if not isinstance(text, str) or not isinstance(options, list):
+        return None
+
+    text = _QUESTION_PREFIX_RE.sub("", text).strip().strip("*").strip()
+    cleaned = []
+    for option in options:
+        if not isinstance(option, str):
+            continue
+        option = _OPTION_PREFIX_RE.sub("", option).strip()
+        if option and option.lower() not in (o.lower() for o in cleaned):
+            cleaned.append(option)
+
+    if not text or len(cleaned) < len(OPTION_LETTERS):
+        return None
+    return {
+        'text': text,
+        'options': [f"{letter}. {option}" for letter, option in zip(OPTION_LETTERS, cleaned)],
+        # Decide the scoring rule once, here, rather than on every report render
+        'category': categorize_question(text),
+    }
+
+
+def parse_question_json(text):
+    """Return the repaired, valid questions found in a model response."""
+    try:
+        items = json.loads(text)
+    except (TypeError, ValueError):
+        # The model ignored the JSON contract; salvage what the line parser finds
+        items = [{'question': q['text'], 'options': q['options']} for q in parse_questions(text or "")]
+    if isinstance(items, dict):
+        items = items.get('questions', [items])
+    if not isinstance(items, list):
+        return []
+    return [q for q in (repair_question(item) for item in items) if q is not None]
+
+
+def generate_question_set(generate_fn, discard_fn=None, max_rounds=MAX_GENERATION_ROUNDS):
+    """Build a full question set, asking the model only for what's missing.
+
+    ``generate_fn(prompt)`` returns the raw model text. Invalid questions are
+    dropped individually and only the shortfall is requested in the next
+    round. ``discard_fn(prompt)`` is called for responses that yielded nothing
+    usable, so a cached bad response isn't served again.
+    """
+    questions = []
+    for _ in range(max_rounds):
+        missing = QUESTIONS_PER_SET - len(questions)
+        if missing <= 0:
+            break
+        prompt = build_question_prompt(missing, [q['text'] for q in questions])
+        accepted = 0
+        seen = {q['text'].lower() for q in questions}
+        for question in parse_question_json(generate_fn(prompt)):
+            if question['text'].lower() in seen:
+                continue
+            seen.add(question['text'].lower())
+            questions.append(question)
+            accepted += 1
+            if len(questions) == QUESTIONS_PER_SET:
+                break
+        if not accepted and discard_fn is not None:
+            discard_fn(prompt)
+    return questions
@@ -0,0 +1,130 @@
+"""Run Coding Challenge submissions against hidden tests in a sandbox.
+
+``CodeRunner`` keeps a pool of warm fork servers (``utils/sandbox_worker.py``,
+one interpreter each, started once with none of the app's environment). A
+submission is handed to an idle server, which forks a short-lived child to
+run it, so every submission starts from a clean interpreter without paying
+for a cold start. When every server is busy, submissions wait their turn. A
+server that dies is replaced.
+
+The child is jailed: its own mount, PID and network namespaces, an empty
+chroot, no privileges and CPU-time, memory, file-size and process limits, so
+it can't see the app's files, secrets or processes. It only reports what the
+function returned (plain numbers, or just the type of anything else), and
+the server checks the answers. Linux only; elsewhere every run reports that
+the hidden tests are unavailable.
+"""
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+
+CHALLENGE_FUNCTION = "calculate_average"
+# ``args`` is evaluated in the sandbox to build the call's arguments. An
+# empty list may return 0 or None, or raise ValueError, but must not crash
+HIDDEN_TESTS = [
+    {"name": "Whole numbers", "args": "([1, 2, 3, 4],)", "expected": 2.5},
+    {"name": "Single value", "args": "([7],)", "expected": 7},
+    {"name": "Negative numbers", "args": "([-2, 2, -3],)", "expected": -1},
+    {"name": "Floats", "args": "([0.1, 0.2, 0.3],)", "expected": 0.2},
+    {"name": "Empty list", "args": "([],)", "allowed": [0, None], "allowed_errors": ["ValueError"]},
+    {"name": "Large input (1,000,000 numbers)", "args": "(list(range(1000000)),)", "expected": 499999.5},
+]
+
+
+class _Worker:
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-I", WORKER_SCRIPT],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, bufsize=1,
+            # Nothing from the app's environment (API keys included) reaches the sandbox
+            env={"PATH": os.defpath},
+        )
+
+    def run(self, job):
+        self.process.stdin.write(json.dumps(job) + "\n")
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("sandbox worker exited")
+        return json.loads(line)
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+
+class CodeRunner:
+    def __init__(self, workers=4, cpu_seconds=2, memory_mb=256, test_seconds=1.0, wall_seconds=5.0,
+                 tests=HIDDEN_TESTS, function=CHALLENGE_FUNCTION):
+        self.size = workers
+        self.limits = {"cpu_seconds": cpu_seconds, "memory_mb": memory_mb,
+                       "test_seconds": test_seconds, "wall_seconds": wall_seconds}
+        self.tests = tests
+        self.function = function
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._stats = {"runs": 0, "restarts": 0, "total_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def start(self):
+        with self._lock:
+            if not self._started:
+                for _ in range(self.size):
+                    self._idle.put(_Worker())
+                self._started = True
+        return self
+
+    def run(self, code):
+        """Run ``code`` against the hidden tests and return the verdict.
+
+        The result has ``error`` (why the code couldn't be tested, or None),
+        ``tests`` (``name``, ``passed``, ``seconds`` and ``message`` per
+        test), ``passed``, ``total`` and ``seconds``.
+        """
+        job = dict(self.limits, code=code, tests=self.tests, function=self.function)
+        queued = time.monotonic()
+        worker = self._idle.get()
+        waited = time.monotonic() - queued
+        try:
+            result = worker.run(job)
+        except (OSError, RuntimeError, ValueError):
+            # The fork server itself died; replace it rather than reuse it
+            worker.close()
+            worker = _Worker()
+            with self._lock:
+                self._stats["restarts"] += 1
+            result = {"error": "The code runner was restarted. Please run your code again.",
+                      "tests": [], "seconds": 0.0}
+        finally:
+            self._idle.put(worker)
+        result["passed"] = sum(1 for test in result["tests"] if test["passed"])
+        result["total"] = len(self.tests)
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["total_seconds"] += result["seconds"]
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+        return result
+
+    def close(self):
+        with self._lock:
+            self._started = False
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_seconds"] = stats["total_seconds"] / stats["runs"] if stats["runs"] else None
+        stats["idle_workers"] = self._idle.qsize()
+        return stats
@@ -0,0 +1,203 @@
+"""Content pack for the AI Literacy Modules page.
+
+Each module is a TOML file under ``content/modules/`` (files are ordered by
+name). A pack is parsed and validated once, and every module's Markdown and
+resource cards are rendered to HTML at load time, so the page only emits
+ready-made fragments. ``ContentCatalog`` is shared by the whole server
+process and reloads the pack when a file is added, removed or modified; a
+pack that fails validation is reported and the last good one stays live.
+
+Module file fields:
+
+    key = "module1"              # unique, also used for progress tracking
+    button = "Short name"        # module selector label
+    title = "Module 1: ..."      # page header
+    summary = "One line"         # shown in the overview
+    body = \"\"\"Markdown\"\"\"
+    checklist = ["Task", ...]
+    [[resources]]                # any number of
+    title = "..."
+    description = "..."
+    link = "#"                   # optional
+"""
+import html
+import os
+import re
+import threading
+import time
+import tomllib
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "content", "modules")
+
+REQUIRED_FIELDS = {"key": str, "button": str, "title": str, "summary": str, "body": str, "checklist": list}
+
+
+class ContentError(ValueError):
+    pass
+
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+_INLINE_RULES = [
+    (re.compile(r"`([^`]+)`"), r"<code>\1</code>"),
+    (re.compile(r"\*\*(.+?)\*\*"), r"<strong>\1</strong>"),
+    (re.compile(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])"), r"<em>\1</em>"),
+    (re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)"), r'<a href="\2" target="_blank">\1</a>'),
+]
+
+
+def render_inline(text):
+    text = html.escape(text, quote=True)
+    for pattern, replacement in _INLINE_RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def render_markdown(text):
+    """Render the Markdown subset used by content packs: headings, paragraphs,
+    bullet lists, bold, italics, inline code and links."""
+    blocks, paragraph, items = [], [], []
+
+    def flush():
+        if paragraph:
+            blocks.append(f"<p>{' '.join(paragraph)}</p>")
+            paragraph.clear()
+        if items:
+            blocks.append("<ul>" + "".join(f"<li>{item}</li>" for item in items) + "</ul>")
+            items.clear()
+
+    for line in text.strip().splitlines():
+        stripped = line.strip()
+        heading = _HEADING_RE.match(stripped)
+        if not stripped:
+            flush()
+        elif stripped[:2] in ("- ", "* "):
+            if paragraph:
+                blocks.append(f"<p>{' '.join(paragraph)}</p>")
+                paragraph.clear()
+            items.append(render_inline(stripped[2:]))
+        elif heading:
+            flush()
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{render_inline(heading.group(2))}</h{level}>")
+        else:
+            if items:
+                flush()
+            paragraph.append(render_inline(stripped))
+    flush()
+    return "\n".join(blocks)
+
+
+def render_resource(resource):
+    link = resource.get("link")
+    link_html = (
+        f"<a href='{html.escape(link, quote=True)}' target='_blank'>Resource will be here!</a>" if link else ""
+    )
+    return (
+        f'<div class="resource-card"><h4>{html.escape(resource["title"])}</h4>'
+        f'<p>{html.escape(resource["description"])}</p>{link_html}</div>'
+    )
+
+
+def compile_module(data, source):
+    """Validate one parsed module file and pre-render its HTML."""
+    for field, kind in REQUIRED_FIELDS.items():
+        if not isinstance(data.get(field), kind):
+            raise ContentError(f"{source}: '{field}' must be a {kind.__name__}")
+    if not data["checklist"] or not all(isinstance(item, str) for item in data["checklist"]):
+        raise ContentError(f"{source}: 'checklist' must be a non-empty list of strings")
+    resources = data.get("resources", [])
+    if not isinstance(resources, list):
+        raise ContentError(f"{source}: 'resources' must be an array of tables ([[resources]])")
+    for resource in resources:
+        if (not isinstance(resource, dict) or not isinstance(resource.get("title"), str)
+                or not isinstance(resource.get("description"), str)):
+            raise ContentError(f"{source}: every resource needs a 'title' and a 'description'")
+        if not isinstance(resource.get("link", ""), str):
+            raise ContentError(f"{source}: a resource 'link' must be a string")
+    return {
+        "key": data["key"],
+        "button": data["button"],
+        "title": data["title"],
+        "summary": data["summary"],
+        "checklist": list(data["checklist"]),
+        "body_html": render_markdown(data["body"]),
+        "resources_html": [render_resource(resource) for resource in resources],
+    }
+
+
+def load_pack(directory):
+    """Parse and compile every module file in ``directory``, in file name order."""
+    modules = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".toml"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        except (tomllib.TOMLDecodeError, UnicodeDecodeError) as exc:
+            raise ContentError(f"{name}: {exc}") from exc
+        modules.append(compile_module(data, name))
+    keys = [module["key"] for module in modules]
+    duplicates = sorted({key for key in keys if keys.count(key) > 1})
+    if duplicates:
+        raise ContentError(f"duplicate module keys: {', '.join(duplicates)}")
+    overview = render_markdown("\n".join(f"- **{m['button']}**: {m['summary']}" for m in modules))
+    return {"modules": modules, "by_key": dict(zip(keys, modules)), "overview_html": overview}
+
+
+class ContentCatalog:
+    def __init__(self, directory=CONTENT_DIR, check_interval=2.0):
+        self.directory = directory
+        self.check_interval = check_interval
+        self.error = None  # why the latest reload failed, if it did
+        self._pack = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh(force=True)
+
+    def _file_signature(self):
+        signature = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".toml"):
+                stat = os.stat(os.path.join(self.directory, name))
+                signature.append((name, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _refresh(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            signature = None
+            try:
+                signature = self._file_signature()
+                if signature == self._signature:
+                    return
+                pack = load_pack(self.directory)
+            except (ContentError, OSError) as exc:
+                if self._pack is None:
+                    raise
+                self.error = str(exc)
+                if isinstance(exc, ContentError):
+                    # Don't re-parse a broken pack until a file changes; a
+                    # read error (say a file removed mid-scan) is retried
+                    self._signature = signature
+                return
+            self._pack, self.error, self._signature = pack, None, signature
+
+    @property
+    def modules(self):
+        self._refresh()
+        return self._pack["modules"]
+
+    @property
+    def overview_html(self):
+        self._refresh()
+        return self._pack["overview_html"]
+
+    def get(self, key):
+        self._refresh()
+        return self._pack["by_key"].get(key)
@@ -0,0 +1,111 @@
+"""Write-behind counters.
+
+Increments land in one of several in-memory shards (each thread sticks to
+its own shard, so concurrent increments rarely share a lock) and a background
+flusher periodically drains every shard, aggregates the deltas per key and
+hands them to ``apply_fn`` in a single batch. A hot counter therefore costs
+one dict update per increment and one database write per flush, and
+``pending()`` lets readers add unflushed deltas to the durable value, so
+counts are never more than one flush interval behind.
+"""
+import atexit
+import itertools
+import threading
+import time
+from collections import Counter
+
+
+class _Shard:
+    __slots__ = ("lock", "deltas")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deltas = Counter()
+
+
+class WriteBehindCounters:
+    def __init__(self, apply_fn, shards=16, flush_interval=0.5):
+        self.apply_fn = apply_fn
+        self.flush_interval = flush_interval
+        self._shards = [_Shard() for _ in range(shards)]
+        self._next_shard = itertools.count()
+        self._local = threading.local()
+        self._inflight = Counter()  # drained but not yet applied
+        self._flush_lock = threading.Lock()
+        self.flushes = 0
+        self.applied = 0
+        self.failures = 0
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="counter-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = self._shards[next(self._next_shard) % len(self._shards)]
+        return shard
+
+    def add(self, key, amount=1):
+        shard = self._shard()
+        with shard.lock:
+            shard.deltas[key] += amount
+
+    def pending(self, key):
+        """Increments for ``key`` not yet applied to durable storage."""
+        # Lock-free reads: a count may be momentarily off by an in-progress add
+        total = self._inflight.get(key, 0)
+        for shard in self._shards:
+            total += shard.deltas.get(key, 0)
+        return total
+
+    def pending_prefix(self, prefix):
+        """Unapplied increments summed over every tuple key starting with ``prefix``."""
+        total = sum(delta for key, delta in self._inflight.items() if key[:len(prefix)] == prefix)
+        for shard in self._shards:
+            # Iterating (unlike a lookup) needs the shard to hold still
+            with shard.lock:
+                total += sum(delta for key, delta in shard.deltas.items() if key[:len(prefix)] == prefix)
+        return total
+
+    def flush(self):
+        """Apply every buffered delta now; returns the number of keys written."""
+        with self._flush_lock:
+            batch = Counter()
+            for shard in self._shards:
+                with shard.lock:
+                    deltas, shard.deltas = shard.deltas, Counter()
+                batch.update(deltas)
+            batch = Counter({key: delta for key, delta in batch.items() if delta})
+            if not batch:
+                return 0
+            self._inflight = batch
+            try:
+                self.apply_fn(dict(batch))
+            except Exception:
+                # Put the deltas back so the next flush retries them
+                self.failures += 1
+                with self._shards[0].lock:
+                    self._shards[0].deltas.update(batch)
+                raise
+            finally:
+                self._inflight = Counter()
+            self.flushes += 1
+            self.applied += len(batch)
+            return len(batch)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                time.sleep(self.flush_interval)
+
+    def stats(self):
+        return {
+            "flushes": self.flushes,
+            "keys_applied": self.applied,
+            "failures": self.failures,
+            "buffered_keys": sum(len(shard.deltas) for shard in self._shards),
+        }
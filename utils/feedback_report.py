@@ -0,0 +1,40 @@
+"""Helpers for the five-section personalized feedback report."""
+import re
+
+REPORT_SECTIONS = [
+    "Usage Patterns Analysis",
+    "Strengths in AI Utilization",
+    "Areas for Improvement",
+    "Recommended Strategies",
+    "Suggested Tools and Resources",
+]
+
+# Matches headings such as "1. Usage...", "## 2) Strengths..." or "**3. Areas...**"
+_HEADING_RE = re.compile(r"^\s*(?:#+\s*)?(?:\*\*)?\s*([1-5])\s*[.)]\s*(?:\*\*)?\s*(.*)$")
+
+
+def _heading_index(line, expected):
+    match = _HEADING_RE.match(line)
+    if not match or int(match.group(1)) != expected + 1:
+        return None
+    # Require the section's leading word so numbered lists inside a section
+    # (e.g. "5. Try summarising first") are not mistaken for the next heading.
+    keyword = REPORT_SECTIONS[expected].split()[0].lower()
+    if keyword not in match.group(2).lower():
+        return None
+    return expected
+
+
+def split_sections(text):
+    """Split report text into ``[preamble, section 1, ..., section n]``.
+
+    Works on partial text, so it can be called on every streamed chunk; the
+    last element is the section still being written.
+    """
+    parts = [[]]
+    for line in text.splitlines(keepends=True):
+        next_section = len(parts) - 1
+        if next_section < len(REPORT_SECTIONS) and _heading_index(line, next_section) is not None:
+            parts.append([])
+        parts[-1].append(line)
+    return ["".join(part) for part in parts]
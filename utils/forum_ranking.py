@@ -0,0 +1,102 @@
+"""Ranked forum feeds: hot, top and unanswered.
+
+Each feed keeps its posts as ``(score, post_id)`` keys in a sorted list, so
+the best ``k`` are the last ``k`` keys and later pages are a bisect away.
+Scores are recomputed for one post when its counters or answers change,
+never for the whole feed. The hot score follows Reddit's formula: the log of
+the post's votes (or saves) plus its age bonus, so newer posts outrank older
+ones with ten times fewer votes every 12.5 hours. Because the age bonus is
+fixed at posting time, hot scores never need recomputing as time passes.
+"""
+import bisect
+import math
+import threading
+
+HOT_EPOCH = 1735689600  # 2025-01-01 UTC
+HOT_HALF_LIFE = 45000  # seconds of age worth one order of magnitude of votes
+FEEDS = {
+    "question": ("hot", "top", "unanswered"),
+    "resource": ("hot", "top"),
+}
+
+
+def popularity(post):
+    return post.votes if post.type == "question" else post.saves
+
+
+def hot_score(count, created_at):
+    order = math.log10(max(abs(count), 1))
+    sign = 1 if count > 0 else -1 if count < 0 else 0
+    return round(sign * order + (created_at - HOT_EPOCH) / HOT_HALF_LIFE, 7)
+
+
+class RankedFeed:
+    """Posts ordered by score, best last; updates move a single key."""
+
+    def __init__(self):
+        self._keys = []  # sorted (score, post_id)
+        self._scores = {}  # post_id -> score
+
+    def __len__(self):
+        return len(self._keys)
+
+    def update(self, post_id, score):
+        old = self._scores.get(post_id)
+        if old == score:
+            return False
+        if old is not None:
+            del self._keys[bisect.bisect_left(self._keys, (old, post_id))]
+        bisect.insort(self._keys, (score, post_id))
+        self._scores[post_id] = score
+        return True
+
+    def remove(self, post_id):
+        old = self._scores.pop(post_id, None)
+        if old is None:
+            return False
+        del self._keys[bisect.bisect_left(self._keys, (old, post_id))]
+        return True
+
+    def page(self, limit, before=None):
+        """Post IDs best first, and a cursor for the next page (None at the end)."""
+        end = len(self._keys) if before is None else bisect.bisect_left(self._keys, tuple(before))
+        keys = self._keys[max(0, end - limit):end][::-1]
+        return [post_id for _, post_id in keys], (keys[-1] if keys and end > limit else None)
+
+
+class ForumRankings:
+    def __init__(self):
+        self._feeds = {
+            (post_type, feed): RankedFeed() for post_type, feeds in FEEDS.items() for feed in feeds
+        }
+        self._cache = {}  # (post_type, feed, limit, before) -> page
+        self._lock = threading.Lock()
+
+    def _score(self, post, feed):
+        if feed == "hot":
+            return hot_score(popularity(post), post.created_at)
+        if feed == "top":
+            return popularity(post)
+        # Unanswered: newest first
+        return post.created_at
+
+    def update(self, post):
+        """(Re)score a new post or one whose counters or answers changed."""
+        changed = False
+        with self._lock:
+            for feed in FEEDS.get(post.type, ()):
+                ranked = self._feeds[(post.type, feed)]
+                if feed == "unanswered" and len(post.answers):
+                    changed |= ranked.remove(post.id)
+                else:
+                    changed |= ranked.update(post.id, self._score(post, feed))
+            if changed:
+                self._cache.clear()
+
+    def page(self, post_type, feed, limit=10, before=None):
+        key = (post_type, feed, limit, tuple(before) if before else None)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                cached = self._cache[key] = self._feeds[(post_type, feed)].page(limit, before)
+            return cached
@@ -0,0 +1,143 @@
+"""Compact in-memory records for forum posts and replies.
+
+Posts are slotted objects rather than dicts. Timestamps are integers and are
+formatted only when displayed. Tags and categories come from the fixed lists
+offered by the forms, so a post stores them as a bitmask of tag IDs. Replies
+are kept column-wise: one list of authors, one of contents and an ``array`` of
+timestamps per post, instead of one dict per reply.
+"""
+import sys
+from array import array
+from datetime import datetime
+
+INSIGHT_CATEGORIES = ["Writing", "Research", "Coding", "Ethics", "Productivity", "Other"]
+QUESTION_TAGS = ["ChatGPT", "Grammarly", "Research", "Coding", "Troubleshooting", "Other"]
+RESOURCE_TYPES = ["Article", "Tool", "Research Paper", "Tutorial", "Event", "News", "Other"]
+
+# Tag ID = position in this list; tags not in the form lists are appended on first use
+TAG_VOCABULARY = list(dict.fromkeys(INSIGHT_CATEGORIES + QUESTION_TAGS))
+_TAG_IDS = {name: idx for idx, name in enumerate(TAG_VOCABULARY)}
+
+
+def format_date(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+def tag_mask(names):
+    mask = 0
+    for name in names:
+        tag_id = _TAG_IDS.get(name)
+        if tag_id is None:
+            tag_id = _TAG_IDS[name] = len(TAG_VOCABULARY)
+            TAG_VOCABULARY.append(name)
+        mask |= 1 << tag_id
+    return mask
+
+
+def tag_names(mask):
+    return [name for idx, name in enumerate(TAG_VOCABULARY) if mask >> idx & 1]
+
+
+class Reply:
+    __slots__ = ("author", "content", "created_at")
+
+    def __init__(self, author, content, created_at):
+        self.author = author
+        self.content = content
+        self.created_at = created_at
+
+    @property
+    def date(self):
+        return format_date(self.created_at)
+
+
+class ReplyList:
+    """Append-only replies stored column-wise; iterating yields ``Reply`` views."""
+
+    __slots__ = ("authors", "contents", "created")
+
+    def __init__(self):
+        self.authors = []
+        self.contents = []
+        self.created = array("q")
+
+    def append(self, author, content, created_at):
+        self.authors.append(sys.intern(author))
+        self.contents.append(content)
+        self.created.append(created_at)
+
+    def __len__(self):
+        return len(self.created)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(map(Reply, self.authors[index], self.contents[index], self.created[index]))
+        return Reply(self.authors[index], self.contents[index], self.created[index])
+
+    def __iter__(self):
+        return map(Reply, self.authors, self.contents, self.created)
+
+
+class _NoReplies:
+    """Shared stand-in for the (many) posts that have no replies yet."""
+
+    __slots__ = ()
+
+    def __len__(self):
+        return 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return []
+        raise IndexError(index)
+
+    def __iter__(self):
+        return iter(())
+
+
+NO_REPLIES = _NoReplies()
+
+
+class Post:
+    __slots__ = ("id", "type", "title", "content", "author", "created_at", "tag_mask",
+                 "resource_type", "url", "votes", "saves", "comments", "answers")
+
+    def __init__(self, id, type, title, content, author, created_at, tags=(),
+                 resource_type=None, url=None, votes=0, saves=0):
+        self.id = id
+        self.type = sys.intern(type)
+        self.title = title
+        self.content = content
+        self.author = sys.intern(author)
+        self.created_at = created_at
+        self.tag_mask = tag_mask(tags)
+        self.resource_type = sys.intern(resource_type) if resource_type else None
+        self.url = url or None
+        self.votes = votes
+        self.saves = saves
+        self.comments = NO_REPLIES
+        self.answers = NO_REPLIES
+
+    @property
+    def date(self):
+        return format_date(self.created_at)
+
+    @property
+    def tags(self):
+        return tag_names(self.tag_mask)
+
+    # Insights call their tags categories
+    categories = tags
+
+    @property
+    def description(self):
+        return self.content
+
+    def add_reply(self, kind, author, content, created_at):
+        """Append a comment or answer (``kind`` is "comments" or "answers") and return it."""
+        replies = getattr(self, kind)
+        if replies is NO_REPLIES:
+            replies = ReplyList()
+            setattr(self, kind, replies)
+        replies.append(author, content, created_at)
+        return replies[-1]
@@ -0,0 +1,124 @@
+"""Full-text search over forum posts.
+
+An inverted index maps each term to a posting list of ``{post_id: weighted
+term frequency}``, and results are ranked with BM25. Titles count more than
+body text, and answers and comments are indexed into their post's document as
+they arrive. Facet fields (post type, categories, tags, resource type) keep a
+posting set per value, so filters are set intersections. Everything is
+updated incrementally; nothing is ever rebuilt.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how i in is it of on or that the this to was what when "
+    "with you your my do does can".split()
+)
+TITLE_WEIGHT = 3
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    def __init__(self):
+        self._postings = defaultdict(dict)  # term -> {post_id: weighted tf}
+        self._lengths = {}  # post_id -> document length
+        self._total_length = 0
+        self._facets = defaultdict(lambda: defaultdict(set))  # field -> value -> post ids
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def _add_terms(self, post_id, terms):
+        for term, count in terms.items():
+            postings = self._postings[term]
+            postings[post_id] = postings.get(post_id, 0) + count
+        added = sum(terms.values())
+        self._lengths[post_id] = self._lengths.get(post_id, 0) + added
+        self._total_length += added
+
+    def add_post(self, post_id, title, content, facets=None):
+        """Index a new post. ``facets`` maps field name to a value or list of values."""
+        terms = Counter(tokenize(content))
+        for token in tokenize(title):
+            terms[token] += TITLE_WEIGHT
+        with self._lock:
+            self._add_terms(post_id, terms)
+            for field, values in (facets or {}).items():
+                if isinstance(values, str):
+                    values = [values]
+                for value in values or ():
+                    self._facets[field][value].add(post_id)
+
+    def add_text(self, post_id, text):
+        """Fold a comment or answer into its post's document."""
+        with self._lock:
+            if post_id in self._lengths:
+                self._add_terms(post_id, Counter(tokenize(text)))
+
+    def facet_counts(self, field, filters=None):
+        """Number of posts per value of ``field`` among posts matching ``filters``."""
+        with self._lock:
+            values = self._facets.get(field, {})
+            allowed = self._filter(filters or {})
+            if allowed is None:
+                return {value: len(ids) for value, ids in values.items()}
+            return {value: len(ids & allowed) for value, ids in values.items()}
+
+    def _filter(self, filters):
+        # Values within a field are alternatives (OR); fields combine with AND
+        allowed = None
+        for field, values in filters.items():
+            if not values:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            index = self._facets.get(field, {})
+            matched = set().union(*(index.get(value, set()) for value in values))
+            allowed = matched if allowed is None else allowed & matched
+            if not allowed:
+                break
+        return allowed
+
+    def search(self, query, filters=None, limit=20):
+        """Return up to ``limit`` ``(post_id, score)`` pairs, best first.
+
+        With no query terms, matching posts come back newest (highest ID) first.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            allowed = self._filter(filters or {})
+            if allowed is not None and not allowed:
+                return []
+            if not terms:
+                ids = allowed if allowed is not None else self._lengths.keys()
+                return [(post_id, 0.0) for post_id in heapq.nlargest(limit, ids)]
+
+            n_docs = len(self._lengths)
+            avg_length = self._total_length / n_docs if n_docs else 1.0
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                # Walk whichever side is smaller: the posting list or the filter
+                if allowed is not None and len(allowed) < len(postings):
+                    matches = ((post_id, postings[post_id]) for post_id in allowed if post_id in postings)
+                else:
+                    matches = postings.items()
+                for post_id, tf in matches:
+                    if allowed is not None and post_id not in allowed:
+                        continue
+                    norm = K1 * (1 - B + B * self._lengths[post_id] / avg_length)
+                    scores[post_id] += idf * tf * (K1 + 1) / (tf + norm)
+            return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
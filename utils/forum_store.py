@@ -0,0 +1,444 @@
+"""Shared storage for the Community Forum.
+
+Posts, comments and answers live in normalized SQLite tables shared by every
+session and server process. Connections come from a small pool and every
+write is a single transaction. Reads are served from in-memory indexes, so
+rendering a feed doesn't touch the database once per widget.
+"""
+import bisect
+import json
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+
+from utils.counters import WriteBehindCounters
+from utils.forum_records import Post
+from utils.forum_ranking import ForumRankings
+from utils.forum_search import SearchIndex
+from utils.near_duplicates import NearDuplicateIndex
+from utils.storage import connect, data_path
+
+POST_TYPES = ("insight", "question", "resource")
+MAX_TRACKED_VOTERS = 10000
+CHANGE_BUFFER_SIZE = 10000
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared across threads."""
+
+    def __init__(self, path, size=4):
+        self._connections = queue.Queue()
+        for _ in range(size):
+            self._connections.put(connect(path))
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    author TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    categories TEXT NOT NULL DEFAULT '[]',
+    tags TEXT NOT NULL DEFAULT '[]',
+    resource_type TEXT,
+    url TEXT,
+    votes INTEGER NOT NULL DEFAULT 0,
+    saves INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_posts_type_date ON posts(type, created_at, id);
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id INTEGER NOT NULL REFERENCES posts(id),
+    author TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_comments_post ON comments(post_id, id);
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id INTEGER NOT NULL REFERENCES posts(id),
+    author TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_answers_post ON answers(post_id, id);
+CREATE TABLE IF NOT EXISTS post_votes (
+    post_id INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    PRIMARY KEY (post_id, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS forum_changes (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,  -- 'post', 'comments', 'answers' or 'counters'
+    post_id INTEGER NOT NULL,
+    row_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_forum_changes_kind_post ON forum_changes(kind, post_id);
+"""
+
+
+class ForumStore:
+    """Forum posts backed by SQLite, served from in-memory indexes.
+
+    Every post is held in an ID -> post map, and each post type has a
+    secondary index of ``(created_at, id)`` keys kept in date order, so a feed
+    page is a bisect plus a slice however many posts exist. Writes go to the
+    database together with an entry in a change log, whose row ID is the
+    forum's version. Every process (including the writer) applies new log
+    entries to its indexes, full-text search index included, so posts,
+    replies and counts from other server processes appear incrementally, and
+    ``changes_since()`` can hand sessions just the deltas after a version.
+
+    Votes and saves go through write-behind counters and reach the database
+    in batched deltas; a user's vote is recorded at most once per post.
+    """
+
+    def __init__(self, path=None, pool_size=4, sync_seconds=2.0, counter_flush_interval=0.5):
+        self.pool = ConnectionPool(path or data_path("forum.sqlite3"), pool_size)
+        self.sync_seconds = sync_seconds
+        self._posts = {}  # id -> post
+        self._by_type = {post_type: [] for post_type in POST_TYPES}  # sorted (created_at, id)
+        self.search_index = SearchIndex()
+        self.duplicate_index = NearDuplicateIndex()
+        self.rankings = ForumRankings()
+        self._voters = OrderedDict()  # user_id -> post ids they voted for (recently active users)
+        # Recent change log entries, (version, kind, post_id, reply), for changes_since()
+        self._changes = deque(maxlen=CHANGE_BUFFER_SIZE)
+        self._changes_floor = 0  # changes_since() can answer for any version >= this
+        self.version = 0
+        self._synced_at = 0.0
+        self._lock = threading.RLock()
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+        with self.pool.transaction() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+                # One-time cleanup of logs written before counters entries
+                # were coalesced; later startups skip it
+                conn.execute(
+                    "DELETE FROM forum_changes WHERE kind = 'counters' AND version NOT IN "
+                    "(SELECT MAX(version) FROM forum_changes WHERE kind = 'counters' GROUP BY post_id)"
+                )
+                conn.execute("PRAGMA user_version = 1")
+        self._load()
+        self.counters = WriteBehindCounters(self._apply_counters, flush_interval=counter_flush_interval)
+
+    def _load(self):
+        with self.pool.connection() as conn:
+            # One read transaction, so the snapshot and its version agree
+            conn.execute("BEGIN")
+            try:
+                self.version = self._changes_floor = conn.execute(
+                    "SELECT COALESCE(MAX(version), 0) FROM forum_changes"
+                ).fetchone()[0]
+                for row in conn.execute("SELECT * FROM posts ORDER BY id"):
+                    self._index_post(self._row_to_post(row))
+                for table in ("comments", "answers"):
+                    for row in conn.execute(f"SELECT * FROM {table} ORDER BY id"):
+                        self._index_reply(table, row)
+            finally:
+                conn.execute("COMMIT")
+
+    def _sync(self, force=False):
+        """Apply change log entries written since our version, by any process."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._synced_at < self.sync_seconds:
+                return
+            self._synced_at = now
+            with self.pool.connection() as conn:
+                # One read transaction, bounded by the version it starts at,
+                # so a change committed meanwhile is applied once, next time
+                conn.execute("BEGIN")
+                try:
+                    latest = conn.execute("SELECT COALESCE(MAX(version), 0) FROM forum_changes").fetchone()[0]
+                    if latest <= self.version:
+                        return
+                    span = (self.version, latest)
+                    changes = [
+                        (row["version"], "post", row) for row in conn.execute(
+                            "SELECT c.version, p.* FROM forum_changes c JOIN posts p ON p.id = c.post_id "
+                            "WHERE c.version > ? AND c.version <= ? AND c.kind = 'post'", span
+                        )
+                    ]
+                    for table in ("comments", "answers"):
+                        changes += [
+                            (row["version"], table, row) for row in conn.execute(
+                                f"SELECT c.version, r.* FROM forum_changes c JOIN {table} r ON r.id = c.row_id "
+                                f"WHERE c.version > ? AND c.version <= ? AND c.kind = ?", span + (table,)
+                            )
+                        ]
+                    changes += [
+                        (row["version"], "counters", row) for row in conn.execute(
+                            "SELECT c.version, p.id, p.votes, p.saves FROM forum_changes c "
+                            "JOIN posts p ON p.id = c.post_id "
+                            "WHERE c.version > ? AND c.version <= ? AND c.kind = 'counters'", span
+                        )
+                    ]
+                finally:
+                    conn.execute("COMMIT")
+            for version, kind, row in sorted(changes, key=lambda change: change[0]):
+                reply = None
+                if kind == "post":
+                    post_id = row["id"]
+                    if post_id not in self._posts:
+                        self._index_post(self._row_to_post(row))
+                elif kind == "counters":
+                    post_id = row["id"]
+                    if post_id in self._posts:
+                        self._posts[post_id].votes = row["votes"]
+                        self._posts[post_id].saves = row["saves"]
+                        self.rankings.update(self._posts[post_id])
+                else:
+                    post_id = row["post_id"]
+                    reply = self._index_reply(kind, row)
+                if len(self._changes) == self._changes.maxlen:
+                    self._changes_floor = self._changes[0][0]
+                self._changes.append((version, kind, post_id, reply))
+            self.version = latest
+
+    def _index_post(self, post):
+        self._posts[post.id] = post
+        bisect.insort(self._by_type[post.type], (post.created_at, post.id))
+        # Insights are filtered by category, questions by tag
+        tag_field = "categories" if post.type == "insight" else "tags"
+        self.search_index.add_post(post.id, post.title, post.content, facets={
+            "type": post.type,
+            tag_field: post.tags,
+            "resource_type": post.resource_type,
+        })
+        if post.type == "question":
+            self.duplicate_index.add(post.id, f"{post.title} {post.content}")
+        self.rankings.update(post)
+
+    def _index_reply(self, table, row):
+        post = self._posts.get(row["post_id"])
+        if post is None:
+            return None
+        reply = post.add_reply(table, row["author"], row["content"], row["created_at"])
+        self.search_index.add_text(post.id, row["content"])
+        if table == "answers" and len(post.answers) == 1:
+            self.rankings.update(post)
+        return reply
+
+    def add_post(self, post_type, title, content, author, categories=(), tags=(),
+                 resource_type=None, url=None):
+        if post_type not in POST_TYPES:
+            raise ValueError(f"unknown post type: {post_type}")
+        with self.pool.transaction() as conn:
+            cur = conn.execute(
+                "INSERT INTO posts (type, title, content, author, created_at, categories, tags, "
+                "resource_type, url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (post_type, title, content, author, int(time.time()),
+                 json.dumps(list(categories)), json.dumps(list(tags)), resource_type, url),
+            )
+            conn.execute("INSERT INTO forum_changes (kind, post_id) VALUES ('post', ?)", (cur.lastrowid,))
+        self._sync(force=True)
+        return cur.lastrowid
+
+    def _add_reply(self, table, post_id, author, content):
+        with self.pool.transaction() as conn:
+            cur = conn.execute(
+                f"INSERT INTO {table} (post_id, author, content, created_at) VALUES (?, ?, ?, ?)",
+                (post_id, author, content, int(time.time())),
+            )
+            conn.execute(
+                "INSERT INTO forum_changes (kind, post_id, row_id) VALUES (?, ?, ?)",
+                (table, post_id, cur.lastrowid),
+            )
+        self._sync(force=True)
+
+    def add_comment(self, post_id, author, content):
+        self._add_reply("comments", post_id, author, content)
+
+    def add_answer(self, post_id, author, content):
+        self._add_reply("answers", post_id, author, content)
+
+    def current_version(self):
+        self._sync()
+        return self.version
+
+    def changes_since(self, version):
+        """Everything that changed after ``version``, or None if it is too old to diff.
+
+        Returns a dict with the current ``version``, new ``posts``, new
+        ``comments`` and ``answers`` as ``(post_id, reply)`` pairs, and
+        ``counters`` mapping post ID to its latest votes and saves. When
+        nothing has changed this is a timestamp check and an empty result.
+        """
+        self._sync()
+        with self._lock:
+            if version < self._changes_floor:
+                return None
+            delta = {"version": self.version, "posts": [], "comments": [], "answers": [], "counters": {}}
+            for change_version, kind, post_id, reply in reversed(self._changes):
+                if change_version <= version:
+                    break
+                if kind == "post":
+                    delta["posts"].append(self._posts[post_id])
+                elif kind == "counters":
+                    delta["counters"].setdefault(post_id, None)
+                else:
+                    delta[kind].append((post_id, reply))
+            for key in ("posts", "comments", "answers"):
+                delta[key].reverse()
+        for post_id in delta["counters"]:
+            delta["counters"][post_id] = {
+                "votes": self.counter(post_id, "votes"),
+                "saves": self.counter(post_id, "saves"),
+            }
+        return delta
+
+    def vote(self, post_id, user_id):
+        """Upvote a post once per user; returns False if they already had."""
+        voted = self._voted_posts(user_id)
+        with self._lock:
+            # Checked and recorded together, so a double-click counts once
+            if post_id in voted:
+                return False
+            voted.add(post_id)
+            # One key for both the voter and the vote, so a flush never
+            # applies one without the other
+            self.counters.add(("vote", post_id, user_id))
+        return True
+
+    def save(self, post_id):
+        self.counters.add(("saves", post_id))
+
+    def has_voted(self, post_id, user_id):
+        return post_id in self._voted_posts(user_id)
+
+    def counter(self, post_id, field):
+        """Durable count plus this process's unflushed increments."""
+        post = self._posts.get(post_id)
+        durable = getattr(post, field) if post else 0
+        if field == "votes":
+            return durable + self.counters.pending_prefix(("vote", post_id))
+        return durable + self.counters.pending((field, post_id))
+
+    def _voted_posts(self, user_id):
+        with self._lock:
+            voted = self._voters.get(user_id)
+            if voted is not None:
+                self._voters.move_to_end(user_id)
+                return voted
+        with self.pool.connection() as conn:
+            voted = {row[0] for row in conn.execute(
+                "SELECT post_id FROM post_votes WHERE user_id = ?", (user_id,)
+            )}
+        with self._lock:
+            voted = self._voters.setdefault(user_id, voted)
+            while len(self._voters) > MAX_TRACKED_VOTERS:
+                self._voters.popitem(last=False)
+        return voted
+
+    def _apply_counters(self, deltas):
+        """Write one flush of aggregated counter deltas in a single transaction."""
+        totals = Counter()
+        with self.pool.transaction() as conn:
+            for key, amount in deltas.items():
+                if key[0] == "vote":
+                    cur = conn.execute(
+                        "INSERT OR IGNORE INTO post_votes (post_id, user_id) VALUES (?, ?)", key[1:]
+                    )
+                    # Each (post, user) pair adds at most one vote, however many
+                    # times it was queued (a set reloaded after eviction can miss
+                    # an unflushed vote) or if it was already cast through
+                    # another server process
+                    totals[("votes", key[1])] += cur.rowcount
+                else:
+                    totals[key] += amount
+            for field in ("votes", "saves"):
+                conn.executemany(
+                    f"UPDATE posts SET {field} = {field} + ? WHERE id = ?",
+                    [(amount, post_id) for (name, post_id), amount in totals.items()
+                     if name == field and amount],
+                )
+            # A counters entry carries no delta, only "re-read this post's
+            # counts", so each post keeps just its newest one
+            changed = [(post_id,) for post_id in sorted({post_id for _, post_id in totals})]
+            conn.executemany("DELETE FROM forum_changes WHERE kind = 'counters' AND post_id = ?", changed)
+            conn.executemany("INSERT INTO forum_changes (kind, post_id) VALUES ('counters', ?)", changed)
+        # Pick up the new durable values before the flushed deltas stop counting as pending
+        self._sync(force=True)
+
+    def replies(self, post_id, kind, offset=0, limit=10):
+        """One page of a post's comments or answers (``kind``), oldest first."""
+        post = self._posts.get(post_id)
+        if post is None:
+            return []
+        return getattr(post, kind)[offset:offset + limit]
+
+    def get(self, post_id):
+        self._sync()
+        return self._posts.get(post_id)
+
+    def count(self, post_type):
+        self._sync()
+        return len(self._by_type[post_type])
+
+    def page(self, post_type, limit=10, before=None):
+        """Return ``(posts, cursor)``: up to ``limit`` posts of one type, newest first.
+
+        Pass the returned cursor as ``before`` to fetch the next older page;
+        it is None when there are no older posts.
+        """
+        self._sync()
+        with self._lock:
+            index = self._by_type[post_type]
+            end = len(index) if before is None else bisect.bisect_left(index, tuple(before))
+            keys = index[max(0, end - limit):end][::-1]
+            posts = [self._posts[post_id] for _, post_id in keys]
+        cursor = keys[-1] if keys and end > limit else None
+        return posts, cursor
+
+    def ranked_page(self, post_type, feed, limit=10, before=None):
+        """Like ``page()``, for the "hot", "top" or "unanswered" feed of a post type."""
+        self._sync()
+        post_ids, cursor = self.rankings.page(post_type, feed, limit, before)
+        with self._lock:
+            return [self._posts[post_id] for post_id in post_ids], cursor
+
+    def search(self, post_type, query="", filters=None, limit=10):
+        """Best matches for ``query`` among posts of one type that match every facet filter."""
+        self._sync()
+        filters = dict(filters or {}, type=post_type)
+        results = self.search_index.search(query, filters, limit)
+        with self._lock:
+            return [self._posts[post_id] for post_id, _ in results]
+
+    def similar_questions(self, title, content, limit=3):
+        """Existing questions that look like near-duplicates, as ``(post, similarity)`` pairs."""
+        self._sync()
+        matches = self.duplicate_index.query(f"{title} {content}", limit=limit)
+        return [(self._posts[post_id], similarity) for post_id, similarity in matches]
+
+    def facet_counts(self, post_type, field):
+        self._sync()
+        return self.search_index.facet_counts(field, {"type": post_type})
+
+    @staticmethod
+    def _row_to_post(row):
+        return Post(
+            row["id"], row["type"], row["title"], row["content"], row["author"], row["created_at"],
+            tags=json.loads(row["categories"]) + json.loads(row["tags"]),
+            resource_type=row["resource_type"], url=row["url"],
+            votes=row["votes"], saves=row["saves"],
+        )
@@ -0,0 +1,217 @@
+"""Process-wide gateway for every Gemini call made by the app.
+
+The gateway wraps one model backend (see ``utils.llm_backends``) and puts each
+request through the response cache, in-flight coalescing, a token-bucket rate limit and a
+concurrency cap, retrying transient errors with jittered exponential backoff.
+"""
+import random
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from utils.llm_backends import create_backend
+from utils.llm_cache import LLMCache, make_key
+
+# HTTP status codes worth retrying: rate limited or transient server errors
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+def is_retryable(exc):
+    code = getattr(exc, "code", None)
+    try:
+        return int(code) in RETRYABLE_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+class TokenBucket:
+    """Allow ``rate`` requests per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class GeminiGateway:
+    def __init__(self, backend, cache=None, rate_per_second=5.0, burst=10,
+                 max_concurrency=8, max_retries=4, base_delay=0.5, max_delay=8.0):
+        self.backend = backend
+        self.cache = cache if cache is not None else LLMCache()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._bucket = TokenBucket(rate_per_second, burst)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._in_flight = {}  # cache key -> Future shared by coalesced callers
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "coalesced": 0, "retries": 0, "failures": 0,
+                       "waiting": 0, "active": 0, "max_waiting": 0,
+                       "total_wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def generate(self, model_name, prompt, generation_config=None, use_cache=True):
+        """Return the response text for ``prompt``.
+
+        Identical prompts already in flight share one upstream call. With
+        ``use_cache=False`` the cache and coalescing are skipped, for callers
+        that want a fresh sample (e.g. the question pool).
+        """
+        if not use_cache:
+            return self._call_with_retries(model_name, prompt, generation_config)
+
+        key = make_key(model_name, prompt, generation_config)
+        text = self.cache.get(key)
+        if text is not None:
+            return text
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            text = self._call_with_retries(model_name, prompt, generation_config)
+            self.cache.set(key, text)
+            future.set_result(text)
+            return text
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def invalidate(self, model_name, prompt, generation_config=None):
+        """Drop a cached response, e.g. one that turned out to be unusable."""
+        self.cache.delete(make_key(model_name, prompt, generation_config))
+
+    def stream(self, model_name, prompt, generation_config=None):
+        """Yield response text chunks; complete responses are cached.
+
+        Retries only happen before the first chunk, so callers never see
+        duplicated text. Streams are not coalesced: the only streamed prompt
+        is a student's own report, so two identical ones in flight means a
+        double submit, and a follower would depend on a leader whose session
+        can stop reading at any point. A finished report is cached instead.
+        """
+        key = make_key(model_name, prompt, generation_config)
+        text = self.cache.get(key)
+        if text is not None:
+            yield text
+            return
+
+        chunks = []
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._slot():
+                    for chunk in self.backend.generate(model_name, prompt, generation_config, stream=True):
+                        chunks.append(chunk)
+                        yield chunk
+                break
+            except Exception as e:
+                if chunks or not self._should_retry(e, attempt):
+                    raise
+        self.cache.set(key, "".join(chunks))
+
+    def _call_with_retries(self, model_name, prompt, generation_config):
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._slot():
+                    return self.backend.generate(model_name, prompt, generation_config)
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+
+    def _should_retry(self, exc, attempt):
+        # Called after the failed attempt gave back its slot, so a backoff
+        # never holds a slot another request could be using
+        if attempt >= self.max_retries or not is_retryable(exc):
+            with self._lock:
+                self._stats["failures"] += 1
+            return False
+        with self._lock:
+            self._stats["retries"] += 1
+        # Full jitter keeps a burst of throttled sessions from retrying in lockstep;
+        # the retry then waits for a slot and a rate-limit token like any call
+        time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+        return True
+
+    @contextmanager
+    def _slot(self):
+        """Wait for a concurrency slot and a rate-limit token."""
+        with self._lock:
+            self._stats["waiting"] += 1
+            self._stats["max_waiting"] = max(self._stats["max_waiting"], self._stats["waiting"])
+        started = time.monotonic()
+        try:
+            self._slots.acquire()
+            try:
+                self._bucket.acquire()
+            except BaseException:
+                self._slots.release()
+                raise
+        finally:
+            waited = time.monotonic() - started
+            with self._lock:
+                self._stats["waiting"] -= 1
+                self._stats["total_wait_seconds"] += waited
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["active"] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stats["active"] -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight_prompts"] = len(self._in_flight)
+        stats["avg_wait_seconds"] = stats["total_wait_seconds"] / stats["calls"] if stats["calls"] else 0.0
+        stats["cache"] = self.cache.stats()
+        return stats
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Return the process-wide gateway, creating it on first use."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = GeminiGateway(create_backend())
+        return _gateway
+
+
+def set_gateway(gateway):
+    """Replace the process-wide gateway (e.g. with a fake backend for load tests)."""
+    global _gateway
+    with _gateway_lock:
+        _gateway = gateway
@@ -0,0 +1,174 @@
+"""Background grading of challenge submissions.
+
+Submitting returns a job ID straight away; a small pool of worker threads
+grades queued jobs and the page polls ``status()`` until the result is in.
+A worker that picks up a job waits up to ``batch_wait`` seconds for more to
+arrive and grades up to ``batch_size`` submissions in one model call, so a
+burst of submissions costs a few calls instead of one each. If a batched
+call fails, or its response doesn't grade exactly the submissions sent,
+they are retried one by one.
+"""
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from utils.grading import CHALLENGES, build_grading_prompt, parse_grades
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+class GradingQueue:
+    def __init__(self, generate_fn, workers=4, batch_size=8, batch_wait=0.2,
+                 max_jobs=10000, window_seconds=60.0):
+        # generate_fn(prompt) returns the model's response text or raises
+        self.generate_fn = generate_fn
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_jobs = max_jobs
+        self.window_seconds = window_seconds
+
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()  # job_id -> job, oldest first
+        self._lock = threading.Lock()
+        self._take_lock = threading.Lock()  # one worker assembles a batch at a time
+        self._recent = deque(maxlen=1000)  # (finished_at, queue_seconds, total_seconds)
+        self._stats = {"submitted": 0, "graded": 0, "failed": 0, "batches": 0,
+                       "model_calls": 0, "largest_batch": 0}
+        self._threads = []
+        self._started_at = None
+
+    def start(self):
+        with self._lock:
+            if not self._threads:
+                self._started_at = time.monotonic()
+                for n in range(self.workers):
+                    thread = threading.Thread(target=self._run, name=f"grader-{n}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+        return self
+
+    def submit(self, challenge, fields):
+        """Queue a submission and return its job ID.
+
+        ``fields`` maps the labels shown on the page to the submitted text.
+        """
+        if challenge not in CHALLENGES:
+            raise ValueError(f"unknown challenge: {challenge}")
+        job_id = uuid.uuid4().hex[:12]
+        job = {"id": job_id, "challenge": challenge, "fields": dict(fields), "status": "queued",
+               "result": None, "error": None, "submitted_at": time.monotonic(),
+               "started_at": None, "finished_at": None}
+        with self._lock:
+            self._jobs[job_id] = job
+            self._evict()
+            self._stats["submitted"] += 1
+        self._queue.put(job_id)
+        return job_id
+
+    def _evict(self):
+        # Forget the oldest finished jobs; their sessions have long since shown the result
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id]["status"] in ("done", "failed"):
+                del self._jobs[job_id]
+                excess -= 1
+
+    def status(self, job_id):
+        """A copy of the job (``status`` is queued, grading, done or failed), or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+            if job["status"] == "queued":
+                job["position"] = sum(
+                    1 for other in self._jobs.values()
+                    if other["status"] == "queued" and other["submitted_at"] <= job["submitted_at"]
+                )
+        job.pop("fields")
+        return job
+
+    def _take_batch(self):
+        with self._take_lock:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+        now = time.monotonic()
+        with self._lock:
+            jobs = [self._jobs[job_id] for job_id in batch if job_id in self._jobs]
+            for job in jobs:
+                job["status"] = "grading"
+                job["started_at"] = now
+            self._stats["batches"] += 1
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], len(jobs))
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._take_batch()
+            if jobs:
+                self._grade(jobs)
+
+    def _grade(self, jobs):
+        prompt = build_grading_prompt([(job["id"], job["challenge"], job["fields"]) for job in jobs])
+        with self._lock:
+            self._stats["model_calls"] += 1
+        try:
+            grades = parse_grades(self.generate_fn(prompt), expected_ids=[job["id"] for job in jobs])
+            error = "The grader returned no feedback for this submission."
+        except Exception as e:
+            grades = {}
+            error = f"Grading failed: {e}"
+
+        missing = [job for job in jobs if job["id"] not in grades]
+        self._finish([(job, grades[job["id"]], None) for job in jobs if job["id"] in grades])
+        if len(jobs) > 1:
+            # Don't let one bad batch fail everyone in it
+            for job in missing:
+                self._grade([job])
+        else:
+            self._finish([(job, None, error) for job in missing])
+
+    def _finish(self, outcomes):
+        now = time.monotonic()
+        with self._lock:
+            for job, result, error in outcomes:
+                job["status"] = "done" if result is not None else "failed"
+                job["result"] = result
+                job["error"] = error
+                job["finished_at"] = now
+                self._stats["graded" if result is not None else "failed"] += 1
+                self._recent.append((now, job["started_at"] - job["submitted_at"], now - job["submitted_at"]))
+
+    def stats(self):
+        """Counters plus throughput and latency over the last ``window_seconds``."""
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queued"] = self._queue.qsize()
+            recent = [entry for entry in self._recent if now - entry[0] <= self.window_seconds]
+            elapsed = min(self.window_seconds, now - self._started_at) if self._started_at else 0
+        queue_seconds = [entry[1] for entry in recent]
+        total_seconds = [entry[2] for entry in recent]
+        stats["graded_per_minute"] = len(recent) / elapsed * 60 if elapsed else 0.0
+        stats["avg_batch_size"] = (stats["graded"] + stats["failed"]) / stats["model_calls"] if stats["model_calls"] else None
+        stats["queue_p50_seconds"] = percentile(queue_seconds, 50)
+        stats["queue_p95_seconds"] = percentile(queue_seconds, 95)
+        stats["latency_p50_seconds"] = percentile(total_seconds, 50)
+        stats["latency_p95_seconds"] = percentile(total_seconds, 95)
+        return stats
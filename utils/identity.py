@@ -0,0 +1,86 @@
+import functools
+import hashlib
+import hmac
+import os
+import secrets
+import uuid
+
+import streamlit as st
+
+from utils.storage import data_path
+
+COOKIE_NAME = "study_buddy_uid"
+COOKIE_MAX_AGE = 365 * 24 * 3600
+
+# Streamlit can't set cookies from Python; this component's script runs in
+# the app page itself (no iframe), so it can write the page's cookie
+_cookie_writer = st.components.v2.component(
+    "study_buddy_cookie_writer",
+    js=f"""
+export default function(component) {{
+    const secure = window.location.protocol === "https:" ? "; Secure" : "";
+    document.cookie = "{COOKIE_NAME}=" + component.data +
+        "; Max-Age={COOKIE_MAX_AGE}; Path=/; SameSite=Strict" + secure;
+}}
+""",
+)
+
+
+@functools.cache
+def _signing_key(path=None):
+    # Generated on first use and kept with the rest of the app's data, so
+    # every server process signs and checks with the same key
+    path = path or data_path("identity.key")
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    # Write the key in full under a private name, then link it into place:
+    # a reader never sees a half-written file, and if another process got
+    # there first its key wins and ours is discarded
+    tmp = f"{path}.{os.getpid()}.{secrets.token_hex(4)}"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(secrets.token_bytes(32))
+    try:
+        os.link(tmp, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(tmp)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _signature(user_id):
+    return hmac.new(_signing_key(), user_id.encode(), hashlib.sha256).hexdigest()
+
+
+def _verified(token):
+    if not isinstance(token, str):
+        return None
+    user_id, _, signature = token.partition(".")
+    if user_id and hmac.compare_digest(signature.encode(), _signature(user_id).encode()):
+        return user_id
+    return None
+
+
+def get_user_id():
+    """Return a stable anonymous ID for the current student.
+
+    The platform has no login, so the ID is kept in the session and in a
+    signed cookie; reloading the page keeps the same journal, progress and
+    forum identity. It never appears in the URL, so sharing a link doesn't
+    share the journal, and a cookie whose signature doesn't match is ignored.
+    """
+    if "user_id" not in st.session_state:
+        user_id = _verified(st.context.cookies.get(COOKIE_NAME))
+        st.session_state.user_id = user_id or uuid.uuid4().hex
+        if user_id is None:
+            token = f"{st.session_state.user_id}.{_signature(st.session_state.user_id)}"
+            _cookie_writer(data=token)
+    if "uid" in st.query_params:
+        # Drop IDs left in bookmarked links by older versions
+        del st.query_params["uid"]
+    return st.session_state.user_id
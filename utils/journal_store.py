@@ -0,0 +1,254 @@
+"""Durable storage for the Usage Experience Journal.
+
+Entries are appended to a SQLite database in WAL mode, indexed by user and
+date, and read back a page at a time (newest first, with a cursor for older
+entries). Inserts are queued and committed in batches by a background writer
+thread, so saving an entry never blocks the Streamlit script thread; entries
+still in the queue are merged into reads so a student always sees their own
+writes.
+"""
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from utils.storage import connect, data_path
+
+ENTRY_FIELDS = ("task", "tool", "usage")
+
+
+class JournalStore:
+    def __init__(self, path=None, batch_size=100, flush_interval=0.05):
+        self.path = path or data_path("journal.sqlite3")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._pending = {}  # uid -> (user_id, entry) not yet committed
+        self._lock = threading.Lock()
+
+        with self._connection() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS journal_entries (
+                       id INTEGER PRIMARY KEY AUTOINCREMENT,
+                       uid TEXT NOT NULL UNIQUE,
+                       user_id TEXT NOT NULL,
+                       created_at INTEGER NOT NULL,
+                       date TEXT NOT NULL,
+                       task TEXT NOT NULL,
+                       tool TEXT NOT NULL,
+                       usage TEXT NOT NULL
+                   )"""
+            )
+            # Entries are ordered by (created_at, uid): a key an entry already
+            # has while it is queued, so page cursors survive its commit
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_journal_user_date_uid "
+                "ON journal_entries(user_id, created_at, uid)"
+            )
+            conn.execute("DROP INDEX IF EXISTS idx_journal_user_date")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS journal_digests (
+                       user_id TEXT PRIMARY KEY,
+                       folded INTEGER NOT NULL,
+                       text TEXT NOT NULL
+                   )"""
+            )
+
+        self._writer = threading.Thread(target=self._write_loop, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    def _connection(self):
+        # One connection per thread lets WAL readers run concurrently
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+        return conn
+
+    def append(self, user_id, task, tool, usage):
+        """Queue a new entry and return it; the write happens in the background."""
+        now = datetime.now()
+        entry = {
+            # Time-ordered, so entries saved within one second keep their order
+            "uid": f"{time.time_ns():016x}{uuid.uuid4().hex[:16]}",
+            "created_at": int(now.timestamp()),
+            "date": now.strftime("%Y-%m-%d %H:%M"),
+            "task": task,
+            "tool": tool,
+            "usage": usage,
+        }
+        with self._lock:
+            self._pending[entry["uid"]] = (user_id, entry)
+        self._queue.put((user_id, entry))
+        return entry
+
+    def flush(self, timeout=None):
+        """Block until every queued entry has been committed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(self.flush_interval)
+
+    def _write_loop(self):
+        conn = connect(self.path)
+        while True:
+            batch = [self._queue.get()]
+            # Give concurrent savers a moment to join the same transaction
+            time.sleep(self.flush_interval)
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO journal_entries "
+                        "(uid, user_id, created_at, date, task, tool, usage) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (e["uid"], user_id, e["created_at"], e["date"], e["task"], e["tool"], e["usage"])
+                            for user_id, e in batch
+                        ],
+                    )
+            except Exception:
+                # Leave the entries pending and retry them with the next batch
+                for item in batch:
+                    self._queue.put(item)
+                time.sleep(1)
+                continue
+            with self._lock:
+                for _, entry in batch:
+                    self._pending.pop(entry["uid"], None)
+
+    def _uncommitted(self, user_id):
+        """Queued entries not yet in the database, oldest first."""
+        # Read the queue first: an entry committed in between is then seen
+        # by the database, not missed
+        with self._lock:
+            pending = sorted((entry for uid, entry in self._pending.values() if uid == user_id), key=self._key)
+        if not pending:
+            return []
+        placeholders = ",".join("?" * len(pending))
+        committed = {row[0] for row in self._connection().execute(
+            f"SELECT uid FROM journal_entries WHERE uid IN ({placeholders})",
+            tuple(entry["uid"] for entry in pending),
+        )}
+        return [entry for entry in pending if entry["uid"] not in committed]
+
+    @staticmethod
+    def _key(entry):
+        return entry["created_at"], entry["uid"]
+
+    @staticmethod
+    def _row_to_entry(row):
+        return {key: row[key] for key in ("id", "uid", "created_at", "date") + ENTRY_FIELDS}
+
+    def count(self, user_id):
+        pending = self._uncommitted(user_id)
+        committed = self._connection().execute(
+            "SELECT COUNT(*) FROM journal_entries WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+        return committed + len(pending)
+
+    def page(self, user_id, limit=10, before=None):
+        """Return ``(entries, cursor)``: up to ``limit`` entries, newest first.
+
+        Pass the returned cursor as ``before`` to fetch the next older page;
+        it is None when there are no older entries. Queued entries are paged
+        together with committed ones.
+        """
+        pending = self._uncommitted(user_id)
+        query = "SELECT * FROM journal_entries WHERE user_id = ?"
+        params = [user_id]
+        if before is not None:
+            before = tuple(before)
+            pending = [entry for entry in pending if self._key(entry) < before]
+            query += " AND (created_at, uid) < (?, ?)"
+            params += list(before)
+        query += " ORDER BY created_at DESC, uid DESC LIMIT ?"
+        params.append(limit + 1)
+        rows = [self._row_to_entry(row) for row in self._connection().execute(query, params)]
+
+        # An entry committed since the queue was read is in both lists
+        merged = {entry["uid"]: entry for entry in pending}
+        merged.update((row["uid"], row) for row in rows)
+        entries = sorted(merged.values(), key=self._key, reverse=True)[:limit + 1]
+        # The cursor is the last returned entry's key, the same queued or committed
+        cursor = self._key(entries[limit - 1]) if len(entries) > limit else None
+        return entries[:limit], cursor
+
+    def latest(self, user_id):
+        entries, _ = self.page(user_id, limit=1)
+        return entries[0] if entries else None
+
+    def entries(self, user_id, offset, limit):
+        """Entries in chronological order, queued ones last, for digesting history."""
+        pending = self._uncommitted(user_id)
+        rows = [self._row_to_entry(row) for row in self._connection().execute(
+            "SELECT * FROM journal_entries WHERE user_id = ? "
+            "ORDER BY created_at, uid LIMIT ? OFFSET ?",
+            (user_id, limit, offset),
+        )]
+        if len(rows) < limit and pending:
+            committed = self._connection().execute(
+                "SELECT COUNT(*) FROM journal_entries WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+            start = max(0, offset - committed)
+            seen = {row["uid"] for row in rows}
+            rows += [entry for entry in pending[start:start + limit - len(rows)] if entry["uid"] not in seen]
+        return rows
+
+    def load_digest(self, user_id):
+        row = self._connection().execute(
+            "SELECT folded, text FROM journal_digests WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return {"folded": row["folded"], "text": row["text"]} if row else None
+
+    def save_digest(self, user_id, digest):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO journal_digests (user_id, folded, text) VALUES (?, ?, ?)",
+                (user_id, digest["folded"], digest["text"]),
+            )
+
+    def view(self, user_id):
+        return JournalView(self, user_id)
+
+
+class JournalView:
+    """Read-only, list-like view of one user's journal (oldest first).
+
+    Supports ``len()``, indexing and slicing, each backed by a bounded query,
+    so helpers written for a list of entries never load the whole history.
+    Entries still queued for the writer are included, after committed ones.
+    """
+
+    def __init__(self, store, user_id):
+        self.store = store
+        self.user_id = user_id
+        self._len = store.count(user_id)
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                raise ValueError("JournalView only supports contiguous slices")
+            return self.store.entries(self.user_id, start, max(0, stop - start))
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        return self.store.entries(self.user_id, index, 1)[0]
@@ -0,0 +1,116 @@
+"""Bounded journal context for the feedback prompt.
+
+Older journal entries are folded into a rolling digest; only the most recent
+entries are sent verbatim. The digest is updated incrementally, only when new
+entries age out of the recent window, so the prompt stays within a fixed token
+budget however long the journal grows.
+"""
+from collections import Counter
+
+RECENT_ENTRIES = 5
+CONTEXT_TOKEN_BUDGET = 1500
+DIGEST_TOKEN_BUDGET = 400
+FOLD_CHUNK_SIZE = 50
+SUMMARY_MODEL = "gemini-2.0-flash"
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text, budget):
+    limit = budget * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + " ..."
+
+
+def format_entry(number, entry):
+    return f"Entry {number} ({entry['date']}): Task: {entry['task']}, Tool: {entry['tool']}, Usage: {entry['usage']}"
+
+
+def empty_digest():
+    # "folded" is the number of leading entries already summarized into "text"
+    return {"folded": 0, "text": ""}
+
+
+def build_summary_prompt(digest_text, entry_lines, budget=DIGEST_TOKEN_BUDGET):
+    return f"""
+    You maintain a running summary of a student's AI usage journal.
+    Merge the new entries into the existing summary. Keep recurring tasks, tools,
+    usage habits and any changes over time; drop one-off details.
+    Reply with the updated summary only, in at most {budget * 3 // 4} words.
+
+    EXISTING SUMMARY:
+    {digest_text or "None yet"}
+
+    NEW ENTRIES:
+    {chr(10).join(entry_lines)}
+    """
+
+
+def fallback_digest(digest_text, entries):
+    """Extractive digest used when the model can't be reached."""
+    tools = Counter(entry['tool'].strip() for entry in entries)
+    tasks = Counter(entry['task'].strip() for entry in entries)
+    summary = (
+        f"{len(entries)} earlier entries. "
+        f"Tools: {', '.join(f'{name} ({count})' for name, count in tools.most_common(5))}. "
+        f"Tasks: {', '.join(name for name, _ in tasks.most_common(5))}."
+    )
+    # Newest first: the digest is truncated from the end, so the oldest
+    # lines are the ones that give way
+    return f"{summary}\n{digest_text}".strip()
+
+
+def update_digest(digest, entries, summarize_fn, recent=RECENT_ENTRIES,
+                  budget=DIGEST_TOKEN_BUDGET, chunk_size=FOLD_CHUNK_SIZE):
+    """Fold entries that have left the recent window into the digest.
+
+    Returns the same digest object when nothing new has aged out, so callers
+    can cache it per journal version. ``summarize_fn(prompt)`` returns text.
+    A long backlog is folded ``chunk_size`` entries at a time so no single
+    summary prompt grows with the journal.
+    """
+    fold_until = max(0, len(entries) - recent)
+    while digest["folded"] < fold_until:
+        start = digest["folded"]
+        end = min(fold_until, start + chunk_size)
+        aged_out = entries[start:end]
+        lines = [format_entry(start + idx + 1, entry) for idx, entry in enumerate(aged_out)]
+        try:
+            text = summarize_fn(build_summary_prompt(digest["text"], lines, budget)).strip()
+        except Exception:
+            text = ""
+        if not text:
+            text = fallback_digest(digest["text"], aged_out)
+        digest = {"folded": end, "text": truncate_to_tokens(text, budget)}
+    return digest
+
+
+def build_journal_context(entries, digest, recent=RECENT_ENTRIES, budget=CONTEXT_TOKEN_BUDGET):
+    """Digest of older entries plus the most recent entries, within ``budget`` tokens."""
+    if not entries:
+        return "No journal entries available"
+
+    parts = []
+    if digest["text"]:
+        parts.append(f"Summary of entries 1-{digest['folded']}:\n{digest['text']}")
+    remaining = budget - sum(estimate_tokens(part) for part in parts)
+
+    # Newest entries first, so the ones dropped for space are the oldest
+    recent_lines = []
+    start = max(digest["folded"], len(entries) - recent)
+    for number in range(len(entries), start, -1):
+        line = format_entry(number, entries[number - 1])
+        cost = estimate_tokens(line)
+        if cost > remaining:
+            # Out of budget: keep a truncated copy of this entry if it's worth it
+            if remaining >= 20:
+                recent_lines.append(truncate_to_tokens(line, remaining))
+            break
+        recent_lines.append(line)
+        remaining -= cost
+    parts.append("\n".join(reversed(recent_lines)))
+    return "\n\n".join(part for part in parts if part)
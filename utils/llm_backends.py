@@ -0,0 +1,170 @@
+"""Model backends used by the gateway.
+
+``GeminiBackend`` talks to Google's API. ``FakeBackend`` runs fully offline
+with configurable latency, error and 429 injection, and canned responses in
+the formats the pages expect, so the app can be load-tested without quota.
+Set ``STUDY_BUDDY_LLM_BACKEND=fake`` to run the app against the fake.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+
+import google.generativeai as genai
+
+from utils.feedback_report import REPORT_SECTIONS
+
+
+class GeminiBackend:
+    def __init__(self, api_key):
+        genai.configure(api_key=api_key)
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model_name):
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+    def generate(self, model_name, prompt, generation_config=None, stream=False):
+        """Return the response text, or an iterator of text chunks when streaming."""
+        response = self._model(model_name).generate_content(
+            prompt, generation_config=generation_config, stream=stream
+        )
+        if not stream:
+            return response.text
+        return (chunk.text for chunk in response if chunk.parts)
+
+
+class FakeBackendError(Exception):
+    code = 500
+
+
+class FakeRateLimitError(FakeBackendError):
+    code = 429
+
+
+FAKE_QUESTIONS = [
+    ("How often do you use AI tools for your coursework?",
+     ["Never", "Once a week or less", "Several times a week", "Every day"]),
+    ("How do you feel about submitting work that AI helped you write?",
+     ["Very comfortable", "Somewhat comfortable", "Somewhat uneasy", "Very uneasy"]),
+    ("Which task do you most often use AI for?",
+     ["Brainstorming ideas", "Summarizing readings", "Checking my work", "Writing full drafts"]),
+    ("What do you do after receiving an AI answer?",
+     ["Use it as is", "Skim it", "Check key facts", "Verify it against sources"]),
+    ("How often do you try a problem yourself before asking AI?",
+     ["Never", "Rarely", "Usually", "Always"]),
+    ("Do you disclose AI assistance to your instructors?",
+     ["Never", "Only when required", "Most of the time", "Always"]),
+    ("How do you feel about relying on AI for explanations?",
+     ["Fully confident", "Mostly confident", "A little unsure", "Very unsure"]),
+]
+
+
+def fake_grades(prompt):
+    """Grades for a grading prompt; longer answers score higher."""
+    submissions = json.loads(prompt.split("\n\n", 1)[1])
+    grades = []
+    for submission in submissions:
+        answer_words = sum(len(text.split()) for text in submission["answers"].values())
+        grades.append({
+            "id": submission["id"],
+            "score": min(10, 3 + answer_words // 20),
+            "summary": "A thoughtful submission (fake grader).",
+            "strengths": ["Engages with the task"],
+            "improvements": ["Support each point with a specific example"],
+        })
+    return json.dumps(grades)
+
+
+class FakeBackend:
+    """Offline stand-in for Gemini.
+
+    Latency is drawn from a lognormal distribution around ``median_latency``
+    (``latency_sigma`` controls the tail) or is fixed when the sigma is 0.
+    ``error_rate`` and ``rate_limit_rate`` inject 500s and 429s. ``responses``
+    maps prompt substrings to canned text and takes priority over the built-in
+    templates.
+    """
+
+    def __init__(self, median_latency=0.5, latency_sigma=0.5, error_rate=0.0,
+                 rate_limit_rate=0.0, stream_chunks=12, responses=None, seed=None):
+        self.median_latency = median_latency
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.stream_chunks = stream_chunks
+        self.responses = responses or {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _sample(self):
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+            if self.latency_sigma:
+                latency = self._random.lognormvariate(0, self.latency_sigma) * self.median_latency
+            else:
+                latency = self.median_latency
+        return roll, latency
+
+    def generate(self, model_name, prompt, generation_config=None, stream=False):
+        roll, latency = self._sample()
+        if roll < self.rate_limit_rate:
+            time.sleep(latency * 0.1)
+            raise FakeRateLimitError("429 Resource has been exhausted (fake backend)")
+        if roll < self.rate_limit_rate + self.error_rate:
+            time.sleep(latency * 0.5)
+            raise FakeBackendError("500 Internal error (fake backend)")
+
+        text = self.respond(prompt, generation_config)
+        if not stream:
+            time.sleep(latency)
+            return text
+        return self._stream(text, latency)
+
+    def _stream(self, text, latency):
+        size = max(1, len(text) // self.stream_chunks)
+        for start in range(0, len(text), size):
+            time.sleep(latency / self.stream_chunks)
+            yield text[start:start + size]
+
+    def respond(self, prompt, generation_config=None):
+        for needle, text in self.responses.items():
+            if needle in prompt:
+                return text
+        if "multiple-choice questions" in prompt:
+            match = re.search(r"exactly (\d+)", prompt)
+            count = int(match.group(1)) if match else 5
+            with self._lock:
+                picked = self._random.sample(FAKE_QUESTIONS, min(count, len(FAKE_QUESTIONS)))
+            if (generation_config or {}).get("response_mime_type") == "application/json":
+                return json.dumps([{"question": q, "options": opts} for q, opts in picked])
+            return "\n".join(
+                f"Question: {q}\n" + "\n".join(f"{letter}. {o}" for letter, o in zip("ABCD", opts))
+                for q, opts in picked
+            )
+        if "running summary" in prompt:
+            return "The student mostly uses chatbots to summarize readings and brainstorm, and checks key facts."
+        if "challenge submissions" in prompt:
+            return fake_grades(prompt)
+        if "AI usage analysis" in prompt:
+            return "\n\n".join(
+                f"## {idx}. {title}\n- Placeholder insight for {title.lower()}."
+                for idx, title in enumerate(REPORT_SECTIONS, start=1)
+            )
+        return "This is a response from the fake backend."
+
+
+def create_backend(name=None):
+    """Build the backend selected by ``STUDY_BUDDY_LLM_BACKEND`` (default ``gemini``)."""
+    name = name or os.environ.get("STUDY_BUDDY_LLM_BACKEND", "gemini")
+    if name == "fake":
+        return FakeBackend()
+    import streamlit as st
+    return GeminiBackend(st.secrets["google"]["api_key"])
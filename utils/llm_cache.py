@@ -0,0 +1,150 @@
+"""Two-tier cache for LLM responses.
+
+Responses are keyed by model name, normalized prompt and generation config.
+The first tier is an in-process LRU; the second is a SQLite file that survives
+restarts and is shared by every session on the server.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from utils.storage import connect, data_path
+
+
+def normalize_prompt(prompt):
+    # Triple-quoted prompts carry source indentation; collapse whitespace so
+    # cosmetic edits to the page don't invalidate every cached response.
+    lines = (" ".join(line.split()) for line in prompt.strip().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def make_key(model_name, prompt, generation_config=None):
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "prompt": normalize_prompt(prompt),
+            "config": generation_config or {},
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Thread-safe LRU + disk cache with TTL and size-based eviction."""
+
+    def __init__(self, path=None, max_memory_entries=256, max_disk_entries=5000,
+                 ttl_seconds=24 * 3600):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (created_at, value)
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                       "writes": 0, "evictions": 0}
+
+        self._conn = connect(path or data_path("llm_cache.sqlite3"))
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                       key TEXT PRIMARY KEY,
+                       value TEXT NOT NULL,
+                       created_at REAL NOT NULL,
+                       last_access REAL NOT NULL
+                   )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)"
+            )
+
+    def _expired(self, created_at, now):
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                if not self._expired(item[0], now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return item[1]
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            if self._expired(row["created_at"], now):
+                with self._conn:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._stats["misses"] += 1
+                return None
+
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key)
+                )
+            self._remember(key, row["created_at"], row["value"])
+            self._stats["disk_hits"] += 1
+            return row["value"]
+
+    def set(self, key, value):
+        if not value:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._prune_disk(now)
+            self._stats["writes"] += 1
+
+    def _remember(self, key, created_at, value):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _prune_disk(self, now):
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+        # Keep only the most recently used entries once the table is over budget.
+        cur = self._conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        self._stats["evictions"] += max(cur.rowcount, 0)
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+            with self._conn:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            with self._conn:
+                self._conn.execute("DELETE FROM llm_cache")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,248 @@
+"""Durable checklist progress for the AI Literacy Modules.
+
+Checkbox changes are buffered per ``(user, module, task)`` with the latest
+value winning, so rapid toggling collapses into at most one write, and a
+background flusher commits everything buffered in a single transaction.
+
+The same transaction maintains the cohort rollups, so reporting on the
+cohort doesn't scan every student's progress:
+
+- ``task_rollups``: how many students have ticked each task;
+- ``progress_histogram``: for each module, how many students have ticked
+  0, 1, 2, ... of its tasks. Completion rates are derived from it for the
+  current checklist length.
+
+The instructor view therefore reads a handful of rows per module. Only a
+module whose checklist has shrunk while students still have ticks on the
+removed tasks is recounted from ``task_progress``, so those ticks never
+count.
+"""
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+from utils.storage import connect, data_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_progress (
+    user_id TEXT NOT NULL,
+    module_key TEXT NOT NULL,
+    task_index INTEGER NOT NULL,
+    PRIMARY KEY (user_id, module_key, task_index)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS module_learners (
+    user_id TEXT NOT NULL,
+    module_key TEXT NOT NULL,
+    done_count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, module_key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS task_rollups (
+    module_key TEXT NOT NULL,
+    task_index INTEGER NOT NULL,
+    done_count INTEGER NOT NULL,
+    PRIMARY KEY (module_key, task_index)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS progress_histogram (
+    module_key TEXT NOT NULL,
+    done_count INTEGER NOT NULL,
+    learners INTEGER NOT NULL,
+    PRIMARY KEY (module_key, done_count)
+) WITHOUT ROWID;
+"""
+
+
+class ModuleProgress:
+    def __init__(self, path=None, flush_interval=1.0):
+        self.path = path or data_path("module_progress.sqlite3")
+        self.flush_interval = flush_interval
+        self._conn = connect(self.path)
+        self._conn.executescript(SCHEMA)
+        self._pending = {}  # (user_id, module_key, task_index) -> done
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.flushes = 0
+        self.writes = 0
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="progress-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def set_task(self, user_id, module_key, task_index, done):
+        """Buffer a checkbox change; it is written with the next flush."""
+        with self._lock:
+            self._pending[(user_id, module_key, task_index)] = bool(done)
+
+    def progress(self, user_id, module_key, task_count):
+        """The student's ticks for a module's ``task_count`` tasks, including buffered changes."""
+        # Snapshot the buffer first: a change flushed in between is then read back from the table
+        with self._lock:
+            pending = {
+                task: done for (uid, module, task), done in self._pending.items()
+                if uid == user_id and module == module_key
+            }
+        with self._flush_lock:
+            rows = self._conn.execute(
+                "SELECT task_index FROM task_progress WHERE user_id = ? AND module_key = ?",
+                (user_id, module_key),
+            ).fetchall()
+        done = [False] * task_count
+        for row in rows:
+            if row["task_index"] < task_count:
+                done[row["task_index"]] = True
+        for task, value in pending.items():
+            if task < task_count:
+                done[task] = value
+        return done
+
+    def flush(self):
+        """Commit every buffered change and its rollup updates; returns the rows changed."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                with self._conn:
+                    changed = self._apply(batch)
+            except Exception:
+                # Requeue without clobbering newer changes made meanwhile
+                with self._lock:
+                    for key, done in batch.items():
+                        self._pending.setdefault(key, done)
+                raise
+            self.flushes += 1
+            self.writes += changed
+            return changed
+
+    def _apply(self, batch):
+        conn = self._conn
+        learner_deltas = defaultdict(int)  # (user_id, module_key) -> change in tasks done
+        changed = 0
+        for (user_id, module_key, task_index), done in batch.items():
+            key = (user_id, module_key, task_index)
+            if done:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO task_progress (user_id, module_key, task_index) VALUES (?, ?, ?)", key
+                )
+            else:
+                cursor = conn.execute(
+                    "DELETE FROM task_progress WHERE user_id = ? AND module_key = ? AND task_index = ?", key
+                )
+            if not cursor.rowcount:
+                continue  # already in that state
+            step = 1 if done else -1
+            conn.execute(
+                "INSERT INTO task_rollups (module_key, task_index, done_count) VALUES (?, ?, ?) "
+                "ON CONFLICT (module_key, task_index) DO UPDATE SET done_count = done_count + excluded.done_count",
+                (module_key, task_index, step),
+            )
+            learner_deltas[(user_id, module_key)] += step
+            changed += 1
+
+        for (user_id, module_key), delta in learner_deltas.items():
+            row = conn.execute(
+                "SELECT done_count FROM module_learners WHERE user_id = ? AND module_key = ?",
+                (user_id, module_key),
+            ).fetchone()
+            previous = row["done_count"] if row else None
+            current = (previous or 0) + delta
+            if previous == current:
+                continue
+            conn.execute(
+                "INSERT OR REPLACE INTO module_learners (user_id, module_key, done_count) VALUES (?, ?, ?)",
+                (user_id, module_key, current),
+            )
+            # Move the student from one histogram bucket to the other
+            if previous is not None:
+                conn.execute(
+                    "UPDATE progress_histogram SET learners = learners - 1 WHERE module_key = ? AND done_count = ?",
+                    (module_key, previous),
+                )
+            conn.execute(
+                "INSERT INTO progress_histogram (module_key, done_count, learners) VALUES (?, ?, 1) "
+                "ON CONFLICT (module_key, done_count) DO UPDATE SET learners = learners + 1",
+                (module_key, current),
+            )
+        return changed
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                time.sleep(self.flush_interval)
+
+    def cohort_summary(self, checklists):
+        """Completion across all students for ``checklists`` (module key -> task count).
+
+        Returns, per module: ``learners`` (students who ticked anything),
+        ``completed`` (students who ticked every task), ``average_completion``
+        (share of tasks ticked, averaged over learners) and ``task_rates``
+        (share of learners who ticked each task). Changes still buffered are
+        not included, so figures trail by up to one flush interval.
+        """
+        keys = list(checklists)
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._flush_lock:
+            tasks = self._conn.execute(
+                f"SELECT module_key, task_index, done_count FROM task_rollups WHERE module_key IN ({placeholders})",
+                keys,
+            ).fetchall()
+            # The histogram counts ticks on every task index; where a module
+            # still has ticks on tasks since removed from its checklist, count
+            # each student's ticks on current tasks from their progress rows
+            shrunk = sorted({
+                row["module_key"] for row in tasks
+                if row["task_index"] >= checklists[row["module_key"]] and row["done_count"] > 0
+            })
+            current = [key for key in keys if key not in shrunk]
+            histogram = []
+            if current:
+                histogram += self._conn.execute(
+                    f"SELECT module_key, done_count, learners FROM progress_histogram "
+                    f"WHERE module_key IN ({','.join('?' * len(current))}) AND learners > 0 AND done_count > 0",
+                    current,
+                ).fetchall()
+            for key in shrunk:
+                histogram += self._conn.execute(
+                    "SELECT ? AS module_key, done_count, COUNT(*) AS learners FROM ("
+                    "SELECT COUNT(*) AS done_count FROM task_progress "
+                    "WHERE module_key = ? AND task_index < ? GROUP BY user_id) GROUP BY done_count",
+                    (key, key, checklists[key]),
+                ).fetchall()
+
+        summary = {
+            key: {"learners": 0, "completed": 0, "tasks_done": 0, "task_done_counts": [0] * count}
+            for key, count in checklists.items()
+        }
+        for row in histogram:
+            module = summary[row["module_key"]]
+            count = checklists[row["module_key"]]
+            module["learners"] += row["learners"]
+            module["tasks_done"] += row["done_count"] * row["learners"]
+            if count and row["done_count"] >= count:
+                module["completed"] += row["learners"]
+        for row in tasks:
+            done_counts = summary[row["module_key"]]["task_done_counts"]
+            if row["task_index"] < len(done_counts):
+                done_counts[row["task_index"]] = row["done_count"]
+
+        result = {}
+        for key, module in summary.items():
+            learners, count = module["learners"], checklists[key]
+            result[key] = {
+                "learners": learners,
+                "completed": module["completed"],
+                "average_completion": module["tasks_done"] / (learners * count) if learners and count else 0.0,
+                "task_rates": [done / learners if learners else 0.0 for done in module["task_done_counts"]],
+            }
+        return result
+
+    def stats(self):
+        with self._lock:
+            buffered = len(self._pending)
+        return {"flushes": self.flushes, "rows_written": self.writes, "buffered_changes": buffered}
@@ -0,0 +1,101 @@
+"""Near-duplicate detection for forum questions.
+
+Each question's text is reduced to a MinHash signature over character
+5-gram shingles, so comparing two signatures estimates the Jaccard
+similarity of their shingle sets. Signatures are split into LSH bands and
+every band is hashed to one key; each band has a bucket table from key to
+the questions that share it, so a lookup only visits the questions in its
+own buckets and compares their signatures (kept in a growable numpy matrix)
+in one vectorized step. Adding a question is an append plus one bucket
+entry per band.
+"""
+import re
+import threading
+import zlib
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16  # 4 rows per band: ~64% chance to catch a 0.5 match, ~99% for 0.7
+SHINGLE_SIZE = 5
+SIMILARITY_THRESHOLD = 0.5
+_PRIME = np.uint64((1 << 31) - 1)
+_NORMALIZE_RE = re.compile(r"[^a-z0-9]+")
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Hashes of the distinct character shingles of ``text``, normalized."""
+    text = _NORMALIZE_RE.sub(" ", (text or "").lower()).strip()
+    if not text:
+        return np.empty(0, dtype=np.uint64)
+    grams = {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+class NearDuplicateIndex:
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, seed=1, capacity=1024):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        # Universal hash family h(x) = (a * x + b) mod p, one (a, b) per permutation
+        self._a = rng.integers(1, int(_PRIME), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(1, 1 << 62, num_perm // bands, dtype=np.uint64) | np.uint64(1)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._signatures = np.zeros((capacity, num_perm), dtype=np.uint32)
+        self._buckets = [{} for _ in range(bands)]  # per band: band key -> rows
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def signature(self, text):
+        hashes = shingles(text)
+        if not hashes.size:
+            return None
+        permuted = (hashes[:, None] * self._a + self._b) % _PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        rows = signature.reshape(self.bands, -1).astype(np.uint64)
+        # uint64 arithmetic wraps, which is fine for a hash
+        return (rows * self._band_mix).sum(axis=1)
+
+    def add(self, post_id, text):
+        signature = self.signature(text)
+        if signature is None:
+            return
+        keys = self._band_keys(signature)
+        with self._lock:
+            if self._size == len(self._ids):
+                capacity = 2 * len(self._ids)
+                self._ids = np.resize(self._ids, capacity)
+                self._signatures = np.resize(self._signatures, (capacity, self.num_perm))
+            self._ids[self._size] = post_id
+            self._signatures[self._size] = signature
+            for bucket, key in zip(self._buckets, keys.tolist()):
+                bucket.setdefault(key, []).append(self._size)
+            self._size += 1
+
+    def query(self, text, threshold=SIMILARITY_THRESHOLD, limit=5):
+        """Return up to ``limit`` ``(post_id, estimated similarity)`` pairs above ``threshold``."""
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        keys = self._band_keys(signature)
+        with self._lock:
+            rows = set()
+            for bucket, key in zip(self._buckets, keys.tolist()):
+                rows.update(bucket.get(key, ()))
+            if not rows:
+                return []
+            candidates = np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+            similarity = (self._signatures[candidates] == signature).mean(axis=1)
+            ids = self._ids[candidates]
+        keep = similarity >= threshold
+        ids, similarity = ids[keep], similarity[keep]
+        order = np.argsort(-similarity, kind="stable")[:limit]
+        return [(int(ids[i]), float(similarity[i])) for i in order]
@@ -0,0 +1,113 @@
+"""Server-side pool of ready-to-serve assessment question sets.
+
+A background worker keeps the pool topped up, so handing a student a set of
+questions never waits on the model. Each set is served to several sessions
+before it is retired, and never to the same session twice.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from utils.assessment import is_valid_question_set
+
+
+class QuestionPool:
+    def __init__(self, generate_fn, low_water=3, target=8, max_serves=20,
+                 retry_delay=5.0, max_tracked_sessions=10000):
+        # generate_fn() returns one parsed question set or raises
+        self.generate_fn = generate_fn
+        self.low_water = low_water
+        self.target = target
+        self.max_serves = max_serves
+        self.retry_delay = retry_delay
+        self.max_tracked_sessions = max_tracked_sessions
+
+        self._sets = OrderedDict()  # set_id -> {"questions", "serves"}
+        self._seen = OrderedDict()  # session_id -> set of served set_ids
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stats = {"served": 0, "empty": 0, "refills": 0, "refill_failures": 0,
+                       "last_refill_seconds": None, "total_refill_seconds": 0.0}
+        self._worker = None
+
+    def start(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="question-pool", daemon=True)
+                self._worker.start()
+        self._wakeup.set()
+        return self
+
+    def depth(self):
+        with self._lock:
+            return len(self._sets)
+
+    def add(self, questions):
+        """Add a validated set; returns False for invalid or duplicate sets."""
+        if not is_valid_question_set(questions):
+            return False
+        set_id = hashlib.sha1(json.dumps(questions, sort_keys=True).encode("utf-8")).hexdigest()
+        with self._lock:
+            if set_id in self._sets:
+                return False
+            self._sets[set_id] = {"questions": questions, "serves": 0}
+        return True
+
+    def take(self, session_id):
+        """Return a question set this session hasn't seen, or None if none is ready."""
+        with self._lock:
+            seen = self._seen.setdefault(session_id, set())
+            self._seen.move_to_end(session_id)
+            while len(self._seen) > self.max_tracked_sessions:
+                self._seen.popitem(last=False)
+
+            for set_id, entry in self._sets.items():
+                if set_id not in seen:
+                    seen.add(set_id)
+                    entry["serves"] += 1
+                    if entry["serves"] >= self.max_serves:
+                        del self._sets[set_id]
+                    self._stats["served"] += 1
+                    questions = entry["questions"]
+                    break
+            else:
+                self._stats["empty"] += 1
+                questions = None
+            low = len(self._sets) < self.low_water
+
+        if low:
+            self._wakeup.set()
+        # Hand out copies so a session can't mutate the pooled set
+        return [dict(q, options=list(q["options"])) for q in questions] if questions else None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["depth"] = len(self._sets)
+        refills = stats["refills"]
+        stats["avg_refill_seconds"] = stats["total_refill_seconds"] / refills if refills else None
+        return stats
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while self.depth() < self.target:
+                started = time.monotonic()
+                try:
+                    added = self.add(self.generate_fn())
+                except Exception:
+                    added = False
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    if added:
+                        self._stats["refills"] += 1
+                        self._stats["last_refill_seconds"] = elapsed
+                        self._stats["total_refill_seconds"] += elapsed
+                    else:
+                        self._stats["refill_failures"] += 1
+                if not added:
+                    # Back off instead of hammering the model with bad generations
+                    time.sleep(self.retry_delay)
@@ -0,0 +1,394 @@
+"""Fork server that runs untrusted submissions for ``utils.code_runner``.
+
+Started once per pool slot as ``python -I utils/sandbox_worker.py`` with a
+scrubbed environment and kept warm. For every job (one JSON line on stdin) it
+forks a child that moves into fresh mount, PID and network namespaces and
+forks the jailed process: chrooted into an empty directory, stripped of its
+privileges (the ``nobody`` user when the server runs as root, no
+capabilities otherwise) and held to CPU, memory, file-size and process
+limits. That process runs the submission and streams one JSON line per test
+back over a pipe. It only reports what each call returned; the server checks
+the answers itself and ignores anything that doesn't carry the job's nonce
+or doesn't match the next expected test. The fork server never executes
+submitted code, so a crash or limit kill only takes out the child. It
+answers each job with one JSON line on stdout.
+
+Linux only: where the namespaces can't be created, every job is refused.
+Standalone on purpose: it must not import the app.
+"""
+import ctypes
+import json
+import math
+import os
+import pwd
+import resource
+import secrets
+import select
+import signal
+import sys
+import tempfile
+import time
+
+CLONE_NEWNS = 0x00020000
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWPID = 0x20000000
+CLONE_NEWNET = 0x40000000
+PR_SET_NO_NEW_PRIVS = 38
+LINUX_CAPABILITY_VERSION_3 = 0x20080522
+JAIL_FAILED = 70  # exit status of a child that couldn't isolate itself
+
+# The jail has no filesystem, so submissions can only import modules the
+# server has already loaded
+PRELOADED_MODULES = ("collections", "decimal", "fractions", "functools", "itertools", "operator", "statistics")
+
+NOT_ISOLATED = "The code runner can't isolate submissions on this server, so hidden tests are unavailable."
+
+
+class TestTimeout(BaseException):
+    # BaseException so a bare ``except Exception`` in the submission can't swallow it
+    pass
+
+
+_inputs = {}  # test argument expression -> arguments, built once per fork server
+_libc = None
+_nobody = (65534, 65534)
+_isolation_error = None
+_OTHER = object()  # stands in for a return value the child didn't send back
+
+
+def _test_inputs(tests):
+    # Trusted expressions from the test suite, never from the submission.
+    # Children inherit the built arguments copy-on-write, so even a
+    # submission that mutates them can't affect the next one
+    for test in tests:
+        if test["args"] not in _inputs:
+            _inputs[test["args"]] = eval(test["args"], {"__builtins__": __builtins__})
+    return [_inputs[test["args"]] for test in tests]
+
+
+def _on_timer(signum, frame):
+    raise TestTimeout()
+
+
+def _clean(text, limit=80):
+    """Printable ASCII only, whitespace collapsed, at most ``limit`` characters."""
+    text = " ".join("".join(c if " " <= c <= "~" else " " for c in str(text)).split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _check(test, record):
+    """Return ``(passed, message)`` for one test from the child's raw record."""
+    outcome = record.get("outcome")
+    if outcome == "time":
+        return False, "Time limit exceeded"
+    if outcome == "memory":
+        return False, "Memory limit exceeded"
+    if outcome == "raised":
+        name = _clean(record.get("raised"), 40)
+        return name in test.get("allowed_errors", ()), f"raised {name}"
+    if outcome != "return":
+        return False, "Not run"
+    value = record.get("value", _OTHER)
+    if value is None or isinstance(value, (int, float)):
+        shown = _clean(repr(value), 40)
+    else:
+        value, shown = _OTHER, f"a {_clean(record.get('type', 'value'), 40)}"
+    if "allowed" in test:
+        if value in test["allowed"] and value is not True and value is not False:
+            return True, f"returned {shown}"
+        return False, f"returned {shown}, expected one of {test['allowed']!r}"
+    expected = test["expected"]
+    try:
+        ok = math.isclose(value, expected, rel_tol=test.get("tolerance", 1e-9), abs_tol=1e-12)
+    except TypeError:
+        ok = False
+    return ok, f"returned {shown}" if ok else f"returned {shown}, expected {expected!r}"
+
+
+def _encode(value):
+    # Only plain numbers and None travel back as values; the exact type check
+    # keeps subclasses with a lying __eq__ or __repr__ out of the server
+    if type(value) in (int, float, bool) or value is None:
+        try:
+            json.dumps(value)
+            return {"value": value}
+        except ValueError:
+            pass
+    return {"type": type(value).__name__}
+
+
+def _limit(job):
+    cpu = job["cpu_seconds"]
+    memory = job["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def _libc_call(name, *args):
+    if getattr(_libc, name)(*args) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def _jail():
+    """Lock the calling process into the server's empty scratch directory with no privileges."""
+    os.chroot(".")
+    os.chdir("/")
+    if os.geteuid() == 0:
+        os.setgroups([])
+        os.setgid(_nobody[1])
+        os.setuid(_nobody[0])
+    # In a user namespace the process still holds every capability there,
+    # enough to climb out of the chroot; drop them all
+    header = (ctypes.c_uint32 * 2)(LINUX_CAPABILITY_VERSION_3, 0)
+    _libc_call("capset", header, (ctypes.c_uint32 * 6)())
+    _libc_call("prctl", PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0)
+
+
+def _isolated(target):
+    """Run ``target`` jailed in new namespaces and exit with its status.
+
+    Called in a freshly forked child. Unsharing the PID namespace only
+    applies to the next fork, so the jailed process is a grandchild: it can
+    see no other process, the network or the app's files. Exits with
+    ``JAIL_FAILED`` if it couldn't get there.
+    """
+    # Own process group, so the server can kill the jail and anything in it
+    os.setpgid(0, 0)
+    # Nothing jailed gets the server's stdin or stdout
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+    try:
+        flags = CLONE_NEWNS | CLONE_NEWPID | CLONE_NEWNET
+        if os.geteuid() != 0:
+            flags |= CLONE_NEWUSER
+        _libc_call("unshare", flags)
+        pid = os.fork()
+    except Exception:
+        os._exit(JAIL_FAILED)
+    if pid == 0:
+        try:
+            _jail()
+        except Exception:
+            os._exit(JAIL_FAILED)
+        try:
+            target()
+        finally:
+            os._exit(0)
+    _, status = os.waitpid(pid, 0)
+    if os.WIFSIGNALED(status):
+        # Die the same way, so the server can tell a limit kill from an exit
+        sig = os.WTERMSIG(status)
+        if sig not in (signal.SIGKILL, signal.SIGSTOP):
+            signal.signal(sig, signal.SIG_DFL)
+        os.kill(os.getpid(), sig)
+    os._exit(os.WEXITSTATUS(status) if os.WIFEXITED(status) else 1)
+
+
+def _run_child(job, inputs, out, nonce):
+    owner = os.getpid()
+
+    def emit(record):
+        if os.getpid() != owner:
+            # A process the submission forked: it doesn't get to report results
+            os._exit(0)
+        record["nonce"] = nonce
+        os.write(out, (json.dumps(record) + "\n").encode())
+
+    signal.signal(signal.SIGPROF, _on_timer)
+    _limit(job)
+
+    namespace = {"__name__": "submission"}
+    signal.setitimer(signal.ITIMER_PROF, job["test_seconds"])
+    try:
+        exec(compile(job["code"], "<submission>", "exec"), namespace)
+        signal.setitimer(signal.ITIMER_PROF, 0)
+    except TestTimeout:
+        emit({"error": "Your code took too long to load."})
+        return
+    except SyntaxError as e:
+        emit({"error": f"SyntaxError on line {e.lineno}: {_clean(e.msg)}"})
+        return
+    except BaseException as e:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        try:
+            detail = _clean(e)
+        except BaseException:
+            detail = ""
+        emit({"error": f"{_clean(type(e).__name__, 40)} while loading your code: {detail}".rstrip(": ")})
+        return
+    function = namespace.get(job["function"])
+    if not callable(function):
+        emit({"error": f"Define a function named {job['function']}."})
+        return
+
+    for test, args in zip(job["tests"], inputs):
+        emit({"start": test["name"]})
+        record = {"name": test["name"]}
+        started = time.perf_counter()
+        signal.setitimer(signal.ITIMER_PROF, job["test_seconds"])
+        try:
+            value = function(*args)
+            record["outcome"] = "return"
+        except TestTimeout:
+            record["outcome"] = "time"
+        except MemoryError:
+            record["outcome"] = "memory"
+        except BaseException as e:
+            record.update(outcome="raised", raised=type(e).__name__)
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+        record["seconds"] = time.perf_counter() - started
+        if record["outcome"] == "return":
+            record.update(_encode(value))
+        emit(record)
+
+
+def _read_records(fd, pid, deadline):
+    """Collect the child's JSON lines until it exits or ``deadline`` passes.
+
+    Returns ``(output, status)``; the status is None if the child was still running.
+    """
+    buffer = b""
+    status = None
+    while status is None and time.monotonic() < deadline:
+        ready, _, _ = select.select([fd], [], [], min(0.05, max(0.0, deadline - time.monotonic())))
+        if ready:
+            chunk = os.read(fd, 65536)
+            buffer += chunk
+            if chunk:
+                continue
+        # Don't wait for EOF: processes the submission forked may hold the pipe open
+        reaped, exit_status = os.waitpid(pid, os.WNOHANG)
+        if reaped:
+            status = exit_status
+    while select.select([fd], [], [], 0)[0]:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            break
+        buffer += chunk
+    return buffer, status
+
+
+def _seconds(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0 else None
+
+
+def run_job(job):
+    if _isolation_error:
+        return {"error": NOT_ISOLATED, "tests": [], "seconds": 0.0}
+    inputs = _test_inputs(job["tests"])
+    # Records without this are forged by the submission
+    nonce = secrets.token_hex(16)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            _isolated(lambda: _run_child(job, inputs, write_fd, nonce))
+        finally:
+            os._exit(JAIL_FAILED)
+    os.close(write_fd)
+    started = time.monotonic()
+    buffer, status = _read_records(read_fd, pid, started + job["wall_seconds"])
+    os.close(read_fd)
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    if status is None:
+        _, status = os.waitpid(pid, 0)
+    if os.WIFEXITED(status) and os.WEXITSTATUS(status) == JAIL_FAILED:
+        return {"error": NOT_ISOLATED, "tests": [], "seconds": time.monotonic() - started}
+
+    # Accept at most one start and one result per test, in suite order
+    result = {"error": None, "tests": [], "seconds": time.monotonic() - started}
+    running = None
+    for line in buffer.decode(errors="replace").splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(record, dict) or record.get("nonce") != nonce:
+            continue
+        if len(result["tests"]) == len(job["tests"]):
+            break
+        test = job["tests"][len(result["tests"])]
+        if "error" in record:
+            if not result["tests"] and running is None and result["error"] is None:
+                result["error"] = _clean(record["error"], 200)
+        elif record.get("start") == test["name"]:
+            running = test["name"]
+        elif record.get("name") == test["name"] and result["error"] is None:
+            passed, message = _check(test, record)
+            result["tests"].append({"name": test["name"], "passed": passed,
+                                    "seconds": _seconds(record.get("seconds")), "message": message})
+            running = None
+
+    killed = os.WIFSIGNALED(status)
+    if running is not None:
+        if not killed:
+            reason = "Your code exited the interpreter"
+        elif os.WTERMSIG(status) in (signal.SIGSEGV, signal.SIGABRT):
+            reason = "Memory limit exceeded"
+        else:
+            reason = "Time limit exceeded"
+        result["tests"].append({"name": running, "passed": False, "seconds": None, "message": reason})
+    elif not result["tests"] and result["error"] is None:
+        result["error"] = ("Your code was stopped for exceeding the time or memory limit." if killed
+                           else "Your code exited before it could be tested.")
+    if result["error"] is None:
+        for test in job["tests"][len(result["tests"]):]:
+            result["tests"].append({"name": test["name"], "passed": False, "seconds": None, "message": "Not run"})
+    return result
+
+
+def _probe_isolation():
+    """Return why submissions can't be isolated here, or None if they can."""
+    global _libc, _nobody
+    try:
+        _libc = ctypes.CDLL(None, use_errno=True)
+        for name in ("unshare", "capset", "prctl"):
+            getattr(_libc, name)
+    except (OSError, AttributeError) as e:
+        return str(e)
+    try:
+        entry = pwd.getpwnam("nobody")
+        _nobody = (entry.pw_uid, entry.pw_gid)
+    except KeyError:
+        pass
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _isolated(lambda: None)
+        finally:
+            os._exit(JAIL_FAILED)
+    _, status = os.waitpid(pid, 0)
+    return None if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0 else "namespaces unavailable"
+
+
+def main():
+    global _isolation_error
+    # The jail's root: an empty directory nobody, the jailed process
+    # included, can write to
+    os.chdir(tempfile.mkdtemp(prefix="sandbox-"))
+    os.chmod(".", 0o500)
+    for name in PRELOADED_MODULES:
+        __import__(name)
+    _isolation_error = _probe_isolation()
+    for line in sys.stdin:
+        job = json.loads(line)
+        try:
+            result = run_job(job)
+        except Exception as e:
+            result = {"error": f"Sandbox error: {_clean(e)}", "tests": [], "seconds": 0.0}
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
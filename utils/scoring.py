@@ -0,0 +1,177 @@
+"""Assessment scoring and cohort percentiles.
+
+Each question's scoring rule is decided once, when the question is generated,
+and stored with it as ``category``. Scoring a submission is then a single
+table lookup over compact answer arrays. Cohort percentiles come from an
+incrementally maintained histogram of score percentages, so a lookup costs the
+same whether ten or ten thousand students have submitted.
+"""
+import threading
+
+import numpy as np
+
+from utils.storage import connect, data_path
+
+CATEGORIES = ["frequency", "ethical", "usage", "default"]
+MAX_SCORE_PER_QUESTION = 3
+
+# SCORE_TABLE[category, option] for options A-D
+SCORE_TABLE = np.array([
+    [0, 1, 2, 3],  # frequency questions: A=0, B=1, C=2, D=3
+    [3, 2, 1, 0],  # ethical questions: reverse scored
+    [1, 1, 1, 1],  # usage type questions: all options neutral
+    [1, 2, 2, 1],  # default: middle options score more
+], dtype=np.int8)
+
+UNANSWERED = -1
+HISTOGRAM_BINS = 101  # integer percentages 0-100
+
+
+def categorize_question(text):
+    """Pick the scoring rule for a question from its wording."""
+    text = text.lower()
+    if "how often" in text or "frequency" in text:
+        return "frequency"
+    if "feel" in text or "ethical" in text:
+        return "ethical"
+    if "task" in text or "use" in text:
+        return "usage"
+    return "default"
+
+
+def question_categories(questions):
+    """Category indices for a question set; older sets without one are categorized now."""
+    return np.fromiter(
+        (CATEGORIES.index(q.get('category') or categorize_question(q['text'])) for q in questions),
+        dtype=np.int8,
+        count=len(questions),
+    )
+
+
+def answer_indices(questions, user_answers):
+    """Encode answers as option indices (0-3), UNANSWERED where missing."""
+    indices = np.full(len(questions), UNANSWERED, dtype=np.int8)
+    for idx, question in enumerate(questions):
+        answer = user_answers.get(f"q{idx}")
+        if not answer:
+            continue
+        labels = [opt.split(". ", 1)[1] if ". " in opt else opt for opt in question['options']]
+        if answer in labels:
+            indices[idx] = labels.index(answer)
+    return indices
+
+
+def score_answers(categories, answers):
+    """Return ``(per-question scores, total, max possible)`` for answered questions.
+
+    Unanswered questions score 0 and don't count towards the maximum.
+    """
+    answered = answers != UNANSWERED
+    scores = np.where(answered, SCORE_TABLE[categories, np.clip(answers, 0, 3)], 0)
+    return scores, int(scores.sum()), int(answered.sum()) * MAX_SCORE_PER_QUESTION
+
+
+def percent_bin(percentage):
+    return int(np.clip(round(percentage), 0, HISTOGRAM_BINS - 1))
+
+
+class CohortScores:
+    """Durable cohort score distribution with O(1) percentile lookups.
+
+    Every submission is appended to an event log (a resubmission records the
+    student's previous bin so it can be moved rather than double counted).
+    The in-memory histogram and its running cumulative counts are advanced
+    from the log incrementally, which also picks up submissions made by other
+    server processes.
+    """
+
+    def __init__(self, path=None):
+        self._conn = connect(path or data_path("assessment_scores.sqlite3"))
+        self._lock = threading.Lock()
+        self._counts = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+        self._cumulative = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+        self._last_event = 0
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS score_events (
+                       id INTEGER PRIMARY KEY AUTOINCREMENT,
+                       user_id TEXT NOT NULL,
+                       bin INTEGER NOT NULL,
+                       prev_bin INTEGER
+                   )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS latest_scores (
+                       user_id TEXT PRIMARY KEY,
+                       bin INTEGER NOT NULL
+                   )"""
+            )
+
+    def _sync(self):
+        rows = self._conn.execute(
+            "SELECT id, bin, prev_bin FROM score_events WHERE id > ? ORDER BY id", (self._last_event,)
+        ).fetchall()
+        if not rows:
+            return
+        events = np.array([(row["bin"], -1 if row["prev_bin"] is None else row["prev_bin"]) for row in rows])
+        delta = np.bincount(events[:, 0], minlength=HISTOGRAM_BINS)
+        previous = events[:, 1][events[:, 1] >= 0]
+        delta -= np.bincount(previous, minlength=HISTOGRAM_BINS)
+        self._counts += delta
+        self._cumulative += np.cumsum(delta)
+        self._last_event = rows[-1]["id"]
+
+    def record(self, user_id, percentage):
+        """Store a student's latest score percentage."""
+        new_bin = percent_bin(percentage)
+        with self._lock:
+            with self._conn:
+                # Take the write lock before reading prev_bin, so another
+                # process can't record this student in between
+                self._conn.execute("BEGIN IMMEDIATE")
+                row = self._conn.execute(
+                    "SELECT bin FROM latest_scores WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                prev_bin = row["bin"] if row else None
+                if prev_bin == new_bin:
+                    return
+                self._conn.execute(
+                    "INSERT INTO score_events (user_id, bin, prev_bin) VALUES (?, ?, ?)",
+                    (user_id, new_bin, prev_bin),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO latest_scores (user_id, bin) VALUES (?, ?)",
+                    (user_id, new_bin),
+                )
+            self._sync()
+
+    def percentile_rank(self, percentage, user_id=None):
+        """Percent of the cohort scoring below ``percentage`` (ties count half).
+
+        With ``user_id``, that student's own recorded score is left out, so
+        they are compared only with everyone else.
+        """
+        score_bin = percent_bin(percentage)
+        with self._lock:
+            self._sync()
+            total = self._cumulative[-1]
+            below = self._cumulative[score_bin - 1] if score_bin else 0
+            ties = self._counts[score_bin]
+            if user_id is not None:
+                row = self._conn.execute(
+                    "SELECT bin FROM latest_scores WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                if row is not None:
+                    total -= 1
+                    if row["bin"] < score_bin:
+                        below -= 1
+                    elif row["bin"] == score_bin:
+                        ties -= 1
+            if not total:
+                return None
+            return float((below + 0.5 * ties) / total * 100)
+
+    def size(self):
+        with self._lock:
+            self._sync()
+            return int(self._cumulative[-1])
@@ -0,0 +1,24 @@
+import os
+import sqlite3
+
+# All on-disk state (caches, journals, forum data) lives under one directory so
+# deployments can point it at a persistent volume.
+DATA_DIR = os.environ.get(
+    "STUDY_BUDDY_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".data"),
+)
+
+
+def data_path(filename):
+    """Return the absolute path of ``filename`` inside the data directory."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
+
+
+def connect(path, check_same_thread=False):
+    """Open a SQLite connection tuned for many readers and one writer."""
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,338 @@
+"""Word- and sentence-level diffs for the Writing Challenge.
+
+Texts are tokenized into words and punctuation (compared case-insensitively)
+and diffed with patience anchoring over Myers' O(ND) algorithm: the common
+prefix and suffix are trimmed, words that occur exactly once on both sides
+and keep their order split the texts into small independent regions, and
+only those regions go through Myers. An essay with scattered edits therefore
+never pays for one big quadratic diff. A region whose edit distance passes
+``MAX_EDIT_COST`` is reported as a single replacement.
+
+Opcodes are ``(tag, i1, i2, j1, j2)`` tuples as in ``difflib``, over tokens.
+``analyze_rewrite`` checks which seeded false claims a rewrite corrected
+and caches results per (original, rewrite) hash.
+"""
+import bisect
+import hashlib
+import html
+import re
+import threading
+from collections import Counter, OrderedDict
+
+MAX_EDIT_COST = 2000
+CACHE_SIZE = 256
+# A claim that disappeared only counts as corrected when the rewrite kept at
+# least this share of the original's words; otherwise the paragraph was
+# thrown away rather than edited
+MIN_KEPT_FOR_REMOVAL = 0.25
+
+_TOKEN_RE = re.compile(r"\w+(?:['’]\w+)*|[^\w\s]")
+_SENTENCE_RE = re.compile(r"[^.!?]+(?:[.!?]+|$)")
+NEGATIONS = {"not", "no", "never", "isn't", "aren't", "don't", "doesn't", "cannot", "can't", "rarely", "seldom"}
+# Words that don't carry a claim: intensifiers, hedges and function words.
+# Deleting, swapping or inserting them doesn't correct anything
+FILLER = {
+    "a", "an", "the", "as", "of", "like", "is", "are", "be", "so", "very", "really", "truly", "totally",
+    "completely", "absolutely", "entirely", "fully", "quite", "rather", "pretty", "somewhat", "sort", "kind",
+    "basically", "essentially", "actually", "literally", "just", "perhaps", "maybe", "possibly", "probably",
+    "arguably", "mostly", "generally", "usually", "often", "sometimes", "somehow", "almost", "nearly",
+    "fairly", "highly", "extremely", "slightly", "bit", "little",
+}
+
+# The false claims seeded into the Writing Challenge paragraph. A claim counts
+# as corrected when each of its false phrases lost a key word (deleted or
+# replaced) or was negated
+WRITING_CLAIMS = [
+    {
+        "claim": "Artificial intelligence is when computers can think like humans.",
+        "label": "AI is not computers thinking like humans",
+        "phrases": ["think like humans"],
+    },
+    {
+        "claim": "All AI systems are completely objective and never make mistakes.",
+        "label": "AI systems can be biased and make mistakes",
+        "phrases": ["completely objective", "never make mistakes"],
+    },
+    {
+        "claim": "Machine learning is the same as artificial intelligence.",
+        "label": "Machine learning is a subset of AI, not the same thing",
+        "phrases": ["the same as"],
+    },
+]
+WRITING_PARAGRAPH = " ".join(claim["claim"] for claim in WRITING_CLAIMS)
+
+
+def tokenize(text):
+    """Return ``(words, spans)``: lowercased tokens and their ``(start, end)`` offsets."""
+    words, spans = [], []
+    for match in _TOKEN_RE.finditer(text or ""):
+        words.append(match.group().lower().replace("’", "'"))
+        spans.append(match.span())
+    return words, spans
+
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in _SENTENCE_RE.findall(text or "") if sentence.strip()]
+
+
+def _myers(a, b, alo, ahi, blo, bhi, max_cost):
+    """Edit script for ``a[alo:ahi]`` -> ``b[blo:bhi]`` as ``(tag, i, j)`` steps."""
+    n, m = ahi - alo, bhi - blo
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)
+    trace = []
+    for d in range(min(n + m, max_cost) + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                trace.append(v[offset - d:offset + d + 1])
+                return _backtrack(trace, n, m, alo, blo)
+        trace.append(v[offset - d:offset + d + 1])
+    return None
+
+
+def _backtrack(trace, x, y, alo, blo):
+    steps = []
+    for d in range(len(trace) - 1, 0, -1):
+        previous = trace[d - 1]  # covers k in [-(d-1), d-1]
+        k = x - y
+        if k == -d or (k != d and previous[k - 1 + d - 1] < previous[k + 1 + d - 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = previous[prev_k + d - 1]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            steps.append(("equal", alo + x, blo + y))
+        if x == prev_x:
+            steps.append(("insert", alo + x, blo + prev_y))
+        else:
+            steps.append(("delete", alo + prev_x, blo + y))
+        x, y = prev_x, prev_y
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        steps.append(("equal", alo + x, blo + y))
+    steps.reverse()
+    return steps
+
+
+def _unique_anchors(a, b, alo, ahi, blo, bhi):
+    """Longest in-order run of words that occur exactly once in both regions."""
+    count_a = Counter(a[alo:ahi])
+    count_b = Counter(b[blo:bhi])
+    position_b = {}
+    for j in range(blo, bhi):
+        if count_b[b[j]] == 1 and count_a[b[j]] == 1:
+            position_b[b[j]] = j
+    pairs = [(i, position_b[a[i]]) for i in range(alo, ahi) if a[i] in position_b]
+    # Patience sorting: longest increasing subsequence of the b positions
+    tails, tail_index, links = [], [], []
+    for idx, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_index.append(idx)
+        else:
+            tails[pos] = j
+            tail_index[pos] = idx
+        links.append(tail_index[pos - 1] if pos else None)
+    anchors = []
+    idx = tail_index[-1] if tail_index else None
+    while idx is not None:
+        anchors.append(pairs[idx])
+        idx = links[idx]
+    anchors.reverse()
+    return anchors
+
+
+def _diff_steps(a, b, alo, ahi, blo, bhi, max_cost, steps):
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        steps.append(("equal", alo, blo))
+        alo += 1
+        blo += 1
+    suffix = []
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+        suffix.append(("equal", ahi, bhi))
+    if alo == ahi or blo == bhi:
+        steps.extend(("delete", i, blo) for i in range(alo, ahi))
+        steps.extend(("insert", ahi, j) for j in range(blo, bhi))
+    else:
+        anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+        if anchors:
+            for i, j in anchors:
+                _diff_steps(a, b, alo, i, blo, j, max_cost, steps)
+                steps.append(("equal", i, j))
+                alo, blo = i + 1, j + 1
+            _diff_steps(a, b, alo, ahi, blo, bhi, max_cost, steps)
+        else:
+            region = _myers(a, b, alo, ahi, blo, bhi, max_cost)
+            if region is None:
+                # Too different to be worth aligning word by word
+                steps.extend(("delete", i, blo) for i in range(alo, ahi))
+                steps.extend(("insert", ahi, j) for j in range(blo, bhi))
+            else:
+                steps.extend(region)
+    steps.extend(reversed(suffix))
+
+
+def diff_opcodes(a, b, max_cost=MAX_EDIT_COST):
+    """``difflib``-style opcodes turning sequence ``a`` into ``b``."""
+    steps = []
+    _diff_steps(a, b, 0, len(a), 0, len(b), max_cost, steps)
+    opcodes = []
+    i = j = 0
+    for tag, _, _ in steps:
+        i1, j1 = i, j
+        if tag == "equal":
+            i, j = i + 1, j + 1
+        elif tag == "delete":
+            i += 1
+        else:
+            j += 1
+        if opcodes and (opcodes[-1][0] == tag or (tag != "equal" and opcodes[-1][0] != "equal")):
+            previous = opcodes[-1]
+            merged = tag if previous[0] == tag else "replace"
+            opcodes[-1] = (merged, previous[1], i, previous[3], j)
+        else:
+            opcodes.append((tag, i1, i, j1, j))
+    return opcodes
+
+
+def _find(sequence, needle):
+    for start in range(len(sequence) - len(needle) + 1):
+        if sequence[start:start + len(needle)] == needle:
+            return start
+    return None
+
+
+def _claim_status(claim, words, rewrite_words, opcodes):
+    claim_words, _ = tokenize(claim["claim"])
+    start = _find(words, claim_words)
+    if start is None:
+        return "not in original"
+    end = start + len(claim_words)
+    kept = set()
+    for tag, i1, i2, _, _ in opcodes:
+        if tag == "equal":
+            kept.update(range(i1, i2))
+    if not any(words[i][:1].isalnum() for i in kept.intersection(range(start, end))):
+        return "removed"
+    fixed = 0
+    for phrase in claim["phrases"]:
+        phrase_words, _ = tokenize(phrase)
+        offset = start + _find(claim_words, phrase_words)
+        phrase_end = offset + len(phrase_words)
+        key = [i for i in range(offset, phrase_end) if words[i] not in FILLER]
+        # Negations added between the start of the claim and the end of the
+        # phrase; an even number ("not not") cancels out, and a phrase that
+        # already holds one ("never") isn't fixed by repeating it
+        negations = sum(
+            sum(1 for word in rewrite_words[j1:j2] if word in NEGATIONS)
+            for tag, i1, i2, j1, j2 in opcodes
+            if tag in ("insert", "replace") and start <= i2 and i1 < phrase_end
+        )
+        negated = negations % 2 == 1 and not NEGATIONS.intersection(phrase_words)
+        if negated or not kept.issuperset(key):
+            fixed += 1
+    if fixed == len(claim["phrases"]):
+        return "fixed"
+    return "partly fixed" if fixed else "unchanged"
+
+
+def render_diff(original, rewrite, opcodes, original_spans, rewrite_spans):
+    """HTML of the rewrite with removed words struck through and added words highlighted."""
+    parts = []
+    position = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag in ("delete", "replace"):
+            removed = original[original_spans[i1][0]:original_spans[i2 - 1][1]]
+            parts.append(html.escape(rewrite[position:rewrite_spans[j1][0]] if j1 < len(rewrite_spans) else ""))
+            if j1 < len(rewrite_spans):
+                position = rewrite_spans[j1][0]
+            parts.append(f"<del>{html.escape(removed)}</del> ")
+        if tag == "delete":
+            continue
+        end = rewrite_spans[j2 - 1][1]
+        text = html.escape(rewrite[position:end])
+        parts.append(text if tag == "equal" else f"<ins>{text}</ins>")
+        position = end
+    parts.append(html.escape(rewrite[position:]))
+    return "".join(parts).strip()
+
+
+def _analyze(original, rewrite, claims):
+    a, a_spans = tokenize(original)
+    b, b_spans = tokenize(rewrite)
+    opcodes = diff_opcodes(a, b)
+    changed = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag != "equal")
+    added = sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag != "equal")
+
+    sentences_a = split_sentences(original)
+    sentences_b = split_sentences(rewrite)
+    sentence_ops = diff_opcodes([tuple(tokenize(s)[0]) for s in sentences_a],
+                                [tuple(tokenize(s)[0]) for s in sentences_b])
+    kept_sentences = sum(i2 - i1 for tag, i1, i2, _, _ in sentence_ops if tag == "equal")
+
+    results = [dict(claim=claim["claim"], label=claim["label"], status=_claim_status(claim, a, b, opcodes))
+               for claim in claims]
+    words = sum(1 for token in a if token[:1].isalnum())
+    kept_words = sum(1 for tag, i1, i2, _, _ in opcodes if tag == "equal"
+                     for token in a[i1:i2] if token[:1].isalnum())
+    if not words or kept_words / words < MIN_KEPT_FOR_REMOVAL:
+        for result in results:
+            if result["status"] == "removed":
+                result["status"] = "dropped"
+    gradable = [result for result in results if result["status"] != "not in original"]
+    credit = {"fixed": 1.0, "removed": 1.0, "partly fixed": 0.5}
+    return {
+        "claims": results,
+        "coverage": sum(credit.get(r["status"], 0.0) for r in gradable) / len(gradable) if gradable else None,
+        "words_changed": changed,
+        "words_added": added,
+        "change_ratio": changed / len(a) if a else 0.0,
+        "sentences_kept": kept_sentences,
+        "sentences_total": len(sentences_a),
+        "opcodes": opcodes,
+        "html": render_diff(original, rewrite, opcodes, a_spans, b_spans),
+    }
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def analyze_rewrite(original, rewrite, claims=WRITING_CLAIMS):
+    """Diff a rewrite against the original and grade which claims it corrected.
+
+    Returns ``claims`` (each with a ``status`` of fixed, partly fixed,
+    removed, dropped, unchanged or not in original), ``coverage`` (share of
+    the claims corrected, partial fixes counting half; a claim ``dropped``
+    along with most of the paragraph earns nothing), word and sentence change
+    counts, the word ``opcodes`` and an ``html`` rendering of the edits.
+    """
+    key = hashlib.sha256(f"{original}\0{rewrite}".encode("utf-8")).hexdigest()
+    if claims is not WRITING_CLAIMS:
+        key += hashlib.sha256(repr(claims).encode("utf-8")).hexdigest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    result = _analyze(original or "", rewrite or "", claims)
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result